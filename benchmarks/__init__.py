@@ -0,0 +1,3 @@
+"""
+Benchmarks of the semver_popularity package on synthetic corpora, see `benchmarks.corpus` and `benchmarks.run`.
+"""
@@ -0,0 +1,66 @@
+"""
+Compares the ways of reading the .bin files of a popularity tree, by default the shipped
+resources/popularity_of_methods:
+
+    python -m benchmarks.bin_loaders
+    python -m benchmarks.bin_loaders --directory benchmarks/.corpus/10000-0/popularity --repeat 5
+
+`regex` is the reader the scripts and the notebook used before `read_bin` (values only, and without the last line),
+`lines` parses line by line in Python and `read_bin` is the bulk parser. Before timing, `read_bin` is checked to
+give the same arrays as `lines` on every file.
+"""
+import argparse
+import glob
+import os
+import re
+import time
+
+import numpy as np
+
+from semver_popularity.binfiles import read_bin, read_bin_lines
+
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(__file__), os.pardir, 'resources', 'popularity_of_methods')
+
+
+def read_bin_regex(path):
+    with open(path) as file:
+        return [float('nan') if x == 'na' else float(x) for x in re.findall(r',(.*)\n', file.read())]
+
+
+LOADERS = {'regex': read_bin_regex, 'lines': read_bin_lines, 'read_bin': read_bin}
+
+
+def check(files):
+    for path in files:
+        ids, values = read_bin(path)
+        expected_ids, expected_values = read_bin_lines(path)
+        if not (np.array_equal(ids, expected_ids) and np.array_equal(values, expected_values, equal_nan=True)):
+            raise AssertionError('read_bin differs from the line parser on ' + path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times the .bin readers on a popularity tree.')
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.directory, '*', '*.bin')))
+    size = sum(os.path.getsize(path) for path in files)
+    check(files)
+    rows = sum(len(read_bin(path)[0]) for path in files)
+    print('%d files, %d rows, %.1f MB' % (len(files), rows, size / 1024 ** 2))
+    # The readers take turns in every round, so a change of load on the machine affects them alike
+    best = {name: float('inf') for name in LOADERS}
+    for _ in range(args.repeat):
+        for name, loader in LOADERS.items():
+            start = time.perf_counter()
+            for path in files:
+                loader(path)
+            best[name] = min(best[name], time.perf_counter() - start)
+    for name in LOADERS:
+        print('%-10s %8.3fs  %6.1f MB/s  %5.2fx regex  %5.2fx lines' % (
+            name, best[name], size / 1024 ** 2 / best[name], best['regex'] / best[name], best['lines'] / best[name]))
+
+
+if __name__ == '__main__':
+    main()
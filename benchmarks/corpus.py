@@ -0,0 +1,187 @@
+"""
+Deterministic generator of a synthetic corpus in the formats of the real data, for benchmarks at scales we cannot
+share. For `artifacts` GAs it writes, under one directory:
+
+    breaking_changes.txt, api_extensions.txt   majors in the format of the Java phase
+    popularity/<g>:<a>$<version>/<metric>.bin  popularity of the callables of the latest version of a GA
+    input/<g>_<a>_<version>/dependents.txt     dependents of the latest version of a GA, one coordinate per line
+    callables.txt                              all callable ids with a popularity, on a single line
+    mvn.expanded_coords.txt                    every g:a:version
+
+The shapes follow the real data loosely: most GAs have one or two majors, method counts are log-normal, most
+majors have no violation, most popularity values are 0 and dependents follow a Zipf law. The same arguments always
+give the same files.
+"""
+import argparse
+import json
+import os
+import shutil
+
+import numpy as np
+
+from semver_popularity.popularity_store import METRICS
+
+HEADER = ('Skip the first line when parsing this file. The format of this file is as follows: '
+          'groupId:artifactId:majorVersion:#violations/#totalMethods:[callable.IDs with BC]\n')
+CORPUS_FILE = 'corpus.json'
+TYPES = ('I', 'J', 'Z', '%2Fjava.lang%2FString', '%2Fjava.util%2FList', '%2Fjava.lang%2FObject')
+RETURNS = ('V', 'I', 'Z', '%2Fjava.lang%2FString', '%2Fjava.lang%2FVoidType')
+
+
+class Corpus:
+    """Paths of a generated corpus."""
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self.breaking_changes = os.path.join(self.directory, 'breaking_changes.txt')
+        self.api_extensions = os.path.join(self.directory, 'api_extensions.txt')
+        self.popularity = os.path.join(self.directory, 'popularity')
+        self.dependents = os.path.join(self.directory, 'input')
+        self.callables = os.path.join(self.directory, 'callables.txt')
+        self.coordinates = os.path.join(self.directory, 'mvn.expanded_coords.txt')
+        with open(os.path.join(self.directory, CORPUS_FILE)) as file:
+            self.parameters = json.load(file)
+
+    @property
+    def artifacts(self):
+        return self.parameters['artifacts']
+
+
+def label(rng, callable_id, version, number):
+    """A callable label like the Java phase writes them: id/version//package/Class.method(params)return."""
+    params = ''.join(TYPES[i] for i in rng.integers(0, len(TYPES), rng.integers(0, 3)))
+    return '%d/%s//org.example.p%d/C%d.m%d(%s)%s' % (callable_id, version, number % 7, number % 13, number, params,
+                                                    RETURNS[rng.integers(0, len(RETURNS))])
+
+
+def versions_of_major(rng, major):
+    minors = int(rng.integers(1, 4))
+    versions = list()
+    for minor in range(minors):
+        for patch in range(int(rng.integers(1, 4))):
+            versions.append('%d.%d.%d' % (major, minor, patch))
+    if rng.random() < 0.1:
+        versions.append('%d.%d.0-rc1' % (major, minors))
+    return versions
+
+
+def popularity_values(rng, metric, n):
+    values = np.where(rng.random(n) < 0.7, 0.0, rng.pareto(1.5, n) / 50)
+    if metric == 'degree':
+        values = np.floor(values * 100)
+    elif metric != 'eigenvector':
+        values = np.minimum(values, 1.0)
+    values = np.sort(values)[::-1]
+    text = ['%.17g' % value if value > 0 else '0.0' for value in values]
+    if metric == 'eigenvector':
+        text = [value if rng.random() > 0.05 else 'na' for value in text]
+    return text
+
+
+def write_bin(path, ids, values):
+    # Like the popularity phase, the last line has no newline
+    with open(path, 'w') as file:
+        file.write('\n'.join('%d,%s' % (callable_id, value) for callable_id, value in zip(ids, values)))
+
+
+def generate(directory, artifacts, seed=0, popularity_share=0.2, dependents_share=0.2, max_bin_rows=2000):
+    """
+    Writes a corpus of `artifacts` GAs to `directory` and returns it. Only a random `popularity_share` of the GAs
+    get popularity files and only `dependents_share` get dependents, to keep the larger corpora on a reasonable disk
+    budget (about 8 MB per thousand GAs with the defaults).
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    corpus_dependents = max(100, artifacts * 2)
+    next_callable = 1_000_000
+    all_callables = list()
+
+    with open(os.path.join(directory, 'breaking_changes.txt'), 'w') as bc_file, \
+            open(os.path.join(directory, 'api_extensions.txt'), 'w') as api_file, \
+            open(os.path.join(directory, 'mvn.expanded_coords.txt'), 'w') as coordinates_file:
+        bc_file.write(HEADER)
+        api_file.write(HEADER)
+        for artifact in range(artifacts):
+            groupId = 'org.example.g%d' % (artifact // 8)
+            artifactId = 'lib-%d' % artifact
+            number_of_majors = min(int(rng.geometric(0.6)), 8)
+            methods = max(1, int(rng.lognormal(5, 1.2)))
+            first_callable = next_callable
+            next_callable += methods
+            latest = None
+
+            for major in range(1, number_of_majors + 1):
+                versions = versions_of_major(rng, major)
+                for version in versions:
+                    coordinates_file.write('%s:%s:%s\n' % (groupId, artifactId, version))
+                latest = versions[-1]
+
+                bc_labels = list()
+                api_labels = list()
+                if rng.random() < 0.35:
+                    for _ in range(min(methods, int(rng.geometric(0.05)))):
+                        number = int(rng.integers(0, methods))
+                        version = versions[int(rng.integers(0, len(versions)))]
+                        bc_labels.append(label(rng, first_callable + number, version, number))
+                        # A duplicated name: the same method added back with other parameters
+                        if rng.random() < 0.2:
+                            api_labels.append(label(rng, first_callable + number, version, number))
+                if rng.random() < 0.3:
+                    for _ in range(min(methods, int(rng.geometric(0.08)))):
+                        number = int(rng.integers(0, methods))
+                        api_labels.append(label(rng, first_callable + number, versions[-1], number))
+
+                bc_file.write('%s:%s:%d:%d/%d:[%s]\n' % (groupId, artifactId, major, len(bc_labels), methods,
+                                                         ', '.join(bc_labels)))
+                api_file.write('%s:%s:%d:%d/%d:[%s]\n' % (groupId, artifactId, major, len(api_labels), methods,
+                                                          ', '.join(api_labels)))
+
+            if rng.random() < popularity_share:
+                package = os.path.join(directory, 'popularity', '%s:%s$%s' % (groupId, artifactId, latest))
+                os.makedirs(package, exist_ok=True)
+                ids = first_callable + rng.permutation(methods)[:max_bin_rows]
+                all_callables.append(ids)
+                for metric in METRICS:
+                    write_bin(os.path.join(package, metric + '.bin'), ids, popularity_values(rng, metric, len(ids)))
+
+            if rng.random() < dependents_share:
+                package = os.path.join(directory, 'input', '%s_%s_%s' % (groupId, artifactId, latest))
+                os.makedirs(package, exist_ok=True)
+                dependents = np.minimum(rng.zipf(1.3, int(rng.geometric(0.02))), corpus_dependents)
+                with open(os.path.join(package, 'dependents.txt'), 'w') as file:
+                    file.write(''.join('org.dependent:d%d:1.0\n' % dependent for dependent in np.unique(dependents)))
+
+    all_callables = np.concatenate(all_callables) if all_callables else np.zeros(0, dtype=np.int64)
+    with open(os.path.join(directory, 'callables.txt'), 'w') as file:
+        file.write(','.join(str(callable_id) for callable_id in all_callables))
+    with open(os.path.join(directory, CORPUS_FILE), 'w') as file:
+        json.dump({'artifacts': artifacts, 'seed': seed, 'popularity_share': popularity_share,
+                   'dependents_share': dependents_share, 'max_bin_rows': max_bin_rows}, file)
+    return Corpus(directory)
+
+
+def load_or_generate(directory, artifacts, seed=0):
+    """Reuses the corpus in `directory` if it was generated with the same size and seed."""
+    try:
+        corpus = Corpus(directory)
+        if corpus.parameters['artifacts'] == artifacts and corpus.parameters['seed'] == seed:
+            return corpus
+    except (OSError, ValueError, KeyError):
+        pass
+    shutil.rmtree(directory, ignore_errors=True)
+    return generate(directory, artifacts, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Writes a synthetic corpus in the formats of the real data.')
+    parser.add_argument('directory')
+    parser.add_argument('--artifacts', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--popularity-share', type=float, default=0.2)
+    parser.add_argument('--dependents-share', type=float, default=0.2)
+    args = parser.parse_args()
+    generate(args.directory, args.artifacts, args.seed, args.popularity_share, args.dependents_share)
+
+
+if __name__ == '__main__':
+    main()
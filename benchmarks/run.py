@@ -0,0 +1,296 @@
+"""
+Times and memory-profiles the public functions of semver_popularity on synthetic corpora of several sizes:
+
+    python -m benchmarks.run --sizes 1000 10000 100000 --output results.json
+    python -m benchmarks.run --sizes 1000 --only read_bins join_popularities --compare results.json
+
+Every benchmark gets the corpus, does its set-up outside of the measurement and returns the function to measure.
+The function is run `--repeat` times for the wall and CPU times, then once more under tracemalloc for the peak of
+Python allocations. Results are written as JSON together with the versions they were measured with.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from semver_popularity import parsing
+from semver_popularity.aggregation import compress_major_to_package, compress_table
+from semver_popularity.binfiles import read_bin
+from semver_popularity.binning import BinAccumulator
+from semver_popularity.callables import CallableStore, split_label
+from semver_popularity.coordinates import CoordinateIndex
+from semver_popularity.cutoff import area_cutoff
+from semver_popularity.directory_index import DirectoryIndex
+from semver_popularity.duplicates import CATEGORIES, LabelParser, remove_duplicate_names
+from semver_popularity.join import callable_ids_of, deduplicate, join_popularity
+from semver_popularity.popularity_store import build_store
+from semver_popularity.sketch import QuantileSketch, merge_all
+from semver_popularity.violations import versions_with_violations
+from semver_popularity.windows import percentage_in_n_windows
+
+from .corpus import load_or_generate
+
+DEFAULT_SIZES = (1000, 10000)
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(__file__), '.corpus')
+METRIC = 'dependent-percentage'
+
+BENCHMARKS = dict()
+
+
+def benchmark(function):
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def bin_files(corpus, metric=METRIC):
+    return sorted(os.path.join(corpus.popularity, name, metric + '.bin') for name in os.listdir(corpus.popularity))
+
+
+def store_file(corpus):
+    return os.path.join(corpus.directory, 'popularity.store')
+
+
+def compressed_pairs(corpus):
+    """The compressed breaking changes and API extensions of every GA, paired by GA."""
+    bc = compress_major_to_package(list(parsing.iter_majors(corpus.breaking_changes)))
+    api = {(artifact.groupId, artifact.artifactId): artifact
+           for artifact in compress_major_to_package(list(parsing.iter_majors(corpus.api_extensions)))}
+    return [(artifact, api[(artifact.groupId, artifact.artifactId)]) for artifact in bc]
+
+
+@benchmark
+def iter_majors(corpus):
+    return lambda: list(parsing.iter_majors(corpus.breaking_changes))
+
+
+@benchmark
+def read_table(corpus):
+    return lambda: parsing.read_table(corpus.breaking_changes)
+
+
+@benchmark
+def compress_majors(corpus):
+    majors = list(parsing.iter_majors(corpus.breaking_changes))
+    return lambda: compress_major_to_package(majors)
+
+
+@benchmark
+def compress_majors_table(corpus):
+    table = parsing.read_table(corpus.breaking_changes)
+    return lambda: compress_table(table)
+
+
+@benchmark
+def directory_index(corpus):
+    gas = [(major.groupId, major.artifactId) for major in parsing.iter_majors(corpus.breaking_changes)]
+
+    def run():
+        index = DirectoryIndex.build(corpus.popularity)
+        return [index.lookup(groupId, artifactId) for groupId, artifactId in gas]
+    return run
+
+
+@benchmark
+def read_bins(corpus):
+    files = bin_files(corpus)
+    return lambda: [read_bin(path) for path in files]
+
+
+@benchmark
+def build_popularity_store(corpus):
+    store_path = store_file(corpus)
+    return lambda: build_store(corpus.popularity, store_path)
+
+
+@benchmark
+def store_lookup(corpus):
+    store = build_store(corpus.popularity, store_file(corpus))
+    ids = callable_ids_of(parsing.iter_majors(corpus.breaking_changes))
+    return lambda: store.lookup(METRIC, ids)
+
+
+@benchmark
+def join_popularities(corpus):
+    files = [read_bin(path) for path in bin_files(corpus)]
+    ids = np.concatenate([file_ids for file_ids, _ in files])
+    values = np.concatenate([file_values for _, file_values in files])
+    bc_ids = callable_ids_of(compress_major_to_package(list(parsing.iter_majors(corpus.breaking_changes))))
+    with open(corpus.callables) as file:
+        callable_ids = np.array([int(callable_id) for callable_id in file.readline().split(',') if callable_id],
+                                dtype=np.int64)
+
+    def run():
+        unique_ids, unique_values = deduplicate(ids, values)
+        return join_popularity(unique_ids, unique_values, bc_ids, callable_ids).no_bc
+    return run
+
+
+@benchmark
+def callable_store(corpus):
+    return lambda: CallableStore.parse(corpus.breaking_changes)
+
+
+@benchmark
+def callable_lookup(corpus):
+    store = CallableStore.parse(corpus.breaking_changes)
+    labels = [label for major in parsing.iter_majors(corpus.breaking_changes) for label in major.callables]
+    queries = [split_label(label) for label in labels[::max(1, len(labels) // 1000)]]
+    return lambda: [(store.by_id(callable_id), store.by_class(components[1], components[2]))
+                    for callable_id, components in queries]
+
+
+@benchmark
+def duplicate_names(corpus):
+    pairs = compressed_pairs(corpus)
+
+    def run():
+        parser = LabelParser()
+        return [remove_duplicate_names(bc.callables, api.callables, CATEGORIES, parser)[0] for bc, api in pairs]
+    return run
+
+
+@benchmark
+def violated_versions(corpus):
+    artifacts = compress_major_to_package(list(parsing.iter_majors(corpus.breaking_changes)))
+    return lambda: versions_with_violations(artifacts)
+
+
+@benchmark
+def windows(corpus):
+    dependents = defaultdict(int)
+    for name in os.listdir(corpus.dependents):
+        with open(os.path.join(corpus.dependents, name, 'dependents.txt')) as file:
+            dependents[':'.join(name.split('_')[:2])] = sum(1 for _ in file)
+    artifacts = compress_major_to_package(list(parsing.iter_majors(corpus.breaking_changes)))
+    all_values = [dependents[artifact.groupId + ':' + artifact.artifactId] for artifact in artifacts]
+    bc_values = [dependents[artifact.groupId + ':' + artifact.artifactId]
+                 for artifact in artifacts if artifact.violations > 0]
+    return lambda: percentage_in_n_windows(all_values, bc_values, 130, max(all_values))
+
+
+@benchmark
+def bin_accumulator(corpus):
+    store = build_store(corpus.popularity, store_file(corpus))
+    packages = [values for _, (_, values) in store.iter_packages(METRIC)]
+
+    def run():
+        accumulator = BinAccumulator(100, sketch=True)
+        for values in packages:
+            accumulator.add(values)
+        averages = accumulator.averages()
+        area_cutoff(np.arange(len(averages)), np.nan_to_num(averages), 0.8)
+        return averages
+    return run
+
+
+@benchmark
+def quantile_sketches(corpus):
+    store = build_store(corpus.popularity, store_file(corpus))
+    packages = [values for _, (_, values) in store.iter_packages(METRIC)]
+
+    def run():
+        sketch = merge_all(QuantileSketch.of(values) for values in packages)
+        return sketch.quantiles([0.2, 0.4, 0.6, 0.8])
+    return run
+
+
+@benchmark
+def coordinate_index(corpus):
+    gas = set(major.groupId + ':' + major.artifactId for major in parsing.iter_majors(corpus.breaking_changes))
+
+    def run():
+        index = CoordinateIndex.parse(corpus.coordinates)
+        index.count(gas, ('minor', 'patch'))
+        return index
+    return run
+
+
+def measure(function, repeat):
+    wall = list()
+    cpu = list()
+    result = None
+    for _ in range(repeat):
+        result = None
+        gc.collect()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        result = function()
+        cpu.append(time.process_time() - cpu_start)
+        wall.append(time.perf_counter() - wall_start)
+
+    records = len(result) if hasattr(result, '__len__') else None
+    result = None
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'wall_seconds': wall, 'cpu_seconds': cpu, 'best_seconds': min(wall), 'peak_bytes': peak,
+            'records': records}
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__)).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': sys.version.split()[0],
+            'numpy': np.__version__, 'platform': platform.platform(), 'cpus': os.cpu_count()}
+
+
+def run(sizes, names, repeat, corpus_dir, seed=0):
+    results = list()
+    for size in sizes:
+        corpus = load_or_generate(os.path.join(corpus_dir, '%d-%d' % (size, seed)), size, seed)
+        for name in names:
+            result = {'benchmark': name, 'artifacts': size}
+            result.update(measure(BENCHMARKS[name](corpus), repeat))
+            results.append(result)
+            print('%-24s %9d  %10.4fs  %12d B peak' % (name, size, result['best_seconds'], result['peak_bytes']))
+    return results
+
+
+def compare(results, previous):
+    """Prints the best time of every benchmark against the one of a previous results file."""
+    before = {(result['benchmark'], result['artifacts']): result for result in previous['results']}
+    print('%-24s %9s  %10s  %10s  %7s' % ('benchmark', 'artifacts', 'before', 'after', 'ratio'))
+    for result in results:
+        old = before.get((result['benchmark'], result['artifacts']))
+        if old is None:
+            continue
+        print('%-24s %9d  %9.4fs  %9.4fs  %6.2fx' % (result['benchmark'], result['artifacts'], old['best_seconds'],
+                                                     result['best_seconds'],
+                                                     old['best_seconds'] / max(result['best_seconds'], 1e-12)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks semver_popularity on synthetic corpora.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES), help='numbers of GAs')
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='benchmarks to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus-dir', default=DEFAULT_CORPUS_DIR, help='where generated corpora are kept')
+    parser.add_argument('--output', help='JSON file to write the results to')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.only or list(BENCHMARKS), args.repeat, args.corpus_dir, args.seed)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({'meta': metadata(), 'results': results}, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,25 @@
-import glob, os, re
+import argparse
+import glob, os
+import warnings
 from statistics import median
 
-import matplotlib.pyplot as plt
 import numpy
-import pandas as pd
-import seaborn as sns
 from numpy import average
 
-sns.set_theme()
+from semver_popularity import fitting, ingest, instrumentation, plotting
+from semver_popularity.binfiles import read_bin
+from semver_popularity.binning import BinAccumulator
+from semver_popularity.cutoff import area_cutoff
+from semver_popularity.plotting import plt
+from semver_popularity.popularity_store import open_current
+from semver_popularity.summaries import is_current, read_source_stamps, read_summaries, summarize_packages
 
 NUM_BINS = 1000
 OUTPUT_DIR = 'resources/only_publics'
+# Built with `python -m semver_popularity.popularity_store resources/only_publics resources/only_publics.store`
+STORE_FILE = OUTPUT_DIR + '.store'
+# Built with `python -m semver_popularity.summaries resources/only_publics resources/only_publics.summary.csv`
+SUMMARY_FILE = OUTPUT_DIR + '.summary.csv'
 FIGURE_DIR = 'plots'
 
 def split(a, n):
@@ -18,50 +27,116 @@ def split(a, n):
     return [a[i * k + min(i, m):(i + 1) * k + min(i + 1, m)] for i in range(n)]
 
 
-def analyse(type):
-    data = [[] for _ in range(NUM_BINS)]
-    for file in glob.glob(os.path.join(OUTPUT_DIR, '*', f'{type}.bin')):
-        temp_data = [float(x) for x in re.findall(r',(.*)\n', open(file).read()) if x != '0.0']
+def open_store(type):
+    """The store if it has been built and holds the metric as the .bin files are now, else None."""
+    return open_current(STORE_FILE, OUTPUT_DIR, type)
+
+
+def read_packages(type, packages=None):
+    """
+    Yields the package and values of every package for the metric, or only of the given packages, from the store if
+    it is current.
+    """
+    store = open_store(type)
+    if store is not None:
+        for package in store.packages_with(type):
+            if packages is None or package in packages:
+                yield package, store.package(type, package)[1]
+        return
+    files = [file for file in glob.glob(os.path.join(OUTPUT_DIR, '*', f'{type}.bin'))
+             if packages is None or os.path.basename(os.path.dirname(file)) in packages]
+    for file, popularity in zip(files, ingest.iter_files(read_bin, files, 'popularity')):
+        yield os.path.basename(os.path.dirname(file)), popularity[1]
+
+
+def current_summaries(type):
+    """The summaries of the metric from the summary table, if it holds the metric as the .bin files are now."""
+    if not os.path.exists(SUMMARY_FILE):
+        return None
+    # Without the .bin tree there is nothing to compare with, the table is used as is if it holds the metric
+    if os.path.isdir(OUTPUT_DIR):
+        current = is_current(SUMMARY_FILE, OUTPUT_DIR, type)
+    else:
+        current = type in read_source_stamps(SUMMARY_FILE)
+    if current:
+        return read_summaries(SUMMARY_FILE, type)
+    warnings.warn('%s does not match the %s files of %s, summarizing the packages instead. Rebuild it with '
+                  '`python -m semver_popularity.summaries %s %s`' % (SUMMARY_FILE, type, OUTPUT_DIR, OUTPUT_DIR,
+                                                                     SUMMARY_FILE))
+    return None
+
+
+def read_summaries_of(type):
+    """The per-package summaries of the metric, from the summary table if it is current."""
+    package_summaries = current_summaries(type)
+    if package_summaries is None:
+        package_summaries = summarize_packages(type, read_packages(type))
+    return package_summaries
+
+
+@instrumentation.instrument(records_out=None)
+def analyse(type, streaming=True):
+    """
+    In streaming mode the bins only keep running sums, counts and a histogram sketch for the box plot, instead of
+    every non-zero value of every package. The averages are the same up to floating point summation order.
+    """
+    # Without a current summary table every package is read and filtered below
+    packages = None
+    package_summaries = current_summaries(type)
+    if package_summaries is not None:
+        packages = {summary.package for summary in package_summaries if summary.non_zero >= 10}
+
+    if streaming:
+        accumulator = BinAccumulator(NUM_BINS, sketch=plotting.enabled())
+        for _, values in read_packages(type, packages):
+            non_zero = values[(values != 0.0) & ~numpy.isnan(values)]
+            if len(non_zero) < 10:
+                continue
+            accumulator.add(non_zero)
+
+        if plotting.enabled():
+            plt.gca().bxp(accumulator.box_stats(), showfliers=False, showmeans=False)
+        ys = accumulator.averages().tolist()
+    else:
+        import pandas as pd
+
+        data = [[] for _ in range(NUM_BINS)]
+        for _, values in read_packages(type, packages):
+            temp_data = values[(values != 0.0) & ~numpy.isnan(values)].tolist()
+
+            if len(temp_data) < 10:
+                continue
+
+            for i, vals in enumerate(split(temp_data, NUM_BINS)):
+                data[i].extend(vals)
+
+        if plotting.enabled():
+            df = pd.DataFrame(data).transpose()
+            df.plot(kind='box', showfliers=False)
+        ys = [average(d) for d in data]
+
+    if plotting.enabled():
+        plt.yscale('log')
+        # plt.savefig(os.path.join(FIGURE_DIR, f'boxplot-{type}'))
+        plt.cla()
 
-        if len(temp_data) < 10:
-            continue
-
-        for i, vals in enumerate(split(temp_data, NUM_BINS)):
-            data[i].extend(vals)
-
-    df = pd.DataFrame(data).transpose()
-
-    df.plot(kind='box', showfliers=False)
-    plt.yscale('log')
-    # plt.savefig(os.path.join(FIGURE_DIR, f'boxplot-{type}'))
-    plt.cla()
-
-    ys = [average(d) for d in data]
     xs = numpy.arange(0, 5 + 1 / len(ys), 5 / (len(ys) - 1))
 
-    p = sns.regplot(x=xs, y=ys, scatter_kws={ 's': 5}, line_kws={"color": "orange"}, order=3)
-
-    x_data = p.get_lines()[0].get_xdata()
-    y_data = p.get_lines()[0].get_ydata()
-    total_area = numpy.trapz(y=y_data, x=x_data)
-    cutoff_point = 0.8 * total_area
-    print(total_area, cutoff_point)
-
-    epsilon = 0.01
-    for i in range(1, len(y_data)):
-        area_left = numpy.trapz(y=y_data[0:i], x=x_data[0:i])
-        area_right = numpy.trapz(y=y_data[i:100], x=x_data[i:100])
-        if (abs(area_left - area_right)) < epsilon:
-            print(i)
-            print(total_area)
-            print('areas: ', area_left, area_right)
-            print('cutoff point:', x_data[i] / 5)
-            print(x_data[i])
-            print(y_data[i])
-            break
+    # The cubic fit that is drawn, cut without going through the figure
+    curve = fitting.fit(xs, ys, order=3)
+    for cutoff in area_cutoff(curve.x, curve.y, 0.5), area_cutoff(curve.x, curve.y, 0.8):
+        print('%s of the area:' % cutoff.fraction)
+        print('total area: ', cutoff.total_area)
+        print('areas: ', cutoff.area_left, cutoff.area_right)
+        print('cutoff point:', cutoff.quantile)
+        print(cutoff.x)
+        print(cutoff.y)
 
     # print('auc', metrics.auc(x_data, y_data))
 
+    if not plotting.enabled():
+        return
+    plotting.draw_fit(curve, scatter_kws={'s': 5}, line_kws={"color": "orange"})
     plt.xlabel('Quintile')
     plt.ylabel(
         'Eigenvector Centrality' if type == 'eigenvector' else 'Degree Centrality' if type == 'degree' else 'Dependent Usage Ratio')
@@ -72,25 +147,8 @@ def analyse(type):
     plt.cla()
 
 
-def zero_usage_details():
-    temp_data = list()
-    type = 'public-dependent-percentage'
-    for file in glob.glob(os.path.join(OUTPUT_DIR, '*', f'{type}.bin')):
-        public_methods = [float(x) for x in re.findall(r',(.*)\n', open(file).read())]
-        temp_data.append(public_methods)
-        if len(public_methods) > 30000:
-            print()
-
-    lens = list()
-    zeros = list()
-    division = list()
-    for i in temp_data:
-        l = len(i)
-        zero = i.count(0)
-        lens.append(l)
-        zeros.append(zero)
-        division.append(zero / l)
-
+@instrumentation.instrument()
+def plot_zero_usage(lens, zeros, division):
     fig, (ax1) = plt.subplots(nrows=1, ncols=3)
     ax1[0].violinplot(lens, showmedians=True)
     ax1[1].violinplot(zeros, showmedians=True, sharex=ax1[0])
@@ -118,6 +176,19 @@ def zero_usage_details():
     plt.savefig("used_vs_unused_methods.pdf")
     plt.close()
 
+
+@instrumentation.instrument()
+def zero_usage_details():
+    type = 'public-dependent-percentage'
+    # Packages without public methods have no ratio
+    summaries = [summary for summary in read_summaries_of(type) if summary.n > 0]
+    lens = [summary.n for summary in summaries]
+    zeros = [summary.zeros for summary in summaries]
+    division = [summary.zero_ratio for summary in summaries]
+
+    if plotting.enabled():
+        plot_zero_usage(lens, zeros, division)
+
     print('average lens', average(lens))
     print('median lens', median(zeros))
     print('minimum lens', min(lens))
@@ -135,7 +206,21 @@ def zero_usage_details():
 
     print(len([i for i in zeros if i < 10]))
 
-# analyse('eigenvector')
-# analyse('degree')
-analyse('public-dependent-percentage')
-# zero_usage_details()
\ No newline at end of file
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-plots', action='store_true', help='only print the numbers, do not draw any figure')
+    instrumentation.add_arguments(parser)
+    fitting.add_arguments(parser)
+    ingest.add_arguments(parser)
+    args = parser.parse_args()
+    if args.no_plots:
+        plotting.disable()
+    instrumentation.configure(args)
+    ingest.configure(args)
+    fitting.configure(args)
+
+    # analyse('eigenvector')
+    # analyse('degree')
+    analyse('public-dependent-percentage')
+    # zero_usage_details()
\ No newline at end of file
@@ -1,28 +1,20 @@
+import argparse
 from collections import defaultdict
 from pathlib import Path
-import os
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
 import random
 
+from semver_popularity import fitting, ingest, instrumentation, plotting
+from semver_popularity.aggregation import compress_major_to_package
+from semver_popularity.cache import Cache
+from semver_popularity.dependents import DependentSets, read_dependents
+from semver_popularity.directory_index import DirectoryIndex
+from semver_popularity.parsing import iter_majors
+from semver_popularity.plotting import plt, sns
+from semver_popularity.windows import percentage_in_n_windows
 
-class Major:
-    def __init__(self, groupId, artifactId, majorVersion, violations, numberMethods, callables):
-        self.groupId = groupId
-        self.artifactId = artifactId
-        self.majorVersion = majorVersion
-        self.violations = violations
-        self.numberMethods = numberMethods
-        self.callables = callables
-
-
-class Artifact:
-    def __init__(self, groupId, artifactId, violations, numberMethods):
-        self.groupId = groupId
-        self.artifactId = artifactId
-        self.violations = violations
-        self.numberMethods = numberMethods
+# Intermediate results, keyed by the content of the files they are computed from
+cache = Cache()
 
 
 def to_string(inp):
@@ -32,69 +24,30 @@ def to_string(inp):
         return 'illegal API extensions'
 
 
+@instrumentation.instrument()
 def read_file():
     # Use a breakpoint in the code line below to debug your script.
     path = Path('breaking_changes.txt')
     print(path)
-    with open(path, 'r') as file:
-        versions = set()
-        file.readline()
-
-        for version in file:
-            if version[0] == '#': continue
-            groupId = version.split(":")[0]
-            artifactId = version.split(":")[1]
-            majorVersion = int(version.split(":")[2])
-            violations = int(version.split(":")[3].split("/")[0])
-            numberMethods = int(version.split(":")[3].split("/")[1])
-            callables = [x.strip() for x in version.split(":")[4][1:-2].split(",")]
-            if str(callables) == "['']":
-                callables = list()
-            versions.add(Major(groupId, artifactId, majorVersion, violations, numberMethods, callables))
-    return versions
-
-
-def compress_major_to_package(versions):
-    compressed_set = set()
-
-    for version in versions:
-        found = False
-        for entry in compressed_set:
-            if entry.groupId == version.groupId and entry.artifactId == version.artifactId:
-                entry.numberMethods = max(entry.numberMethods, version.numberMethods)
-                entry.violations += version.violations
-                found = True
-        if not found:
-            compressed_set.add(Artifact(version.groupId, version.artifactId, version.violations, version.numberMethods))
-
-    return compressed_set
-
-
-def percentage_in_n_windows(first, second, n, max):
-    interval = max / n
-    window = [0, interval]
-    result = list()
-
-    while window[1] <= max:
-
-        second_count = count_values_in_window(second, window, max)
-        first_count = count_values_in_window(first, window, max)
-        if second_count > 0 and first_count != 1:
-            if first_count != 0:
-                window_value = second_count / first_count
-            else:
-                window_value = 0
-            result.append(window_value)
-        window = [window[1], window[1] + interval]
-
-    return result
-
+    return cache.cached('majors', lambda: set(iter_majors(path)), inputs=[path])
+
+
+@instrumentation.instrument(records_in=instrumentation.count_first, records_out=lambda counts: len(counts[1]))
+def count_dependents(files):
+    """
+    Number of distinct dependents over all files, and the share of them that depends on every package. `files` maps
+    the dependents directories to the 'groupId:artifactId' they were looked up for, as their names cannot be split.
+    """
+    dependents = DependentSets()
+    paths = ['input/' + one + '/' + 'dependents.txt' for one in files]
+    for ga, lines in zip(files.values(), ingest.iter_files(read_dependents, paths, 'dependents')):
+        if lines is None:
+            continue
+        dependents.add(ga, lines)
 
-def count_values_in_window(values, window, max):
-    upper_bound = window[1]
-    if window[1] == max:
-        upper_bound = 2
-    return sum(window[0] <= i < upper_bound for i in values)
+    popularity_per_artifact = defaultdict(int)
+    popularity_per_artifact.update(dependents.shares())
+    return len(dependents.union()), popularity_per_artifact
 
 
 def histogram_of_popularities_bc_all(bc, all):
@@ -123,37 +76,37 @@ def pairs_of_popularities(bc, all):
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-plots', action='store_true', help='only print the numbers, do not draw any figure')
+    parser.add_argument('--no-cache', action='store_true', help='compute everything again, without reading or '
+                                                                'writing the cache of intermediate results')
+    instrumentation.add_arguments(parser)
+    fitting.add_arguments(parser)
+    ingest.add_arguments(parser)
+    args = parser.parse_args()
+    if args.no_plots:
+        plotting.disable()
+    cache.enabled = not args.no_cache
+    instrumentation.configure(args)
+    ingest.configure(args)
+    fitting.configure(args)
+
     versions = read_file()
-    files = set()
-    popularity_per_artifact = defaultdict(int)
-    dependent_per_artifact = defaultdict(set)
-    all_dependents = set()
+    files = dict()
+    index = DirectoryIndex.load('input/', layout='dependents')
     for version in versions:
-        package_name = version.groupId + '_' + version.artifactId
-        prefixed_files = [filename for filename in os.listdir('input/') if filename.startswith(package_name)]
-        if len(prefixed_files) > 0:
-            files.add(str(prefixed_files[0]))
-
-    for one in files:
-        try:
-            with open('input/' + one + '/' + 'dependents.txt') as file:
-                for line in file:
-                    all_dependents.add(line)
-                    popularity_per_artifact[one.split("_")[0] + ":" + one.split("_")[1]] += 1
-                    dependent_per_artifact[one.split("_")[0] + ":" + one.split("_")[1]].add(line)
-        except FileNotFoundError:
-            continue
-
-    print("all dependents: " + str(len(all_dependents)))
+        for one in index.lookup(version.groupId, version.artifactId, 'latest'):
+            files[one] = version.groupId + ':' + version.artifactId
+    files = dict(sorted(files.items()))
+
+    number_of_dependents, popularity_per_artifact = cache.cached(
+        'dependents', lambda: count_dependents(files), inputs=['input/' + one + '/dependents.txt' for one in files],
+        params=sorted(files.items()))
+    print("all dependents: " + str(number_of_dependents))
     print(len(popularity_per_artifact.keys()))
 
-    for package in popularity_per_artifact.keys():
-        if package not in dependent_per_artifact.keys():
-            popularity_per_artifact[package] /= len(all_dependents)
-            continue
-        popularity_per_artifact[package] = len(dependent_per_artifact[package]) / len(all_dependents)
-
-    compressed = compress_major_to_package(read_file())
+    compressed = cache.cached('compressed', lambda: compress_major_to_package(versions),
+                              inputs=['breaking_changes.txt'])
     print("compressed: " + str(len(compressed)))
 
     # KDE plot with or without breaking changes
@@ -167,13 +120,17 @@ if __name__ == '__main__':
 
     n = 130
     max_all = max(all)
-    dots = percentage_in_n_windows(all, bc, n, max_all)
+    with instrumentation.stage('percentage_in_n_windows', records_in=len(all)) as windows:
+        dots = percentage_in_n_windows(all, bc, n, max_all)
+        windows.records_out = len(dots)
     print(len(dots))
-    intervals = np.arange(0, max_all, max_all / len(dots))
-    sns.set_theme()
-    q = sns.regplot(y=dots, x=intervals, order=2)
-    plt.ylim(0, 1)
-    q.set_xlabel("popularity of versioned packages")
-    q.set_ylabel("ratio of versioned packages with violation")
-    q.figure.savefig("popularity_vs_violation" + str(n) + ".pdf")
+
+    if plotting.enabled():
+        intervals = np.arange(0, max_all, max_all / len(dots))
+        sns.set_theme()
+        q = plotting.draw_fit(fitting.fit(intervals, dots, order=2))
+        plt.ylim(0, 1)
+        q.set_xlabel("popularity of versioned packages")
+        q.set_ylabel("ratio of versioned packages with violation")
+        q.figure.savefig("popularity_vs_violation" + str(n) + ".pdf")
 
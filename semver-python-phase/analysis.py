@@ -1,41 +1,34 @@
+import argparse
 import os
+import sys
 from collections import defaultdict
 from pathlib import Path
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
-from scipy import stats
 
-sns.set_theme()
-project_location = '/Users/mehdi/Desktop/MyMac/Phd/Research/MyPapers/MavenAPIPopularity/semver-vs-popularity/'
-
-
-class Major:
-    def __init__(self, groupId, artifactId, majorVersion, violations, numberMethods, callables):
-        self.groupId = groupId
-        self.artifactId = artifactId
-        self.majorVersion = majorVersion
-        self.violations = violations
-        self.numberMethods = numberMethods
-        self.callables = callables
-
-
-class Artifact:
-    def __init__(self, groupId, artifactId, violations, numberMethods, callables):
-        self.groupId = groupId
-        self.artifactId = artifactId
-        self.violations = violations
-        self.numberMethods = numberMethods
-        self.callables = callables
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from semver_popularity import fitting, ingest, instrumentation, plotting, violations
+from semver_popularity.aggregation import compress_major_to_package
+from semver_popularity.binfiles import read_bin
+from semver_popularity.cache import Cache
+from semver_popularity.coordinates import CoordinateIndex
+from semver_popularity.directory_index import DirectoryIndex
+from semver_popularity.duplicates import duplicate_names_task, unique_names
+from semver_popularity.parallel import map_artifacts
+from semver_popularity.join import callable_ids_of, deduplicate, join_popularity
+from semver_popularity.parsing import iter_majors
+from semver_popularity.popularity_store import open_current
+from semver_popularity.plotting import plt, sns
+from semver_popularity.sketch import DEFAULT_K, PLOT_POINTS, QuantileSketch, merge_all
+from semver_popularity.registry import ArtifactRegistry, pair_by_ga
+from semver_popularity.violations import calculate_percentage, calculate_percentage_or, versions_with_violations
 
-    def get_name(self, index):
-        return self.callables[index].split("/")[1], self.callables[index].split("//")[1]
-
-    def __hash__(self) -> int:
-        return hash(self.groupId + "|" + self.artifactId)
-
-    def __str__(self) -> str:
-        return self.groupId + ":" + self.artifactId
+project_location = '/Users/mehdi/Desktop/MyMac/Phd/Research/MyPapers/MavenAPIPopularity/semver-vs-popularity/'
+# Which popularity directory to use when a GA has been analysed for several versions
+version_policy = 'latest'
+# Parsed mvn.expanded_coords.txt, loaded on first use
+coordinate_index = None
+# Intermediate results, keyed by the content of the files they are computed from
+cache = Cache(project_location + 'semver-python-phase/resources/.cache')
 
 
 def to_string(inp):
@@ -45,26 +38,17 @@ def to_string(inp):
         return 'illegal API extensions'
 
 
+@instrumentation.instrument()
 def read_file(file: str):
     # Use a breakpoint in the code line below to debug your script.
     path = Path(project_location + 'semver-python-phase/resources/' + file + '.txt')
-    with open(path, 'r') as file:
-        versions = list()
-        file.readline()
-        i = 0
-        for version in file:
-            i += 1
-            # if version[0] == '#': continue
-            groupId = version.split(":")[0]
-            artifactId = version.split(":")[1]
-            majorVersion = int(version.split(":")[2])
-            violations = int(version.split(":")[3].split("/")[0])
-            numberMethods = int(version.split(":")[3].split("/")[1])
-            callables = [x.strip() for x in version.split(":")[4][1:-2].split(", ")]
-            if str(callables) == "['']":
-                callables = list()
-            versions.append(Major(groupId, artifactId, majorVersion, violations, numberMethods, callables))
-    return versions
+    return cache.cached('majors', lambda: list(iter_majors(path)), inputs=[path])
+
+
+@instrumentation.instrument('compress')
+def read_compressed(file: str):
+    path = Path(project_location + 'semver-python-phase/resources/' + file + '.txt')
+    return cache.cached('compressed', lambda: compress_major_to_package(read_file(file)), inputs=[path])
 
 
 def read_all_coordinates(file: str):
@@ -96,75 +80,84 @@ def read_artifacts_txt():
     return input_artifacts
 
 
+def read_coordinate_index():
+    global coordinate_index
+    if coordinate_index is None:
+        coordinate_index = CoordinateIndex.load(
+            Path(project_location + 'semver-python-phase/resources/mvn.expanded_coords.txt'))
+    return coordinate_index
+
+
 def read_expanded_coords():
-    # Use a breakpoint in the code line below to debug your script.
-    path = Path(project_location + 'semver-python-phase/resources/mvn.expanded_coords.txt')
-    i = 0
-    with open(path, 'r') as file:
-        for _ in file:
-            i += 1
-    return i
+    return len(read_coordinate_index())
 
 
-def read_popularity(metric: str):
-    popularities = dict()
+def popularity_dir():
+    # Its store, if built with `python -m semver_popularity.popularity_store <dir> <dir>.store`, is read instead
+    return Path(os.getcwd()).parent.joinpath(project_location + 'semver-python-phase/resources/popularity/')
+
+
+def popularity_files(metric: str):
     files = set()
+    index = DirectoryIndex.load(popularity_dir())
 
     for version in breaking_changes:
         if len(version.callables) > 0:
-            package_name = version.groupId + ':' + version.artifactId + '$'
-            prefixed_files = [filename for filename in os.listdir(Path(os.getcwd()).parent.joinpath(
-                project_location + 'semver-python-phase/resources/popularity/')) if
-                              filename.startswith(package_name)]
-            if len(prefixed_files) > 0:
-                files.add(str(prefixed_files[0]))
-
-    for one in files:
-        try:
-            with open(Path(os.getcwd()).parent.joinpath(
-                    project_location + 'semver-python-phase/resources/popularity/' + one + '/' + metric + '.bin')) as file:
-                for line in file:
-                    callable_id = line.split(",")[0]
-                    popularity = line.split(",")[1][:-1]
-                    popularities[callable_id] = popularity
-        except FileNotFoundError:
-            continue
+            files.update(index.lookup(version.groupId, version.artifactId, version_policy))
+    return [popularity_dir().joinpath(one, metric + '.bin') for one in sorted(files)]
 
-    return popularities
 
+def read_popularity_files(metric: str, paths):
+    """
+    The (ids, values) of every popularity file, None if it does not exist, taken from the popularity store when that
+    holds the metric as the files are now.
+    """
+    store = open_current(str(popularity_dir()) + '.store', popularity_dir(), metric)
+    if store is None:
+        return ingest.iter_files(read_bin, paths, 'popularity')
+    packages = set(store.packages_with(metric))
+    return (store.package(metric, path.parent.name) if path.parent.name in packages else None for path in paths)
 
-def compress_major_to_package(versions):
-    compressed_set = list()
 
-    for version in versions:
-        found = False
-        for entry in compressed_set:
-            if entry.groupId == version.groupId and entry.artifactId == version.artifactId:
-                entry.numberMethods = max(entry.numberMethods, version.numberMethods)
-                entry.violations += version.violations
-                entry.callables += version.callables
-                found = True
-        if not found:
-            compressed_set.append(
-                Artifact(version.groupId, version.artifactId, version.violations, version.numberMethods,
-                         version.callables))
+@instrumentation.instrument(records_out=lambda popularity: len(popularity[0]))
+def read_popularity(metric: str):
+    ids = list()
+    values = list()
+    # In path order, so the last file still wins in deduplicate whatever order the reads finish in
+    for popularity in read_popularity_files(metric, popularity_files(metric)):
+        if popularity is None:
+            continue
+        ids.append(popularity[0])
+        values.append(popularity[1])
+
+    if len(ids) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    return deduplicate(np.concatenate(ids), np.concatenate(values))
+
 
-    return compressed_set
+@instrumentation.instrument(records_out=None)
+def popularity_sketches(metric: str):
+    """
+    Quantile sketch of every popularity file of the metric by package directory, built while the files are read
+    and only built again if one of them changed.
+    """
+    def build():
+        paths = popularity_files(metric)
+        return {path.parent.name: QuantileSketch.of(popularity[1])
+                for path, popularity in zip(paths, read_popularity_files(metric, paths))
+                if popularity is not None}
+    return cache.cached('popularity-sketches', build, inputs=popularity_files(metric), params=(metric, DEFAULT_K))
 
 
+@instrumentation.instrument()
 def trendline(violation):
     if violation == 'breaking_changes':
         versions = breaking_changes
     else:
         versions = api_extensions
 
-    bc_array = list(map(lambda x: x.violations, versions))
-    method_array = list(map(lambda x: x.numberMethods, versions))
-    zipped = zip(method_array, bc_array)
-    filtered = list(filter(lambda x: x[1] > 0 and x[0] > 0, zipped))
-    filtered_x = list(map(lambda x: x[0], filtered))
-    filtered_y = list(map(lambda x: x[1], filtered))
-    sns.regplot(x=filtered_x, y=filtered_y, order=1)
+    filtered_x, filtered_y = violations.trendline_points(versions)
+    plotting.draw_fit(fitting.fit(filtered_x, filtered_y, order=1))
 
     plt.xlabel("Total number of methods")
     plt.ylabel("Total number of " + to_string(violation))
@@ -193,17 +186,16 @@ def violin(violation):
     plt.show()
 
 
+@instrumentation.instrument()
 def histogram(violation):
     if violation == 'breaking_changes':
         versions = breaking_changes
     else:
         versions = api_extensions
-    bc_list = list()
+    bc_list = violations.violation_percentages(versions)
 
-    for version in versions:
-        bc_list.append(version.violations / version.numberMethods * 100)
-
-    bc_list.sort()
+    if not plotting.enabled():
+        return bc_list
     sns.histplot(x=bc_list, bins=35, binrange=[0, 35])
     plt.ylabel("Number of artifacts")
     plt.xlabel("Percentage of methods with " + to_string(violation))
@@ -214,33 +206,56 @@ def histogram(violation):
     return bc_list
 
 
-def calculate_popularity(pop_metric):
-    pop_dict = read_popularity(pop_metric)
-
-    bc_callables_ids = list()
-    bc_popularity_metrics = list()
-    all_popularity_metrics = list()
-    callable_ids = set()
+def read_callable_ids():
     with open(project_location + 'semver-python-phase/resources/callables.txt') as callable_file:
-        for callable_id in callable_file.readline().split(","):
-            callable_ids.add(callable_id)
+        return np.array([int(callable_id) for callable_id in callable_file.readline().split(",")
+                         if callable_id.strip() != ''], dtype=np.int64)
 
-    for version in breaking_changes:
-        for callable_bc in version.callables:
-            callable_id = callable_bc.split('/')[0]
-            bc_callables_ids.append(callable_id)
-            if callable_id in pop_dict:
-                if pop_dict[callable_id] != 'na':
-                    bc_popularity_metrics.append(float(pop_dict[callable_id]))
-
-    for callable_id in pop_dict.keys():
-        if callable_id not in bc_callables_ids and pop_dict[callable_id] != 'na' \
-                and callable_id in callable_ids:
-            all_popularity_metrics.append(float(pop_dict[callable_id]))
-    print('poplen', len(all_popularity_metrics))
-    non_zero_no_bc = list(filter(lambda x: x > 0.0, all_popularity_metrics))
-    non_zero_bc = list(filter(lambda x: x > 0.0, bc_popularity_metrics))
 
+@instrumentation.instrument(records_in=instrumentation.count_first)
+def join_popularities(metrics):
+    """
+    Joins the popularity of every metric with the callables of the breaking changes, reading those once. A metric is
+    only joined again if one of its .bin files, the breaking changes or the callables changed.
+    """
+    ids = dict()
+
+    def join(metric):
+        if len(ids) == 0:
+            ids['bc'] = callable_ids_of(breaking_changes)
+            ids['callables'] = read_callable_ids()
+        return join_popularity(*read_popularity(metric), ids['bc'], ids['callables'])
+
+    inputs = [project_location + 'semver-python-phase/resources/breaking_changes.txt',
+              project_location + 'semver-python-phase/resources/callables.txt']
+    return {metric: cache.cached('popularity-join', lambda: join(metric), inputs=inputs + popularity_files(metric),
+                                 params=(metric, version_policy))
+            for metric in metrics}
+
+
+@instrumentation.instrument(records_out=None)
+def calculate_popularity(pop_metric, joined=None):
+    if joined is None:
+        joined = join_popularities([pop_metric])[pop_metric]
+
+    print('poplen', len(joined.no_bc))
+    non_zero_no_bc = joined.no_bc_non_zero.tolist()
+    non_zero_bc = joined.bc_non_zero.tolist()
+
+    ttests = violations.popularity_ttests(non_zero_no_bc, non_zero_bc)
+    if plotting.enabled():
+        plot_popularity(pop_metric, non_zero_no_bc, non_zero_bc)
+
+    print(ttests.greater)
+    print(ttests.less)
+    print(ttests.two_sided)
+
+
+@instrumentation.instrument()
+def plot_popularity(pop_metric, non_zero_no_bc, non_zero_bc):
+    # Drawn from sketches, so the KDEs and violins take the same time for any number of methods
+    non_zero_no_bc = QuantileSketch.of(non_zero_no_bc).representatives()
+    non_zero_bc = QuantileSketch.of(non_zero_bc).representatives()
     sns.kdeplot(non_zero_bc, label="Methods involved in a breaking change", cut=0)
     sns.kdeplot(non_zero_no_bc, label="Methods not involved in a breaking change", cut=0)
     plt.xlabel("Percentage of dependents that call method")
@@ -266,10 +281,6 @@ def calculate_popularity(pop_metric):
         project_location + 'semver-python-phase/resources/plots/violin_popularity_' + pop_metric + '.pdf')
     plt.show()
 
-    print(stats.ttest_ind(non_zero_no_bc, non_zero_bc, alternative='greater'))
-    print(stats.ttest_ind(non_zero_no_bc, non_zero_bc, alternative='less'))
-    print(stats.ttest_ind(non_zero_no_bc, non_zero_bc, alternative='two-sided'))
-
 
 def average_breaking_changes(versions):
     average_bc_dict = defaultdict(int)
@@ -293,64 +304,24 @@ def average_breaking_changes(versions):
     return sum / len(output) * 100
 
 
+@instrumentation.instrument()
 def quintile_dep_percentage():
-    popularities = read_popularity("public-dependent-percentage")
+    """
+    The values of all methods from the most to the least popular one, over five quintiles. They come from the merged
+    sketches of the packages rather than from every value; a callable in several packages counts once per package.
+    """
+    sketch = merge_all(popularity_sketches("public-dependent-percentage").values())
+    print("quintile boundaries:", sketch.quantiles([0.8, 0.6, 0.4, 0.2]))
 
-    xs = np.arange(0, 5 + 1 / len(popularities), 5 / (len(popularities) - 1))
-    i = [float(x) for x in popularities.values()]
-    sns.regplot(x=xs, y=i)
+    if not plotting.enabled():
+        return
+    xs = np.linspace(0, 5, PLOT_POINTS)
+    plotting.draw_fit(fitting.fit(xs, sketch.quantiles(1 - xs / 5)))
     plt.savefig(project_location + 'semver-python-phase/resources/plots/quintile-dep-percentage.pdf')
 
 
-class Duplicate:
-    class_name = None
-    module_name = None
-    method_name = None
-    return_type = None
-    parameters = None
-    category = None
-
-    def __eq__(self, other):
-        if self.category == "module":
-            return self.class_name == other.class_name and self.method_name == other.method_name and self.parameters == other.parameters and self.return_type == other.return_type
-        if self.category == "class":
-            return self.module_name == other.module_name and self.method_name == other.method_name and self.parameters == other.parameters and self.return_type == other.return_type
-        if self.category == "method":
-            return self.module_name == other.module_name and self.class_name == other.class_name  and self.parameters == other.parameters and self.return_type == other.return_type
-        if self.category == "params":
-            return self.module_name == other.module_name and self.class_name == other.class_name and self.method_name == other.method_name and self.return_type == other.return_type
-        if self.category == "return":
-            return self.module_name == other.module_name and self.class_name == other.class_name and self.method_name == other.method_name and self.parameters == other.parameters
-        else:
-            raise Exception("No duplication category specified!")
-
-    def __init__(self, complete_label, category):
-        split_slash = complete_label.split("/")
-        self.module_name = split_slash[0]
-        split_dot = split_slash[1].split(".")
-        self.class_name = split_dot[0]
-        self.method_name = ''.join(split_dot[1::]).split("(")[0]
-        return_and_parameters = ''.join(split_dot[1::]).split("(")[1].split(")")
-        self.return_type = return_and_parameters[0]
-        self.parameters = return_and_parameters[1]
-        self.category = category
-
-    def __hash__(self):
-        if self.category == "module":
-            return hash(self.class_name + self.method_name + self.parameters + self.return_type)
-        if self.category == "class":
-            return hash(self.module_name + self.method_name + self.parameters + self.return_type)
-        if self.category == "method":
-            return hash(self.module_name + self.class_name + self.parameters + self.return_type)
-        if self.category == "params":
-            return hash(self.module_name + self.class_name + self.method_name + self.return_type)
-        if self.category == "return":
-            return hash(self.module_name + self.class_name + self.method_name + self.parameters)
-        else:
-            raise Exception("No duplication category specified!")
-
-
-def calculate_duplicate_names(breaking_changes, api_extensions_list):
+@instrumentation.instrument(records_in=instrumentation.count_first)
+def calculate_duplicate_names(breaking_changes, api_extensions_list, workers=1):
     """
     This method calculated all duplicated names. A duplicated name is:
         A version has removed the method m(), but added m(int). This version is then attributed a
@@ -358,78 +329,40 @@ def calculate_duplicate_names(breaking_changes, api_extensions_list):
         method outputs how often a method signature is altered by changing the return type or changing
         the arguments.
     """
-    countOverlapOfBCAndAPIEX(breaking_changes, api_extensions_list)
+    countOverlapOfBCAndAPIEX(breaking_changes, api_extensions_list, workers)
 
     api_extensions_without_duplicates = set()
 
     categories = ['module', 'class', 'method', 'params', 'return']
+    acc = dict.fromkeys(categories, 0)
+    total_removed = dict.fromkeys(categories, 0)
+    pairs = pair_by_ga(breaking_changes, api_extensions_list)
+    # The categories are applied one after the other, each on what the previous ones left of the artifact
+    results = map_artifacts(duplicate_names_task,
+                            [(artifact_bc.callables, artifact_api.callables, categories)
+                             for (artifact_bc, artifact_api) in pairs], workers)
+    for (_, artifact_api), (callables_without_duplicates, counts) in zip(pairs, results):
+        for category, (removed, unique) in counts.items():
+            total_removed[category] += removed
+            acc[category] += unique
+
+        artifact_to_add = artifact_api
+        artifact_to_add.callables = callables_without_duplicates
+        artifact_to_add.violations = len(callables_without_duplicates)
+
+        api_extensions_without_duplicates.add(artifact_to_add)
+
     for category in categories:
-        acc = 0
-        total_removed = 0
-        for (artifact_bc, artifact_api) in zip(breaking_changes, api_extensions_list):
-            assert hash(artifact_bc) == hash(artifact_api)
-            api_version_dict = dict()
-            bc_version_dict = dict()
-
-            # For each callable involved in bc:
-            for i in range(0, len(artifact_bc.callables)):
-                version, name = artifact_bc.get_name(i)
-                possible_duplicate = Duplicate(name, category)
-                if version not in bc_version_dict:
-                    bc_version_dict[version] = set()
-                bc_version_dict[version].add(possible_duplicate)
-
-            # For each callable involved in apix:
-            for i in range(0, len(artifact_api.callables)):
-                version, name = artifact_api.get_name(i)
-                possible_duplicate = Duplicate(name, category)
-                if version not in api_version_dict:
-                    api_version_dict[version] = set()
-                api_version_dict[version].add(possible_duplicate)
-
-            to_remove_from_aix = set()
-            # Finally for each version see if there is an overlap in the breaking change names
-            # and the api extension names:
-            for version in bc_version_dict.keys():
-                if version in api_version_dict:
-                    intersection = bc_version_dict[version].intersection(api_version_dict[version])
-                    to_remove_from_aix = to_remove_from_aix.union(intersection)
-                    # acc += len(intersection)
-
-            acc += len(to_remove_from_aix)
-
-            # Remove duplicated names from AIX
-            callables_without_duplicates = list()
-            for i in range(0, len(artifact_api.callables)):
-                version, name = artifact_api.get_name(i)
-                searching_for_duplicate = Duplicate(name, category)
-                if searching_for_duplicate not in to_remove_from_aix:
-                    callables_without_duplicates.append(artifact_api.callables[i])
-                else:
-                    total_removed += 1
-
-            artifact_to_add = artifact_api
-            artifact_to_add.callables = callables_without_duplicates
-            artifact_to_add.violations = len(callables_without_duplicates)
-
-            api_extensions_without_duplicates.add(artifact_to_add)
-        print("%s methods are in category %s" % (total_removed, category))
-        print("%s unique methods are removed" % acc)
+        print("%s methods are in category %s" % (total_removed[category], category))
+        print("%s unique methods are removed" % acc[category])
 
     return api_extensions_without_duplicates
 
 
-def countOverlapOfBCAndAPIEX(breaking_changes, api_extensions_list):
-    number_of_names = 0
-    for (artifact_bc, artifact_api) in zip(breaking_changes, api_extensions_list):
-        callable_set_package = set()
-        for i in range(0, len(artifact_bc.callables)):
-            version, name = artifact_bc.get_name(i)
-            callable_set_package.add(name)
-        for i in range(0, len(artifact_api.callables)):
-            version, name = artifact_api.get_name(i)
-            callable_set_package.add(name)
-        number_of_names += len(callable_set_package)
+def countOverlapOfBCAndAPIEX(breaking_changes, api_extensions_list, workers=1):
+    pairs = [(artifact_bc.callables, artifact_api.callables)
+             for (artifact_bc, artifact_api) in pair_by_ga(breaking_changes, api_extensions_list)]
+    number_of_names = sum(map_artifacts(unique_names, pairs, workers))
     print("Total number of unique names involved in bc or apix:", number_of_names)
 
 
@@ -448,63 +381,17 @@ def difference_between_majors():
             print(key)
 
 
-def calculate_percentage(versions):
-    incremented = [1 for x in versions if x.violations > 0]
-    return len(incremented), sum(incremented) / len(versions) * 100
-
-
-def calculate_percentage_or(versions_one, versions_two):
-    incremented_one = [(x.groupId + ":" + x.artifactId) for x in versions_one if x.violations > 0]
-    incremented_two = [(x.groupId + ":" + x.artifactId) for x in versions_two if x.violations > 0]
-    unio = set(incremented_one).union(set(incremented_two))
-    return len(unio), len(unio) / len(versions_one) * 100
-
-
+@instrumentation.instrument(records_in=instrumentation.count_first, records_out=None)
 def versions_with_modules_bc(versions):
+    """Number of minor and patch releases of the artifacts."""
     artifacts = [(x.groupId + ":" + x.artifactId) for x in versions]
-    path = Path(project_location + 'semver-python-phase/resources/mvn.expanded_coords.txt')
-    i = 0
-    with open(path, 'r') as file:
-        for version in file:
-            split = version.split(":")
-            formatted_version = split[0] + ":" + split[1]
-            if formatted_version in artifacts:
-                if len(split[2][:-1].split(".")) > 2 and split[2][:-1].split(".")[1] == '0' and \
-                        split[2][:-1].split(".")[2] == '0':
-                    continue
-                i += 1
-    return i
+    return read_coordinate_index().count(artifacts, ('minor', 'patch'))
 
 
 def versions_with_modules_ax(versions):
+    """Number of patch releases of the artifacts."""
     artifacts = [(x.groupId + ":" + x.artifactId) for x in versions]
-    path = Path(project_location + 'semver-python-phase/resources/mvn.expanded_coords.txt')
-    i = 0
-    with open(path, 'r') as file:
-        for version in file:
-            split = version.split(":")
-            formatted_version = split[0] + ":" + split[1]
-            if formatted_version in artifacts:
-                if len(split[2][:-1].split(".")) > 2 and split[2][:-1].split(".")[2] == '0':
-                    continue
-                i += 1
-    return i
-
-
-def versions_with_violations(versions):
-    version_dict = dict()
-    for version in versions:
-        groupId = version.groupId
-        artifactId = version.artifactId
-
-        for callable in version.callables:
-            version_number = callable.split("/")[1]
-
-            hashed_version = groupId + ":" + artifactId + ":" + version_number
-            if hashed_version not in version_dict:
-                version_dict[hashed_version] = 1
-
-    return len(version_dict)
+    return read_coordinate_index().count(artifacts, ('patch',))
 
 
 def artifacts_with_more_than_1_percent_violations(versions):
@@ -519,50 +406,54 @@ def artifacts_with_more_than_1_percent_violations(versions):
 
 
 def intersect(removed, added):
-    removals = set()
-    additions = set()
-    for version in removed:
-        if version.violations != 0:
-            removals.add(version.groupId + version.artifactId)
-
-    for version in added:
-        if version.violations != 0:
-            additions.add(version.groupId + version.artifactId)
-    print(len(removals))
-    print(len(additions))
-    print(len(removals.union(additions)))
+    intersection = violations.intersect(removed, added)
+    print(intersection.removals)
+    print(intersection.additions)
+    print(intersection.union)
 
 
+@instrumentation.instrument(records_out=lambda lists: len(lists[0]))
 def add_missing_artifacts(bc_list, aix_list):
-    artifacts = read_artifacts_txt()
-
-    for artifact in artifacts:
-        found = False
-        for inner_artifact in bc_list:
-            inner_artifact_name = inner_artifact.groupId + "|" + inner_artifact.artifactId
-            if inner_artifact_name == artifact:
-                found = True
-        if not found:
-            artifact_to_add = Artifact(artifact.split("|")[0], artifact.split("|")[1], 0, 1, list())
-            bc_list.append(artifact_to_add)
-            aix_list.append(artifact_to_add)
-
-    return bc_list, aix_list
+    """
+    Adds a placeholder without violations for every artifact of artifacts.txt that is missing, a separate one on each
+    side. The two lists that come back are paired by GA: entry i of both is the same artifact.
+    """
+    registry = ArtifactRegistry(bc_list, aix_list)
+    registry.add_missing(sorted(read_artifacts_txt()))
+    return registry.breaking_changes, registry.api_extensions
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-plots', action='store_true', help='only print the numbers, do not draw any figure')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='processes for the per-artifact loops, 0 for one per CPU (default: 1, no pool)')
+    parser.add_argument('--no-cache', action='store_true', help='compute everything again, without reading or '
+                                                                'writing the cache of intermediate results')
+    instrumentation.add_arguments(parser)
+    fitting.add_arguments(parser)
+    ingest.add_arguments(parser)
+    args = parser.parse_args()
+    if args.no_plots:
+        plotting.disable()
+    cache.enabled = not args.no_cache
+    instrumentation.configure(args)
+    ingest.configure(args)
+    workers = args.workers if args.workers > 0 else None
+    fitting.configure(args, workers)
+
     try:
         os.makedirs(project_location + 'semver-python-phase/resources/plots')
     except OSError:
         pass
 
     # OLD:
-    breaking_changes_missing = compress_major_to_package(read_file('breaking_changes'))
-    api_extensions_missing = compress_major_to_package(read_file('api_extensions'))
+    breaking_changes_missing = read_compressed('breaking_changes')
+    api_extensions_missing = read_compressed('api_extensions')
 
     breaking_changes, all_api_extensions = add_missing_artifacts(breaking_changes_missing, api_extensions_missing)
 
-    api_extensions = calculate_duplicate_names(breaking_changes, all_api_extensions)
+    api_extensions = calculate_duplicate_names(breaking_changes, all_api_extensions, workers)
 
     print("Numbers:")
     # print("Number of artifacts:", len(artifacts))
@@ -572,7 +463,7 @@ if __name__ == '__main__':
 
     # TODO check with Simcha
     print("percentage of minor and patch releases containing bc:",
-          versions_with_violations(breaking_changes) / versions_with_modules_bc(breaking_changes) * 100)
+          versions_with_violations(breaking_changes, workers) / versions_with_modules_bc(breaking_changes) * 100)
 
     # print("percentage of releases released through ax:",
     #       versions_with_violations(api_extensions) / versions_with_modules_ax(api_extensions) * 100)
@@ -581,32 +472,19 @@ if __name__ == '__main__':
 
     for violation in 'breaking_changes', 'api_extensions':
         print(violation + ":")
-        bc_list = histogram(violation)
-        non_zero = [x for x in bc_list if x != 0]
-        count = 0
-        for num in non_zero:
-            if num < 1:
-                count += 1
-        print("Number of artifacts with violated methods less than 1 percent:", count)
-        count = 0
-        for num in non_zero:
-            if num >= 50:
-                count += 1
-        print("Number of artifacts with violated methods more than equal 50 percent:", count)
-
-        count = 0
-        for num in non_zero:
-            if num < 15:
-                count += 1
-        print("Number of artifacts with violated methods less than 15 percent:", count)
-
-        average = sum(non_zero) / len(non_zero)
-        print("average number of methods involved in violation in artifacts that at least have one : ", average)
-
-        trendline(violation)
-
-    for metric in 'dependent-percentage', 'eigenvector', 'degree':
-        calculate_popularity(metric)
+        summary = violations.histogram_summary(histogram(violation))
+        print("Number of artifacts with violated methods less than 1 percent:", summary.less_than_one)
+        print("Number of artifacts with violated methods more than equal 50 percent:", summary.at_least_fifty)
+        print("Number of artifacts with violated methods less than 15 percent:", summary.less_than_fifteen)
+        print("average number of methods involved in violation in artifacts that at least have one : ",
+              summary.average_non_zero)
+
+        if plotting.enabled():
+            trendline(violation)
+
+    popularity_joins = join_popularities(['dependent-percentage', 'eigenvector', 'degree'])
+    for metric, joined in popularity_joins.items():
+        calculate_popularity(metric, joined)
 
     quintile_dep_percentage()
 
@@ -1,33 +1,24 @@
+import argparse
 import os
-from collections import defaultdict
 from pathlib import Path
-import matplotlib.pyplot as plt
 import numpy as np
-import seaborn as sns
-from scipy import stats
-
-inDir = 'MavenResultsAnalysis/resources/new/'
-
-sns.set_theme()
-
-
-class Major:
-    def __init__(self, groupId, artifactId, majorVersion, violations, numberMethods, callables):
-        self.groupId = groupId
-        self.artifactId = artifactId
-        self.majorVersion = majorVersion
-        self.violations = violations
-        self.numberMethods = numberMethods
-        self.callables = callables
 
+from semver_popularity import fitting, ingest, instrumentation, plotting, violations
+from semver_popularity.aggregation import compress_major_to_package
+from semver_popularity.binfiles import read_bin
+from semver_popularity.cache import Cache
+from semver_popularity.directory_index import DirectoryIndex
+from semver_popularity.join import callable_ids_of, deduplicate, join_popularity
+from semver_popularity.parsing import iter_majors
+from semver_popularity.popularity_store import open_current
+from semver_popularity.plotting import plt, sns
+from semver_popularity.sketch import DEFAULT_K, PLOT_POINTS, QuantileSketch, merge_all
 
-class Artifact:
-    def __init__(self, groupId, artifactId, violations, numberMethods, callables):
-        self.groupId = groupId
-        self.artifactId = artifactId
-        self.violations = violations
-        self.numberMethods = numberMethods
-        self.callables = callables
+inDir = 'MavenResultsAnalysis/resources/new/'
+# Which popularity directory to use when a GA has been analysed for several versions
+version_policy = 'latest'
+# Intermediate results, keyed by the content of the files they are computed from
+cache = Cache()
 
 
 def to_string(inp):
@@ -37,86 +28,86 @@ def to_string(inp):
         return 'illegal API extensions'
 
 
+@instrumentation.instrument()
 def read_file(file: str):
     # Use a breakpoint in the code line below to debug your script.
     path = Path('resources/' + file + '.txt')
     print('reading ', path)
-    with open(path, 'r') as file:
-        versions = set()
-        file.readline()
-
-        for version in file:
-            if version[0] == '#': continue
-            groupId = version.split(":")[0]
-            artifactId = version.split(":")[1]
-            majorVersion = int(version.split(":")[2])
-            violations = int(version.split(":")[3].split("/")[0])
-            numberMethods = int(version.split(":")[3].split("/")[1])
-            callables = [x.strip() for x in version.split(":")[4][1:-2].split(",")]
-            if str(callables) == "['']":
-                callables = list()
-            versions.add(Major(groupId, artifactId, majorVersion, violations, numberMethods, callables))
-    return versions
+    return cache.cached('majors', lambda: set(iter_majors(path)), inputs=[path])
 
 
-def read_popularity(metric: str):
-    popularities = dict()
+@instrumentation.instrument('compress')
+def read_compressed(file: str):
+    path = Path('resources/' + file + '.txt')
+    return cache.cached('compressed', lambda: compress_major_to_package(read_file(file)), inputs=[path])
+
+
+def popularity_dir():
+    # Its store, if built with `python -m semver_popularity.popularity_store <dir> <dir>.store`, is read instead
+    return Path(os.getcwd()).parent.joinpath(inDir)
+
+
+def popularity_files(metric: str):
     files = set()
+    index = DirectoryIndex.load(popularity_dir())
     for version in breaking_changes:
         if len(version.callables) > 0:
-            package_name = version.groupId + ':' + version.artifactId + '$'
-            prefixed_files = [filename for filename in os.listdir(Path(os.getcwd()).parent.joinpath(inDir)) if
-                              filename.startswith(package_name)]
-
-            if len(prefixed_files) > 0:
-                files.add(str(prefixed_files[0]))
-
-    for one in files:
-        try:
-            with open(Path(os.getcwd()).parent.joinpath(
-                    inDir + one + '/' + metric + '.bin')) as file:
-                for line in file:
-                    callable_id = line.split(",")[0]
-                    popularity = line.split(",")[1][:-1]
-                    popularities[callable_id] = popularity
-        except FileNotFoundError:
-            continue
+            files.update(index.lookup(version.groupId, version.artifactId, version_policy))
+    return [popularity_dir().joinpath(one, metric + '.bin') for one in sorted(files)]
 
-    return popularities
 
+def read_popularity_files(metric: str, paths):
+    """
+    The (ids, values) of every popularity file, None if it does not exist, taken from the popularity store when that
+    holds the metric as the files are now.
+    """
+    store = open_current(str(popularity_dir()) + '.store', popularity_dir(), metric)
+    if store is None:
+        return ingest.iter_files(read_bin, paths, 'popularity')
+    packages = set(store.packages_with(metric))
+    return (store.package(metric, path.parent.name) if path.parent.name in packages else None for path in paths)
+
+
+@instrumentation.instrument(records_out=lambda popularity: len(popularity[0]))
+def read_popularity(metric: str):
+    ids = list()
+    values = list()
+    # In path order, so the last file still wins in deduplicate whatever order the reads finish in
+    for popularity in read_popularity_files(metric, popularity_files(metric)):
+        if popularity is None:
+            continue
+        ids.append(popularity[0])
+        values.append(popularity[1])
 
-def compress_major_to_package(versions):
-    compressed_set = set()
+    if len(ids) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    return deduplicate(np.concatenate(ids), np.concatenate(values))
 
-    for version in versions:
-        found = False
-        for entry in compressed_set:
-            if entry.groupId == version.groupId and entry.artifactId == version.artifactId:
-                entry.numberMethods = max(entry.numberMethods, version.numberMethods)
-                entry.violations += version.violations
-                entry.callables += version.callables
-                found = True
-        if not found:
-            compressed_set.add(Artifact(version.groupId, version.artifactId, version.violations, version.numberMethods,
-                                        version.callables))
 
-    return compressed_set
+@instrumentation.instrument(records_out=None)
+def popularity_sketches(metric: str):
+    """
+    Quantile sketch of every popularity file of the metric by package directory, built while the files are read
+    and only built again if one of them changed.
+    """
+    def build():
+        paths = popularity_files(metric)
+        return {path.parent.name: QuantileSketch.of(popularity[1])
+                for path, popularity in zip(paths, read_popularity_files(metric, paths))
+                if popularity is not None}
+    return cache.cached('popularity-sketches', build, inputs=popularity_files(metric), params=(metric, DEFAULT_K))
 
 
+@instrumentation.instrument()
 def trendline(violation):
     if violation == 'breaking_changes':
         versions = breaking_changes
     else:
         versions = api_extensions
 
-    bc_array = list(map(lambda x: x.violations, versions))
-    method_array = list(map(lambda x: x.numberMethods, versions))
-    zipped = zip(method_array, bc_array)
-    filtered = list(filter(lambda x: x[1] > 0 and x[0] > 0, zipped))
-    filtered_x = list(map(lambda x: x[0], filtered))
-    filtered_y = list(map(lambda x: x[1], filtered))
+    filtered_x, filtered_y = violations.trendline_points(versions)
 
-    sns.regplot(x=filtered_x, y=filtered_y, order=1)
+    plotting.draw_fit(fitting.fit(filtered_x, filtered_y, order=1))
     plt.xlabel("Total number of methods")
     plt.ylabel("Total number of " + to_string(violation))
     plt.yscale("log")
@@ -142,67 +133,85 @@ def violin(violation):
     plt.show()
 
 
+@instrumentation.instrument()
 def histogram(violation):
     if violation == 'breaking_changes':
         versions = breaking_changes
     else:
         versions = api_extensions
-    bc_list = list()
+    bc_list = violations.violation_percentages(versions)
+    summary = violations.histogram_summary(bc_list)
 
-    for version in versions:
-        bc_list.append(version.violations / version.numberMethods * 100)
-
-    bc_list.sort()
-    non_zeros = [x for x in bc_list if x != 0]
-    sns.histplot(x=non_zeros, bins=30, binrange=[0, 30])
-    plt.ylabel("Number of artifacts")
     viol_str = to_string(violation)
+    print(viol_str + ' len of ones : ', summary.at_least_ten, summary.at_least_ten / summary.non_zero * 100, '%')
+    print(viol_str + ' len of all : ', summary.all)
+    print(viol_str + ' non zero len :', summary.non_zero)
+    print(viol_str + ' average non zero : ' + str(summary.average_non_zero))
+
+    if not plotting.enabled():
+        return
+    sns.histplot(x=bc_list[bc_list != 0], bins=30, binrange=[0, 30])
+    plt.ylabel("Number of artifacts")
     plt.xlabel("Percentage of methods with " + viol_str)
-
-    avg_value = sum(non_zeros) / len(non_zeros)
-    ones = [x for x in non_zeros if x >= 10]
-    print(viol_str + ' len of ones : ', len(ones), len(ones)/len(non_zeros)*100 , '%')
-    print(viol_str + ' len of all : ', len(bc_list))
-    print(viol_str + ' non zero len :', len(non_zeros))
-    print(viol_str + ' average non zero : ' + str(avg_value))
-
     # plt.yscale('log')
     plt.savefig('plots/histogram-' + violation.replace('_', '-') + '-compressed.pdf')
     plt.show()
 
 
-def calculate_popularity(pop_metric):
-    pop_dict = read_popularity(pop_metric)
-
-    bc_callables_ids = list()
-    bc_popularity_metrics = list()
-    all_popularity_metrics = list()
-    callable_ids = set()
+def read_callable_ids():
     with open('resources/callables.txt') as callable_file:
-        for callable_id in callable_file.readline().split(","):
-            callable_ids.add(callable_id)
-
-    for version in breaking_changes:
-        for callable_bc in version.callables:
-            callable_id = callable_bc.split('/')[0]
-            bc_callables_ids.append(callable_id)
-            if callable_id in pop_dict:
-                if pop_dict[callable_id] != 'na':
-                    bc_popularity_metrics.append(float(pop_dict[callable_id]))
-
-    for callable_id in pop_dict.keys():
-        if callable_id not in bc_callables_ids and pop_dict[callable_id] != 'na' \
-                and callable_id in callable_ids:
-            all_popularity_metrics.append(float(pop_dict[callable_id]))
-    print('poplen', len(all_popularity_metrics))
-    non_zero_no_bc = list(filter(lambda x: x > 0.0, all_popularity_metrics))
-    non_zero_bc = list(filter(lambda x: x > 0.0, bc_popularity_metrics))
-
-    print("all no bc : %s" % (len(all_popularity_metrics)))
-    print("no bc zeros: %s" % (len(all_popularity_metrics) - len(non_zero_no_bc)))
-    print("all bc: %s" % (len(bc_popularity_metrics)))
-    print("bc zeros: %s" % (len(bc_popularity_metrics) - len(non_zero_bc)))
-
+        return np.array([int(callable_id) for callable_id in callable_file.readline().split(",")
+                         if callable_id.strip() != ''], dtype=np.int64)
+
+
+@instrumentation.instrument(records_in=instrumentation.count_first)
+def join_popularities(metrics):
+    """
+    Joins the popularity of every metric with the callables of the breaking changes, reading those once. A metric is
+    only joined again if one of its .bin files, the breaking changes or the callables changed.
+    """
+    ids = dict()
+
+    def join(metric):
+        if len(ids) == 0:
+            ids['bc'] = callable_ids_of(breaking_changes)
+            ids['callables'] = read_callable_ids()
+        return join_popularity(*read_popularity(metric), ids['bc'], ids['callables'])
+
+    inputs = ['resources/breaking_changes.txt', 'resources/callables.txt']
+    return {metric: cache.cached('popularity-join', lambda: join(metric), inputs=inputs + popularity_files(metric),
+                                 params=(metric, version_policy))
+            for metric in metrics}
+
+
+@instrumentation.instrument(records_out=None)
+def calculate_popularity(pop_metric, joined=None):
+    if joined is None:
+        joined = join_popularities([pop_metric])[pop_metric]
+
+    print('poplen', len(joined.no_bc))
+    non_zero_no_bc = joined.no_bc_non_zero.tolist()
+    non_zero_bc = joined.bc_non_zero.tolist()
+
+    print("all no bc : %s" % (len(joined.no_bc)))
+    print("no bc zeros: %s" % joined.no_bc_zeros)
+    print("all bc: %s" % (len(joined.bc)))
+    print("bc zeros: %s" % joined.bc_zeros)
+
+    ttests = violations.popularity_ttests(non_zero_no_bc, non_zero_bc)
+    if plotting.enabled():
+        plot_popularity(non_zero_no_bc, non_zero_bc)
+
+    print(ttests.greater)
+    print(ttests.less)
+    print(ttests.two_sided)
+
+
+@instrumentation.instrument()
+def plot_popularity(non_zero_no_bc, non_zero_bc):
+    # Drawn from sketches, so the KDEs and violins take the same time for any number of methods
+    non_zero_no_bc = QuantileSketch.of(non_zero_no_bc).representatives()
+    non_zero_bc = QuantileSketch.of(non_zero_bc).representatives()
     sns.kdeplot(non_zero_bc, label="Methods involved in a breaking change", cut=0)
     sns.kdeplot(non_zero_no_bc, label="Methods not involved in a breaking change", cut=0)
     plt.xlabel("Percentage of dependents that call method")
@@ -226,72 +235,64 @@ def calculate_popularity(pop_metric):
     # plt.savefig('plots/violin_popularity_' + pop_metric + '.pdf')
     plt.show()
 
-    print(stats.ttest_ind(non_zero_no_bc, non_zero_bc, alternative='greater'))
-    print(stats.ttest_ind(non_zero_no_bc, non_zero_bc, alternative='less'))
-    print(stats.ttest_ind(non_zero_no_bc, non_zero_bc, alternative='two-sided'))
-
 
 def average_breaking_changes():
-    bc_dict = defaultdict(int)
-    number_of_major_versions = defaultdict(int)
-    total_methods = defaultdict(int)
-
-    for bc in breaking_changes:
-        key = str(bc.groupId + ':' + bc.artifactId)
-        bc_dict[key] += bc.violations
-        total_methods[key] += bc.numberMethods
-        number_of_major_versions[key] += 1
-
-    filtered_bc = dict(filter(lambda x: x[1] > 0, bc_dict.items()))
-    output = defaultdict(float)
-    for key in filtered_bc.keys():
-        output[key] = bc_dict[key] / (total_methods[key] / number_of_major_versions[key])
-
-    sum = 0
-    for value in output.values():
-        sum += value
-    print(sum / len(output))
+    print(violations.average_breaking_changes(breaking_changes))
 
 
+@instrumentation.instrument()
 def quintile_dep_percentage():
-    popularities = read_popularity("public-dependent-percentage")
-
-    xs = np.arange(0, 5 + 1 / len(popularities), 5 / (len(popularities) - 1))
-    i = [float(x) for x in popularities.values()]
-    sns.regplot(x=xs, y=i)
+    """
+    The values of all methods from the most to the least popular one, over five quintiles. They come from the merged
+    sketches of the packages rather than from every value; a callable in several packages counts once per package.
+    """
+    sketch = merge_all(popularity_sketches("public-dependent-percentage").values())
+    print("quintile boundaries:", sketch.quantiles([0.8, 0.6, 0.4, 0.2]))
+
+    if not plotting.enabled():
+        return
+    xs = np.linspace(0, 5, PLOT_POINTS)
+    plotting.draw_fit(fitting.fit(xs, sketch.quantiles(1 - xs / 5)))
     plt.savefig('plots/quintile-dep-percentage.pdf')
 
 
 def intersect(removed, added):
-    removals = set()
-    additions = set()
-    for version in removed:
-        if version.violations != 0:
-            removals.add(version.groupId + version.artifactId)
-
-    for version in added:
-        if version.violations != 0:
-            additions.add(version.groupId + version.artifactId)
-    print("removals: ", len(removals))
-    print("additions: ", len(additions))
-    print("uniton", len(removals.union(additions)))
+    intersection = violations.intersect(removed, added)
+    print("removals: ", intersection.removals)
+    print("additions: ", intersection.additions)
+    print("uniton", intersection.union)
+
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--no-plots', action='store_true', help='only print the numbers, do not draw any figure')
+    parser.add_argument('--no-cache', action='store_true', help='compute everything again, without reading or '
+                                                                'writing the cache of intermediate results')
+    instrumentation.add_arguments(parser)
+    fitting.add_arguments(parser)
+    ingest.add_arguments(parser)
+    args = parser.parse_args()
+    if args.no_plots:
+        plotting.disable()
+    cache.enabled = not args.no_cache
+    instrumentation.configure(args)
+    ingest.configure(args)
+    fitting.configure(args)
+
     try:
         os.makedirs('plots')
     except OSError:
         pass
-    bc = read_file('breaking_changes')
-    ext = read_file('api_extensions')
-    breaking_changes = compress_major_to_package(bc)
-    api_extensions = compress_major_to_package(ext)
+    breaking_changes = read_compressed('breaking_changes')
+    api_extensions = read_compressed('api_extensions')
     average_breaking_changes()
     intersect(breaking_changes, api_extensions)
 
     for violation in 'breaking_changes', 'api_extensions':
         # violin(violation)
         histogram(violation)
-        trendline(violation)
+        if plotting.enabled():
+            trendline(violation)
 
     # for metric in 'dependent-percentage', 'eigenvector', 'degree':
         calculate_popularity('dependent-percentage')
@@ -0,0 +1,5 @@
+"""
+Shared building blocks for the Python analyses of the study. The scripts at the top level of the repository
+(semver_and_popularity.py, popularity_of_packages.py, popularity_of_methods.py) and semver-python-phase/analysis.py
+import from here instead of each carrying their own copy.
+"""
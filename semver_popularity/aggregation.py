@@ -0,0 +1,88 @@
+"""
+Compression of major versions into packages: all majors of a GA become one `Artifact` holding the maximum number of
+methods, the summed number of violations and the concatenated callables of its majors.
+"""
+import numpy as np
+
+from .entities import Artifact
+from .instrumentation import count_first, instrument
+
+
+@instrument(records_in=count_first)
+def compress_major_to_package(versions):
+    """
+    Returns one Artifact per GA in the order the GAs are first seen. The callables of the input majors are copied,
+    the majors themselves are left untouched.
+    """
+    artifacts = dict()
+
+    for version in versions:
+        key = (version.groupId, version.artifactId)
+        entry = artifacts.get(key)
+        if entry is None:
+            artifacts[key] = Artifact(version.groupId, version.artifactId, version.violations, version.numberMethods,
+                                      list(version.callables))
+        else:
+            entry.numberMethods = max(entry.numberMethods, version.numberMethods)
+            entry.violations += version.violations
+            entry.callables += version.callables
+
+    return list(artifacts.values())
+
+
+class PackageTable:
+    """
+    Column-wise result of `compress_table`. Package i is the GA `gas[i]`, its callables are the entries
+    `callable_rows[i]` up to `callable_rows[i + 1]` of `callable_index`, which point into the callables of `majors`.
+    """
+
+    def __init__(self, majors, violations, number_methods, callable_rows, callable_index):
+        self.majors = majors
+        self.gas = majors.gas
+        self.violations = violations
+        self.number_methods = number_methods
+        self.callable_rows = callable_rows
+        self.callable_index = callable_index
+
+    def __len__(self):
+        return len(self.gas)
+
+    def callables(self, package):
+        return [self.majors.callable(i)
+                for i in self.callable_index[self.callable_rows[package]:self.callable_rows[package + 1]]]
+
+    def artifact(self, package):
+        groupId, artifactId = self.gas[package]
+        return Artifact(groupId, artifactId, int(self.violations[package]), int(self.number_methods[package]),
+                        self.callables(package))
+
+    def artifacts(self):
+        for package in range(len(self)):
+            yield self.artifact(package)
+
+
+def compress_table(majors):
+    """
+    Group-by over a `MajorTable` with the same semantics as `compress_major_to_package`. Packages are numbered like
+    `majors.gas`, i.e. in the order their GA first appears in the file.
+    """
+    number_of_packages = len(majors.gas)
+    ga_index = majors.ga_index.astype(np.intp)
+
+    violations = np.zeros(number_of_packages, dtype=np.int64)
+    np.add.at(violations, ga_index, majors.violations)
+    number_methods = np.zeros(number_of_packages, dtype=np.int64)
+    np.maximum.at(number_methods, ga_index, majors.number_methods)
+
+    # Callables of each package, ordered by the position of their major in the file
+    callable_counts = np.diff(majors.callable_rows)
+    order = np.argsort(ga_index, kind='stable')
+    counts = callable_counts[order]
+    starts = majors.callable_rows[:-1][order]
+    callable_rows = np.zeros(number_of_packages + 1, dtype=np.int64)
+    np.cumsum(np.bincount(ga_index, weights=callable_counts, minlength=number_of_packages).astype(np.int64),
+              out=callable_rows[1:])
+    group_starts = np.cumsum(counts) - counts
+    callable_index = np.repeat(starts - group_starts, counts) + np.arange(int(counts.sum()), dtype=np.int64)
+
+    return PackageTable(majors, violations, number_methods, callable_rows, callable_index)
@@ -0,0 +1,47 @@
+"""
+Reader for the `<GA>$<version>/<metric>.bin` files of the popularity phase. Every line of such a file is
+`callableId,value`, ordered by decreasing value, where the value is 'na' if the metric is undefined for the callable.
+
+A file is parsed in one call to NumPy's C text parser (`np.loadtxt` with a structured dtype), which reads the ids
+straight into int64 and the values into float64 with correctly rounded conversions. 'na' is rewritten to 'nan' first
+because a Python converter for it would be called for every value. The pandas C engine is not used: its default float
+parser is off by one ulp on about a sixth of the shipped values.
+"""
+import array
+import io
+import re
+
+import numpy as np
+
+NA = 'na'
+# A whole 'na' value: only at the end of a line, not the start of an existing 'nan'
+NA_FIELD = re.compile(r',na(?=\r?$)', re.MULTILINE)
+DTYPE = np.dtype([('id', np.int64), ('value', np.float64)])
+
+
+def read_bin_lines(path):
+    """`read_bin`, parsing line by line in Python."""
+    ids = array.array('q')
+    values = array.array('d')
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if line == '':
+                continue
+            callable_id, value = line.split(',', 1)
+            ids.append(int(callable_id))
+            values.append(np.nan if value == NA else float(value))
+    return np.array(ids, dtype=np.int64), np.array(values, dtype=np.float64)
+
+
+def read_bin(path):
+    """
+    Returns the callable ids as an int64 array and the values as a float64 array (NaN for 'na'), in file order.
+    Unlike the old `re.findall(r',(.*)\\n', ...)` readers this also keeps the last line, which has no newline.
+    """
+    with open(path, 'r') as file:
+        text = NA_FIELD.sub(',nan', file.read())
+    if text.strip() == '':
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+    rows = np.loadtxt(io.StringIO(text), delimiter=',', dtype=DTYPE, ndmin=1, comments=None)
+    return np.ascontiguousarray(rows['id']), np.ascontiguousarray(rows['value'])
@@ -0,0 +1,97 @@
+"""
+Fixed-memory replacement for the list-of-lists binning of popularity_of_methods.analyse.
+
+Every package's values (in file order, i.e. sorted by popularity) are split into `num_bins` contiguous chunks like
+`popularity_of_methods.split` does, and chunk i is folded into the running sum and count of bin i. Optionally every
+bin also keeps a log-scale histogram of its values, from which approximate box plot statistics are read. Memory is
+O(num_bins) however many packages are added.
+"""
+import numpy as np
+
+# Histogram buckets of the optional sketch: BUCKETS_PER_DECADE per power of ten between 10^MIN_EXPONENT and
+# 10^MAX_EXPONENT, which bounds the relative error of a quantile to about 4%.
+MIN_EXPONENT = -9
+MAX_EXPONENT = 9
+BUCKETS_PER_DECADE = 32
+
+
+def chunk_labels(length, num_bins):
+    """Bin of every position of a package with `length` values, matching `split(values, num_bins)`."""
+    k, m = divmod(length, num_bins)
+    sizes = np.full(num_bins, k)
+    sizes[:m] += 1
+    return np.repeat(np.arange(num_bins), sizes)
+
+
+def bucket_of(values):
+    buckets = np.floor(np.log10(np.maximum(values, 10.0 ** MIN_EXPONENT)) * BUCKETS_PER_DECADE)
+    return np.clip(buckets.astype(np.int64) - MIN_EXPONENT * BUCKETS_PER_DECADE, 0, number_of_buckets() - 1)
+
+
+def bucket_value(bucket):
+    """Geometric middle of a bucket."""
+    return 10.0 ** ((bucket + MIN_EXPONENT * BUCKETS_PER_DECADE + 0.5) / BUCKETS_PER_DECADE)
+
+
+def number_of_buckets():
+    return (MAX_EXPONENT - MIN_EXPONENT) * BUCKETS_PER_DECADE
+
+
+class BinAccumulator:
+    def __init__(self, num_bins, sketch=False):
+        self.num_bins = num_bins
+        self.packages = 0
+        self.sums = np.zeros(num_bins)
+        self.counts = np.zeros(num_bins, dtype=np.int64)
+        self.minimums = np.full(num_bins, np.inf)
+        self.maximums = np.full(num_bins, -np.inf)
+        self.histograms = np.zeros((num_bins, number_of_buckets()), dtype=np.int64) if sketch else None
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        labels = chunk_labels(len(values), self.num_bins)
+        self.packages += 1
+        self.sums += np.bincount(labels, weights=values, minlength=self.num_bins)
+        self.counts += np.bincount(labels, minlength=self.num_bins)
+        np.minimum.at(self.minimums, labels, values)
+        np.maximum.at(self.maximums, labels, values)
+        if self.histograms is not None:
+            np.add.at(self.histograms, (labels, bucket_of(values)), 1)
+
+    def averages(self):
+        """Average of every bin, NaN for a bin that never received a value (as numpy.average of an empty list)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums / self.counts
+
+    def quantile(self, bin_index, q):
+        count = self.counts[bin_index]
+        if count == 0:
+            return np.nan
+        cumulative = np.cumsum(self.histograms[bin_index])
+        bucket = int(np.searchsorted(cumulative, q * (count - 1), side='right'))
+        return float(np.clip(bucket_value(bucket), self.minimums[bin_index], self.maximums[bin_index]))
+
+    def box_stats(self):
+        """Approximate statistics of every bin in the format of `Axes.bxp`, whiskers at 1.5 times the IQR."""
+        if self.histograms is None:
+            raise ValueError('box statistics need an accumulator created with sketch=True')
+        averages = self.averages()
+        stats = list()
+        for i in range(self.num_bins):
+            q1, median, q3 = (self.quantile(i, q) for q in (0.25, 0.5, 0.75))
+            iqr = q3 - q1
+            whislo, whishi = np.nan, np.nan
+            if self.counts[i] > 0:
+                whislo = max(q1 - 1.5 * iqr, self.minimums[i])
+                whishi = min(q3 + 1.5 * iqr, self.maximums[i])
+            stats.append({
+                'label': str(i),
+                'mean': averages[i],
+                'med': median,
+                'q1': q1,
+                'q3': q3,
+                'whislo': whislo,
+                'whishi': whishi,
+                'fliers': [],
+            })
+        return stats
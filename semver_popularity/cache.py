@@ -0,0 +1,147 @@
+"""
+On-disk cache of intermediate results (parsed majors, compressed artifacts, popularity joins, ...).
+
+An entry is keyed by the name of the stage, the content hashes of the files it reads and its parameters, so a stage
+is computed again exactly when one of its own inputs changed: editing one .bin file only invalidates the stages that
+read it. Content hashes are remembered in `hashes.json` next to the entries, keyed by path, size and modification
+time, so unchanged inputs are not read again just to be hashed.
+
+Entries are pickles. A hit refreshes the modification time of the entry, and after every write the least recently
+used entries are removed until the cache fits in `max_bytes`.
+"""
+import hashlib
+import json
+import os
+import pickle
+
+DEFAULT_DIRECTORY = '.cache'
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+ENTRY_SUFFIX = '.pickle'
+HASHES_FILE = 'hashes.json'
+# Bump to invalidate every entry when the pickled classes change
+VERSION = 1
+
+
+class Cache:
+    def __init__(self, directory=DEFAULT_DIRECTORY, max_bytes=DEFAULT_MAX_BYTES, enabled=True):
+        self.directory = str(directory)
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.hashes = None
+        self.hashes_changed = False
+
+    def _load_hashes(self):
+        if self.hashes is None:
+            try:
+                with open(os.path.join(self.directory, HASHES_FILE)) as file:
+                    self.hashes = json.load(file)
+            except (OSError, ValueError):
+                self.hashes = dict()
+        return self.hashes
+
+    def _save_hashes(self):
+        if not self.hashes_changed:
+            return
+        self.hashes_changed = False
+        path = os.path.join(self.directory, HASHES_FILE)
+        try:
+            with open(path + '.tmp', 'w') as file:
+                json.dump(self.hashes, file)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            pass
+
+    def file_hash(self, path):
+        """SHA-256 of the content of the file, or None if it does not exist."""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        hashes = self._load_hashes()
+        known = hashes.get(path)
+        if known is not None and known[0] == stat.st_size and known[1] == stat.st_mtime_ns:
+            return known[2]
+
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                digest.update(block)
+        hashes[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        self.hashes_changed = True
+        return hashes[path][2]
+
+    def key(self, stage, inputs=(), params=None):
+        """Key of a stage reading the `inputs` files with the given (repr-able) parameters."""
+        digest = hashlib.sha256()
+        digest.update(repr((VERSION, stage, params)).encode())
+        for path in inputs:
+            digest.update(('\0%s\0%s' % (path, self.file_hash(path))).encode())
+        return stage + '-' + digest.hexdigest()[:32]
+
+    def cached(self, stage, compute, inputs=(), params=None):
+        """Returns the cached result of the stage, calling `compute()` and storing its result on a miss."""
+        if not self.enabled:
+            return compute()
+
+        os.makedirs(self.directory, exist_ok=True)
+        inputs = sorted(str(path) for path in inputs)
+        path = os.path.join(self.directory, self.key(stage, inputs, params) + ENTRY_SUFFIX)
+        self._save_hashes()
+        try:
+            with open(path, 'rb') as file:
+                value = pickle.load(file)
+            os.utime(path)
+            self.hits += 1
+            return value
+        except (OSError, EOFError, pickle.UnpicklingError):
+            pass
+
+        self.misses += 1
+        value = compute()
+        try:
+            with open(path + '.tmp', 'wb') as file:
+                pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+            os.utime(path)
+        except OSError:
+            return value
+        self.evict()
+        return value
+
+    def entries(self):
+        """(path, size, last use) of every entry, least recently used first."""
+        entries = list()
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if name.endswith(ENTRY_SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_size, stat.st_mtime_ns))
+        entries.sort(key=lambda entry: entry[2])
+        return entries
+
+    def evict(self):
+        """Removes the least recently used entries until the cache holds at most `max_bytes`."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            os.remove(path)
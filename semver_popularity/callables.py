@@ -0,0 +1,304 @@
+"""
+Compact store for the callable labels of the violation files, which look like
+
+    2311543068/1.21.0//com.azure.core.http.rest/RequestOptions.setThrowOnError(%2Fjava.lang%2FBooleanType)RequestOptions
+
+i.e. `id/version//module/class.method(params)return`, percent-encoded as in the files. Every label is split once into
+its id and six components. A component is dictionary-encoded: its distinct strings are kept once, sorted, and every
+callable only holds their codes, in the smallest unsigned integer type that fits. The sorted strings of a dictionary
+are front-coded, every one stored as the length of the prefix it shares with the previous one and the rest, with a
+full string every RESTART_INTERVAL entries to bound the decoding of one. Lookups by id or by (module, class) search
+sorted code arrays and compare no strings; a label is only put together again when asked for.
+
+The store of a violation file can be kept next to it:
+
+    python -m semver_popularity.callables semver-python-phase/resources/breaking_changes_bynow.txt
+"""
+import argparse
+import bisect
+import os
+
+import numpy as np
+
+from .parsing import CALLABLE_SEPARATOR, iter_records
+
+COMPONENTS = ('version', 'module', 'class', 'method', 'params', 'return')
+STORE_SUFFIX = '.callables.npz'
+RESTART_INTERVAL = 16
+
+
+def split_label(callable_label):
+    """(id, version, module, class, method, params, return) of a callable label."""
+    head, name = callable_label.split('//', 1)
+    callable_id, version = head.split('/', 1)
+    module, signature = name.split('/', 1)
+    qualified_method, rest = signature.split('(', 1)
+    class_name, method = qualified_method.rsplit('.', 1)
+    params, return_type = rest.split(')', 1)
+    return int(callable_id), (version, module, class_name, method, params, return_type)
+
+
+def join_label(callable_id, components):
+    version, module, class_name, method, params, return_type = components
+    return '%d/%s//%s/%s.%s(%s)%s' % (callable_id, version, module, class_name, method, params, return_type)
+
+
+def _shared_prefix(a, b):
+    length = min(len(a), len(b))
+    for i in range(length):
+        if a[i] != b[i]:
+            return i
+    return length
+
+
+class FrontCodedStrings:
+    """
+    Sorted distinct strings, entry i being the first `shared[i]` bytes of entry i - 1 followed by
+    `buffer[offsets[i]:offsets[i + 1]]`. Entries at multiples of RESTART_INTERVAL share nothing.
+    """
+
+    def __init__(self, buffer, offsets, shared):
+        self.buffer = buffer
+        self.offsets = offsets
+        self.shared = shared
+
+    @classmethod
+    def build(cls, strings):
+        """Front-coded form of strings that are sorted and distinct."""
+        buffer = bytearray()
+        offsets = [0]
+        shared = list()
+        previous = b''
+        for i, string in enumerate(strings):
+            encoded = string.encode()
+            prefix = 0 if i % RESTART_INTERVAL == 0 else _shared_prefix(previous, encoded)
+            buffer += encoded[prefix:]
+            offsets.append(len(buffer))
+            shared.append(prefix)
+            previous = encoded
+        return cls(np.frombuffer(bytes(buffer), dtype=np.uint8), np.array(offsets, dtype=np.int64),
+                   np.array(shared, dtype=np.min_scalar_type(max(shared, default=0))))
+
+    def __len__(self):
+        return len(self.shared)
+
+    def _suffix(self, i):
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].tobytes()
+
+    def _bytes(self, i):
+        start = i - i % RESTART_INTERVAL
+        value = self._suffix(start)
+        for j in range(start + 1, i + 1):
+            value = value[:self.shared[j]] + self._suffix(j)
+        return value
+
+    def __getitem__(self, i):
+        return self._bytes(i).decode()
+
+    def index(self, string):
+        """Position of the string, None if it is not one of them."""
+        encoded = string.encode()
+        block = bisect.bisect_right(_Restarts(self), encoded) - 1
+        if block < 0:
+            return None
+        start = block * RESTART_INTERVAL
+        value = self._suffix(start)
+        for i in range(start, min(start + RESTART_INTERVAL, len(self))):
+            if i > start:
+                value = value[:self.shared[i]] + self._suffix(i)
+            if value == encoded:
+                return i
+            if value > encoded:
+                return None
+        return None
+
+    def tolist(self):
+        strings = list()
+        value = b''
+        for i in range(len(self)):
+            value = value[:self.shared[i]] + self._suffix(i)
+            strings.append(value.decode())
+        return strings
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes + self.shared.nbytes
+
+
+class _Restarts:
+    """The full strings at the restart points, as a sequence for bisect."""
+
+    def __init__(self, strings):
+        self.strings = strings
+
+    def __len__(self):
+        return (len(self.strings) + RESTART_INTERVAL - 1) // RESTART_INTERVAL
+
+    def __getitem__(self, block):
+        return self.strings._suffix(block * RESTART_INTERVAL)
+
+
+def _encode(strings):
+    """Front-coded distinct strings and the code of every string, in the smallest unsigned type that fits."""
+    dictionary = sorted(set(strings))
+    codes = {string: code for code, string in enumerate(dictionary)}
+    return FrontCodedStrings.build(dictionary), np.fromiter((codes[string] for string in strings),
+                                                             dtype=np.min_scalar_type(max(len(dictionary) - 1, 0)),
+                                                             count=len(strings))
+
+
+class CallableStore:
+    """
+    Callables `rows[i]` up to `rows[i + 1]` belong to row i of the violation file. Callable j has the id `ids[j]` and
+    its component c is `dictionaries[c][codes[c][j]]`.
+    """
+
+    def __init__(self, ids, rows, dictionaries, codes):
+        self.ids = ids
+        self.rows = rows
+        self.dictionaries = dictionaries
+        self.codes = codes
+        # Positions sorted by id and by (module, class), for the lookups
+        position_type = np.min_scalar_type(max(len(ids) - 1, 0))
+        self.id_order = np.argsort(ids, kind='stable').astype(position_type)
+        self.sorted_ids = ids[self.id_order]
+        class_keys = codes['module'].astype(np.int64) * len(dictionaries['class']) + codes['class']
+        self.class_order = np.argsort(class_keys, kind='stable').astype(position_type)
+        self.sorted_class_keys = class_keys[self.class_order].astype(np.min_scalar_type(
+            len(dictionaries['module']) * len(dictionaries['class'])))
+
+    @classmethod
+    def from_labels(cls, labels, rows=None):
+        """Store of the labels, which are one row unless `rows` gives the offsets of several."""
+        ids = list()
+        columns = [list() for _ in COMPONENTS]
+        for callable_label in labels:
+            callable_id, components = split_label(callable_label)
+            ids.append(callable_id)
+            for column, component in zip(columns, components):
+                column.append(component)
+        dictionaries = dict()
+        codes = dict()
+        for name, column in zip(COMPONENTS, columns):
+            dictionaries[name], codes[name] = _encode(column)
+        if rows is None:
+            rows = [0, len(ids)]
+        return cls(np.array(ids, dtype=np.int64), np.array(rows, dtype=np.int64), dictionaries, codes)
+
+    @classmethod
+    def parse(cls, path, separator=CALLABLE_SEPARATOR):
+        """Store of the callables of every row of a violation file."""
+        labels = list()
+        rows = [0]
+        for record in iter_records(path, separator):
+            labels.extend(record[5])
+            rows.append(len(labels))
+        return cls.from_labels(labels, rows)
+
+    @classmethod
+    def load(cls, path, store_file=None):
+        """Returns the saved store of the violation file, parsing and saving it again if the file changed."""
+        if store_file is None:
+            store_file = str(path) + STORE_SUFFIX
+        stat = os.stat(path)
+        stamp = np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+        try:
+            with np.load(store_file) as saved:
+                if np.array_equal(saved['stamp'], stamp):
+                    dictionaries = {name: FrontCodedStrings(saved['buffer_' + name], saved['offsets_' + name],
+                                                            saved['shared_' + name]) for name in COMPONENTS}
+                    return cls(saved['ids'], saved['rows'], dictionaries,
+                               {name: saved['codes_' + name] for name in COMPONENTS})
+        except (OSError, ValueError, KeyError):
+            pass
+        store = cls.parse(path)
+        store.save(store_file, stamp)
+        return store
+
+    def save(self, store_file, stamp=None):
+        arrays = {'ids': self.ids, 'rows': self.rows}
+        if stamp is not None:
+            arrays['stamp'] = stamp
+        for name in COMPONENTS:
+            dictionary = self.dictionaries[name]
+            arrays['buffer_' + name] = dictionary.buffer
+            arrays['offsets_' + name] = dictionary.offsets
+            arrays['shared_' + name] = dictionary.shared
+            arrays['codes_' + name] = self.codes[name]
+        temporary_path = str(store_file) + '.tmp.npz'
+        np.savez(temporary_path, **arrays)
+        os.replace(temporary_path, store_file)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def code_of(self, component, value):
+        """Code of a component string, None if no callable has it."""
+        return self.dictionaries[component].index(value)
+
+    def component(self, component, index):
+        return self.dictionaries[component][self.codes[component][index]]
+
+    def components(self, index):
+        return tuple(self.component(name, index) for name in COMPONENTS)
+
+    def label(self, index):
+        return join_label(int(self.ids[index]), self.components(index))
+
+    def labels(self, row):
+        """The callable labels of a row of the violation file, as `Major.callables` holds them."""
+        return [self.label(index) for index in range(self.rows[row], self.rows[row + 1])]
+
+    def by_id(self, callable_id):
+        """Indices of the callables with the id, in store order."""
+        start, stop = np.searchsorted(self.sorted_ids, [callable_id, callable_id + 1])
+        return np.sort(self.id_order[start:stop])
+
+    def contains_ids(self, callable_ids):
+        """Mask telling which of the ids are in the store."""
+        return np.isin(np.asarray(callable_ids, dtype=np.int64), self.sorted_ids, assume_unique=False)
+
+    def by_class(self, module, class_name):
+        """Indices of the callables of a class, in store order."""
+        module_code = self.code_of('module', module)
+        class_code = self.code_of('class', class_name)
+        if module_code is None or class_code is None:
+            return np.zeros(0, dtype=np.int64)
+        key = module_code * len(self.dictionaries['class']) + class_code
+        start, stop = np.searchsorted(self.sorted_class_keys, [key, key + 1])
+        return np.sort(self.class_order[start:stop])
+
+    def row_of(self, indices):
+        """Row of the violation file of every callable index."""
+        return np.searchsorted(self.rows, indices, side='right') - 1
+
+    @property
+    def nbytes(self):
+        """Bytes of all arrays, the lookup indices included."""
+        return (self.ids.nbytes + self.rows.nbytes + self.id_order.nbytes + self.sorted_ids.nbytes +
+                self.class_order.nbytes + self.sorted_class_keys.nbytes +
+                sum(codes.nbytes for codes in self.codes.values()) +
+                sum(dictionary.nbytes for dictionary in self.dictionaries.values()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Builds the compact callable store of a violation file.')
+    parser.add_argument('violation_file')
+    parser.add_argument('--output', help='store file (default: <violation_file>%s)' % STORE_SUFFIX)
+    args = parser.parse_args()
+
+    store = CallableStore.parse(args.violation_file)
+    output = args.output or args.violation_file + STORE_SUFFIX
+    stat = os.stat(args.violation_file)
+    store.save(output, np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64))
+    label_bytes = sum(len(store.label(index).encode()) for index in range(len(store)))
+    print('%d callables in %d rows, %d bytes of labels stored in %d bytes' % (
+        len(store), len(store.rows) - 1, label_bytes, store.nbytes))
+    for name in COMPONENTS:
+        dictionary = store.dictionaries[name]
+        print('  %-8s %7d distinct in %8d bytes, %s codes' % (name, len(dictionary), dictionary.nbytes,
+                                                               store.codes[name].dtype))
+
+
+if __name__ == '__main__':
+    main()
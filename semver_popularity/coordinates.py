@@ -0,0 +1,121 @@
+"""
+Index over a Maven coordinate list such as mvn.expanded_coords.txt (one groupId:artifactId:version per line).
+
+Every coordinate is parsed once into a GA id and major, minor and patch numbers. A number is -1 unless its
+dot-separated part is a plain decimal number, digits only and no leading zero, so that neither '1.0-beta' nor '1.00'
+counts as a .0 release, as in the string comparisons with '0' it replaces. Everything from the fourth part on is kept
+as the qualifier. The parsed columns are cached
+in `<file>.index.npz`, keyed by the size and modification time of the file.
+
+Release kinds, for versions with at least three parts:
+    'major': x.0.0
+    'minor': x.y.0 with y != 0
+    'patch': everything else, including versions with fewer than three parts
+"""
+import os
+
+import numpy as np
+
+INDEX_SUFFIX = '.index.npz'
+# Part of the cache key, so indices parsed by an older parse_number are parsed again
+FORMAT_VERSION = 2
+RELEASE_KINDS = ('major', 'minor', 'patch')
+
+
+def parse_number(part):
+    if not (part.isascii() and part.isdigit()) or (part[0] == '0' and part != '0'):
+        return -1
+    return int(part)
+
+
+class CoordinateIndex:
+    def __init__(self, gas, ga_index, major, minor, patch, number_of_parts, qualifiers):
+        self.gas = gas
+        self.ga_ids = {ga: i for i, ga in enumerate(gas)}
+        self.ga_index = ga_index
+        self.major = major
+        self.minor = minor
+        self.patch = patch
+        self.number_of_parts = number_of_parts
+        self.qualifiers = qualifiers
+
+    @classmethod
+    def parse(cls, path):
+        gas = list()
+        ga_ids = dict()
+        ga_index = list()
+        numbers = list()
+        number_of_parts = list()
+        qualifiers = list()
+        with open(path, 'r') as file:
+            for line in file:
+                line = line.rstrip('\n')
+                if line == '':
+                    continue
+                split = line.split(':')
+                ga = split[0] + ':' + split[1]
+                if ga not in ga_ids:
+                    ga_ids[ga] = len(gas)
+                    gas.append(ga)
+                ga_index.append(ga_ids[ga])
+                parts = split[2].split('.')
+                numbers.append([parse_number(part) for part in (parts + ['', '', ''])[:3]])
+                number_of_parts.append(len(parts))
+                qualifiers.append('.'.join(parts[3:]))
+
+        numbers = np.array(numbers, dtype=np.int64).reshape(-1, 3)
+        return cls(gas, np.array(ga_index, dtype=np.int32), numbers[:, 0], numbers[:, 1], numbers[:, 2],
+                   np.array(number_of_parts, dtype=np.int16), np.array(qualifiers, dtype=str))
+
+    @classmethod
+    def load(cls, path, index_file=None):
+        """Returns the cached index of the coordinate file, parsing the file again if it changed."""
+        if index_file is None:
+            index_file = str(path) + INDEX_SUFFIX
+        stat = os.stat(path)
+        stamp = np.array([stat.st_size, stat.st_mtime_ns, FORMAT_VERSION], dtype=np.int64)
+
+        try:
+            with np.load(index_file) as cached:
+                if np.array_equal(cached['stamp'], stamp):
+                    return cls(cached['gas'].tolist(), cached['ga_index'], cached['major'], cached['minor'],
+                               cached['patch'], cached['number_of_parts'], cached['qualifiers'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = cls.parse(path)
+        try:
+            with open(index_file + '.tmp', 'wb') as file:
+                np.savez(file, stamp=stamp, gas=np.array(index.gas, dtype=str), ga_index=index.ga_index,
+                         major=index.major, minor=index.minor, patch=index.patch,
+                         number_of_parts=index.number_of_parts, qualifiers=index.qualifiers)
+            os.replace(index_file + '.tmp', index_file)
+        except OSError:
+            pass
+        return index
+
+    def __len__(self):
+        return len(self.ga_index)
+
+    def release_kind(self, kind):
+        """Boolean mask of the coordinates that are releases of the given kind."""
+        three_parts = self.number_of_parts > 2
+        if kind == 'major':
+            return three_parts & (self.minor == 0) & (self.patch == 0)
+        if kind == 'minor':
+            return three_parts & (self.minor != 0) & (self.patch == 0)
+        if kind == 'patch':
+            return ~(three_parts & (self.patch == 0))
+        raise ValueError('unknown release kind %s, expected one of %s' % (kind, RELEASE_KINDS))
+
+    def of_gas(self, gas):
+        """Boolean mask of the coordinates whose 'groupId:artifactId' is one of the given GAs."""
+        ids = [self.ga_ids[ga] for ga in set(gas) if ga in self.ga_ids]
+        return np.isin(self.ga_index, np.array(ids, dtype=np.int32))
+
+    def count(self, gas, kinds=RELEASE_KINDS):
+        """Number of coordinates of the GAs that are releases of one of the kinds."""
+        mask = np.zeros(len(self), dtype=bool)
+        for kind in kinds:
+            mask |= self.release_kind(kind)
+        return int(np.count_nonzero(mask & self.of_gas(gas)))
@@ -0,0 +1,54 @@
+"""
+Area cutoffs of the fitted popularity curve of popularity_of_methods.analyse: the point x at which the area under the
+curve left of x is a given fraction of the total area (0.5 for the point where the left and right areas are equal).
+
+The curve is the one `fitting.fit` draws instead of being read back from a seaborn figure, and the cutoff is found in
+O(n) from a cumulative trapezoid array, solving the quadratic inside the crossing segment so the result is exact
+for the piecewise linear curve.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class Cutoff:
+    fraction: float
+    x: float
+    # Position of x in the x range, i.e. x / 5 for the quintile axis of analyse
+    quantile: float
+    y: float
+    area_left: float
+    area_right: float
+    total_area: float
+
+
+def cumulative_trapezoid(x, y):
+    cumulative = np.zeros(len(x))
+    np.cumsum((y[1:] + y[:-1]) / 2 * np.diff(x), out=cumulative[1:])
+    return cumulative
+
+
+def area_cutoff(x, y, fraction):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    cumulative = cumulative_trapezoid(x, y)
+    total_area = cumulative[-1]
+    target = fraction * total_area
+
+    reached = cumulative >= target
+    segment = min(max(int(np.argmax(reached)) - 1, 0), len(x) - 2) if reached.any() else len(x) - 2
+    # Area of the segment up to x[segment] + t is y0 * t + slope * t^2 / 2, solve it for the remaining area
+    width = x[segment + 1] - x[segment]
+    y0 = y[segment]
+    slope = (y[segment + 1] - y0) / width
+    remaining = target - cumulative[segment]
+    discriminant = max(y0 * y0 + 2 * slope * remaining, 0.0)
+    denominator = y0 + np.sqrt(discriminant)
+    t = 2 * remaining / denominator if denominator != 0 else 0.0
+    t = min(max(t, 0.0), width)
+
+    cutoff_x = x[segment] + t
+    area_left = cumulative[segment] + y0 * t + slope * t * t / 2
+    return Cutoff(fraction, float(cutoff_x), float((cutoff_x - x[0]) / (x[-1] - x[0])), float(y0 + slope * t),
+                  float(area_left), float(total_area - area_left), float(total_area))
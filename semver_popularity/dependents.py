@@ -0,0 +1,47 @@
+"""
+Dependents of packages, interned to dense integer ids. Every distinct dependent coordinate gets the next id the first
+time it is seen, and the dependents of a package are kept as a sorted array of unique uint32 ids, so the memory
+needed no longer grows with the length of the coordinates times the number of packages that share them.
+"""
+import numpy as np
+
+
+def read_dependents(path):
+    """The lines of a dependents.txt file without their newline, the last line having none or not."""
+    with open(path) as file:
+        lines = file.read().split('\n')
+    if lines[-1] == '':
+        lines.pop()
+    return lines
+
+
+class DependentSets:
+    def __init__(self):
+        self.ids = dict()
+        self.packages = dict()
+
+    def intern(self, dependents):
+        ids = self.ids
+        return np.fromiter((ids.setdefault(dependent, len(ids)) for dependent in dependents), dtype=np.uint32)
+
+    def add(self, package, dependents):
+        """Adds the dependents (coordinates) to the set of the package. Packages without any are not recorded."""
+        if len(dependents) == 0:
+            return
+        ids = np.unique(self.intern(dependents))
+        known = self.packages.get(package)
+        self.packages[package] = ids if known is None else np.union1d(known, ids)
+
+    def union(self):
+        """Ids of the dependents of at least one package."""
+        if len(self.packages) == 0:
+            return np.zeros(0, dtype=np.uint32)
+        seen = np.zeros(len(self.ids), dtype=bool)
+        for ids in self.packages.values():
+            seen[ids] = True
+        return np.flatnonzero(seen).astype(np.uint32)
+
+    def shares(self):
+        """For every package, the fraction of all dependents that depends on it."""
+        total = len(self.union())
+        return {package: len(ids) / total for package, ids in self.packages.items()}
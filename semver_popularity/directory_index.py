@@ -0,0 +1,141 @@
+"""
+GA -> directory name index for the per-package result directories, so that looking up the directory of an artifact
+does not list the whole directory again.
+
+Two layouts are in use: the popularity phase writes `<groupId>:<artifactId>$<version>` directories and the
+dependents crawl writes `<groupId>_<artifactId>_<version>` directories (input/ of popularity_of_packages.py).
+Popularity names are split into their GA and version once. Dependents names cannot be split, as artifactIds like
+`shapeless_2.13` contain underscores too, so the index keeps them sorted and a GA is looked up as the names starting
+with `<groupId>_<artifactId>_`, found by bisection, whose rest is a version: it starts with a digit and has no
+underscore, so `shapeless` does not match the directories of `shapeless_2.13`. The index is persisted next to the
+directory as `<directory>.ga-index.json` and rebuilt when the modification time of the directory changes, i.e. when
+entries are added or removed.
+
+When a GA has several versions, `lookup` applies one of the policies:
+    'latest': only the directory of the highest version (the default),
+    'first': only the directory whose name sorts first,
+    'all': every directory of the GA,
+    'error': raise a ValueError.
+"""
+import bisect
+import json
+import os
+import re
+
+POLICIES = ('latest', 'first', 'all', 'error')
+DEFAULT_POLICY = 'latest'
+INDEX_SUFFIX = '.ga-index.json'
+INDEX_VERSION = 2
+LAYOUTS = ('popularity', 'dependents')
+
+
+def parse_popularity_name(name):
+    ga, separator, version = name.rpartition('$')
+    if separator == '' or ':' not in ga:
+        return None
+    groupId, artifactId = ga.split(':', 1)
+    return groupId, artifactId, version
+
+
+def version_key(version):
+    """
+    Orders versions by their numeric components; a qualifier sorts before any number at the same position, so
+    1.0-rc1 < 1.0 < 1.0.1 < 1.1. This is enough to choose a latest version, it is not Maven's full ordering.
+    """
+    key = list()
+    for part in re.split(r'[.\-]', version):
+        if part.isdigit():
+            key.append((2, int(part), ''))
+        else:
+            key.append((0, 0, part))
+    key.append((1, 0, ''))
+    return tuple(key)
+
+
+class DirectoryIndex:
+    """
+    `entries` maps 'groupId:artifactId' to [version, name] pairs for the popularity layout and is the sorted list of
+    directory names for the dependents layout.
+    """
+
+    def __init__(self, directory, layout, entries):
+        self.directory = directory
+        self.layout = layout
+        self.entries = entries
+
+    @classmethod
+    def build(cls, directory, layout='popularity'):
+        if layout not in LAYOUTS:
+            raise ValueError('unknown layout %s, expected one of %s' % (layout, LAYOUTS))
+        names = sorted(os.listdir(directory))
+        if layout == 'dependents':
+            return cls(directory, layout, [name for name in names if '_' in name])
+        entries = dict()
+        for name in names:
+            parsed = parse_popularity_name(name)
+            if parsed is None:
+                continue
+            groupId, artifactId, version = parsed
+            entries.setdefault(groupId + ':' + artifactId, list()).append([version, name])
+        return cls(directory, layout, entries)
+
+    @classmethod
+    def load(cls, directory, layout='popularity', index_file=None):
+        """Returns the persisted index of the directory, rebuilding and persisting it if it is stale."""
+        if index_file is None:
+            index_file = os.path.normpath(str(directory)) + INDEX_SUFFIX
+        modified = os.stat(directory).st_mtime_ns
+
+        try:
+            with open(index_file, 'r') as file:
+                persisted = json.load(file)
+            if (persisted.get('version') == INDEX_VERSION and persisted['directory_mtime_ns'] == modified and
+                    persisted['layout'] == layout):
+                return cls(directory, layout, persisted['entries'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        index = cls.build(directory, layout)
+        try:
+            with open(index_file + '.tmp', 'w') as file:
+                json.dump({'version': INDEX_VERSION, 'directory_mtime_ns': modified, 'layout': layout,
+                           'entries': index.entries}, file)
+            os.replace(index_file + '.tmp', index_file)
+        except OSError:
+            pass
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def candidates(self, groupId, artifactId):
+        """[version, name] of every directory of the GA, in name order."""
+        if self.layout == 'popularity':
+            return self.entries.get(groupId + ':' + artifactId, list())
+        prefix = groupId + '_' + artifactId + '_'
+        candidates = list()
+        for name in self.entries[bisect.bisect_left(self.entries, prefix):]:
+            if not name.startswith(prefix):
+                break
+            version = name[len(prefix):]
+            # The rest of the name of a longer artifactId, e.g. `2.13_2.3.3` for `shapeless` of `shapeless_2.13`
+            if version[:1].isdigit() and '_' not in version:
+                candidates.append([version, name])
+        return candidates
+
+    def versions(self, groupId, artifactId):
+        return [version for version, _ in self.candidates(groupId, artifactId)]
+
+    def lookup(self, groupId, artifactId, policy=DEFAULT_POLICY):
+        """Returns the list of directory names of the GA selected by the policy, empty if the GA is unknown."""
+        if policy not in POLICIES:
+            raise ValueError('unknown version policy %s, expected one of %s' % (policy, POLICIES))
+        candidates = self.candidates(groupId, artifactId)
+        if len(candidates) <= 1 or policy == 'all':
+            return [name for _, name in candidates]
+        if policy == 'error':
+            raise ValueError('%s:%s has %s versions in %s: %s' % (groupId, artifactId, len(candidates),
+                                                                    self.directory, [v for v, _ in candidates]))
+        if policy == 'first':
+            return [candidates[0][1]]
+        return [max(candidates, key=lambda candidate: version_key(candidate[0]))[1]]
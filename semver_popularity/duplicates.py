@@ -0,0 +1,109 @@
+"""
+Duplicated names between breaking changes and illegal API extensions. A version that removed m() and added m(int)
+gets a breaking change for m() and an illegal API extension for m(int); for every category below such pairs are
+found per version and the extension is dropped.
+
+Every callable label is parsed once into interned (module, class, method, return, params) fields, as the old
+`Duplicate` class of analysis.py did (including its quirk of dropping the dots after the class name). A category
+compares all fields except the one it is named after, so its key is simply the tuple without that field.
+"""
+import sys
+from collections import defaultdict
+
+CATEGORIES = ('module', 'class', 'method', 'params', 'return')
+FIELDS = ('module', 'class', 'method', 'return', 'params')
+# Position of the field a category ignores
+IGNORED_FIELD = {
+    'module': FIELDS.index('module'),
+    'class': FIELDS.index('class'),
+    'method': FIELDS.index('method'),
+    'params': FIELDS.index('params'),
+    'return': FIELDS.index('return'),
+}
+
+
+class LabelParser:
+    """Parses callable labels into (version, fields), remembering labels it has seen before."""
+
+    def __init__(self):
+        self.parsed = dict()
+
+    def __call__(self, callable_label):
+        parsed = self.parsed.get(callable_label)
+        if parsed is None:
+            parsed = parse_label(callable_label)
+            self.parsed[callable_label] = parsed
+        return parsed
+
+
+def parse_label(callable_label):
+    version = callable_label.split("/")[1]
+    name = callable_label.split("//")[1]
+    split_slash = name.split("/")
+    split_dot = split_slash[1].split(".")
+    rest = ''.join(split_dot[1:])
+    split_bracket = rest.split("(")
+    return_and_parameters = split_bracket[1].split(")")
+    fields = (split_slash[0], split_dot[0], split_bracket[0], return_and_parameters[0], return_and_parameters[1])
+    return sys.intern(version), tuple(sys.intern(field) for field in fields)
+
+
+def category_key(fields, category):
+    ignored = IGNORED_FIELD[category]
+    return fields[:ignored] + fields[ignored + 1:]
+
+
+def duplicates_of_artifact(bc_parsed, api_parsed, category):
+    """
+    Returns the keys that a breaking change and an API extension of the same version share, and the positions of
+    the API extensions whose key is not one of them.
+    """
+    bc_version_dict = defaultdict(set)
+    api_version_dict = defaultdict(set)
+    for version, fields in bc_parsed:
+        bc_version_dict[version].add(category_key(fields, category))
+    api_keys = list()
+    for version, fields in api_parsed:
+        key = category_key(fields, category)
+        api_keys.append(key)
+        api_version_dict[version].add(key)
+
+    to_remove = set()
+    for version, keys in bc_version_dict.items():
+        if version in api_version_dict:
+            to_remove |= keys & api_version_dict[version]
+
+    kept = [i for i, key in enumerate(api_keys) if key not in to_remove]
+    return to_remove, kept
+
+
+def remove_duplicate_names(bc_callables, api_callables, categories=CATEGORIES, parser=None):
+    """
+    Applies the categories one after the other to the callables of one artifact. Returns the API extension
+    callables that are left and, per category, the number of removed extensions and of distinct removed keys.
+    """
+    parser = parser if parser is not None else LabelParser()
+    bc_parsed = [parser(label) for label in bc_callables]
+    api_parsed = [parser(label) for label in api_callables]
+    counts = dict()
+
+    for category in categories:
+        to_remove, kept = duplicates_of_artifact(bc_parsed, api_parsed, category)
+        counts[category] = (len(api_parsed) - len(kept), len(to_remove))
+        api_callables = [api_callables[i] for i in kept]
+        api_parsed = [api_parsed[i] for i in kept]
+
+    return api_callables, counts
+
+
+def duplicate_names_task(task):
+    """`remove_duplicate_names` on a (bc callables, api callables, categories) tuple, for `map_artifacts`."""
+    bc_callables, api_callables, categories = task
+    return remove_duplicate_names(bc_callables, api_callables, categories)
+
+
+def unique_names(task):
+    """Number of distinct names among the breaking changes and API extensions of one artifact."""
+    bc_callables, api_callables = task
+    return len(set(label.split("//")[1] for label in bc_callables) |
+               set(label.split("//")[1] for label in api_callables))
@@ -0,0 +1,26 @@
+class Major:
+    def __init__(self, groupId, artifactId, majorVersion, violations, numberMethods, callables):
+        self.groupId = groupId
+        self.artifactId = artifactId
+        self.majorVersion = majorVersion
+        self.violations = violations
+        self.numberMethods = numberMethods
+        self.callables = callables
+
+
+class Artifact:
+    def __init__(self, groupId, artifactId, violations, numberMethods, callables):
+        self.groupId = groupId
+        self.artifactId = artifactId
+        self.violations = violations
+        self.numberMethods = numberMethods
+        self.callables = callables
+
+    def get_name(self, index):
+        return self.callables[index].split("/")[1], self.callables[index].split("//")[1]
+
+    def __hash__(self) -> int:
+        return hash(self.groupId + "|" + self.artifactId)
+
+    def __str__(self) -> str:
+        return self.groupId + ":" + self.artifactId
@@ -0,0 +1,134 @@
+"""
+Regression lines for the figures, computed with NumPy instead of `sns.regplot`. The fit itself is the `np.polyfit`
+regplot does, evaluated on the same 100 points between the smallest and the largest x, so the lines are unchanged.
+
+regplot also bootstraps a 95% confidence band with 1000 resamples by default, which for large point sets costs more
+than everything else in a figure. Here the band is opt-in (`--ci` in the scripts). It is vectorised: a resample only
+changes how often every point is counted, so its normal equations are weighted sums of powers of x, and a batch of
+resamples is solved with a few matrix products. Batches have their own seeds derived from one fixed seed, so the
+band is the same whether the batches run in this process or on a process pool.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .parallel import map_artifacts
+
+GRID_POINTS = 100
+BOOTSTRAP_BATCH = 50
+# Resamples x points drawn at once, smaller batches are used for large point sets
+MAX_BATCH_ELEMENTS = 1 << 22
+SEED = 0
+
+_bootstrap = None
+
+
+@dataclass
+class Fit:
+    # The finite points that were fitted
+    xs: np.ndarray
+    ys: np.ndarray
+    coefficients: np.ndarray
+    # The fitted line
+    x: np.ndarray
+    y: np.ndarray
+    # The confidence band, None without bootstrap
+    low: np.ndarray = None
+    high: np.ndarray = None
+    loglog: bool = False
+
+
+def enable_bootstrap(ci=95, samples=1000, workers=1, seed=SEED):
+    """Makes `fit` bootstrap a `ci` percent confidence band unless it is called with an explicit `ci`."""
+    global _bootstrap
+    _bootstrap = {'ci': ci, 'samples': samples, 'workers': workers, 'seed': seed}
+
+
+def disable_bootstrap():
+    global _bootstrap
+    _bootstrap = None
+
+
+def _scale(xs):
+    center = (xs.max() + xs.min()) / 2
+    scale = (xs.max() - xs.min()) / 2
+    return center, scale if scale > 0 else 1.0
+
+
+def _bootstrap_batch(task):
+    """Predictions on the grid of `size` resamples of the points, solved from weighted power sums."""
+    seed, u, ys, order, grid_u, size = task
+    rng = np.random.default_rng(seed)
+    n = len(u)
+    samples = rng.integers(0, n, (size, n))
+    weights = np.bincount((samples + n * np.arange(size)[:, None]).ravel(), minlength=size * n)
+    weights = weights.reshape(size, n).astype(np.float64)
+
+    powers = u[:, None] ** np.arange(2 * order + 1)
+    moments = weights @ powers
+    rhs = weights @ (powers[:, :order + 1] * ys[:, None])
+    indices = np.arange(order + 1)
+    normal = moments[:, indices[:, None] + indices[None, :]]
+    coefficients = np.einsum('bij,bj->bi', np.linalg.pinv(normal), rhs)
+    return coefficients @ (grid_u[:, None] ** indices).T
+
+
+def bootstrap_band(xs, ys, order, grid, ci=95, samples=1000, workers=1, seed=SEED):
+    """Lower and upper `ci` percentile of the fitted line over bootstrap resamples of the points."""
+    center, scale = _scale(xs)
+    u = (xs - center) / scale
+    grid_u = (grid - center) / scale
+    batch = max(1, min(BOOTSTRAP_BATCH, MAX_BATCH_ELEMENTS // len(xs)))
+    seeds = np.random.SeedSequence(seed).spawn((samples + batch - 1) // batch)
+    sizes = [min(batch, samples - i * batch) for i in range(len(seeds))]
+    tasks = [(seed, u, ys, order, grid_u, size) for seed, size in zip(seeds, sizes)]
+    predictions = np.concatenate(map_artifacts(_bootstrap_batch, tasks, workers))
+    low, high = np.nanpercentile(predictions, [50 - ci / 2, 50 + ci / 2], axis=0)
+    return low, high
+
+
+def fit(xs, ys, order=1, loglog=False, points=GRID_POINTS, ci=None, samples=None, workers=None):
+    """
+    Least-squares polynomial of the given order through the points, on a grid of `points` x values. With `loglog`
+    the polynomial is fitted to log10(y) against log10(x) over the positive points, and the line is returned in the
+    original units. A confidence band is bootstrapped if `ci` is given or `enable_bootstrap` was called.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    kept = np.isfinite(xs) & np.isfinite(ys)
+    if loglog:
+        kept &= (xs > 0) & (ys > 0)
+    xs = xs[kept]
+    ys = ys[kept]
+    fit_xs = np.log10(xs) if loglog else xs
+    fit_ys = np.log10(ys) if loglog else ys
+
+    coefficients = np.polyfit(fit_xs, fit_ys, order)
+    grid = np.linspace(fit_xs.min(), fit_xs.max(), points)
+    line = np.polyval(coefficients, grid)
+
+    settings = dict(_bootstrap or {})
+    if ci is not None:
+        settings['ci'] = ci
+    low = high = None
+    if settings.get('ci') is not None:
+        low, high = bootstrap_band(fit_xs, fit_ys, order, grid, settings['ci'],
+                                   samples or settings.get('samples', 1000), workers or settings.get('workers', 1),
+                                   settings.get('seed', SEED))
+    if loglog:
+        grid, line = 10 ** grid, 10 ** line
+        if low is not None:
+            low, high = 10 ** low, 10 ** high
+    return Fit(xs, ys, coefficients, grid, line, low, high, loglog)
+
+
+def add_arguments(parser):
+    parser.add_argument('--ci', type=float, metavar='PERCENT',
+                        help='bootstrap a PERCENT confidence band around the regression lines (regplot drew 95)')
+    parser.add_argument('--ci-samples', type=int, default=1000, help='bootstrap resamples for --ci (default: 1000)')
+
+
+def configure(args, workers=1):
+    """Enables the bootstrap if the arguments added by `add_arguments` ask for it."""
+    if args.ci is not None:
+        enable_bootstrap(args.ci, args.ci_samples, workers)
@@ -0,0 +1,342 @@
+"""
+Aggregate state of the violation statistics that can be updated with a few new majors instead of recomputing
+everything. The state keeps, per side (breaking changes and API extensions), the compressed values of every GA
+(summed violations, maximum number of methods, violated versions) and running counters for all the numbers the
+scripts print about them:
+
+    compress_major_to_package            number of GAs
+    calculate_percentage(_or)            GAs with violations on one or on either side
+    violations.average_breaking_changes  sum of violations / methods over the GAs with violations
+    violations.histogram_summary         counts and sum of the non-zero violation percentages, and the 30 bins of
+                                         the histogram figure (0% to 30%)
+    violations.intersect                 GA keys with violations on each side and on either
+    violations.versions_with_violations  distinct violated versions per GA
+
+`apply_delta` takes majors in the format of the violation files and adds them to their GAs like
+compress_major_to_package does, so a major given twice counts twice, as a repeated line of a violation file does.
+Only the GAs of the delta are looked at: their old contribution is taken off the counters and the new one added.
+The state is a SQLite database holding a row per GA and the counters, so opening it reads the counters only and an
+update reads and writes the rows of the GAs of the delta: it takes time proportional to the delta, not to the whole
+data. Sums of ratios are kept as floats and may differ from a full recompute in the last digits.
+
+    python -m semver_popularity.incremental build breaking_changes.txt api_extensions.txt state.sqlite
+    python -m semver_popularity.incremental apply state.sqlite --breaking-changes new_bc.txt --api-extensions new_ax.txt
+    python -m semver_popularity.incremental show state.sqlite
+"""
+import argparse
+import json
+import math
+import os
+import sqlite3
+from dataclasses import asdict
+
+from . import violations
+from .aggregation import compress_major_to_package
+from .parsing import iter_majors
+
+SIDES = ('breaking_changes', 'api_extensions')
+HISTOGRAM_BINS = 30
+HISTOGRAM_RANGE = 30
+FORMAT_VERSION = 2
+# Integer counters of a side, besides the float sums and the histogram bins
+COUNTERS = ('gas', 'violated', 'violated_keys', 'non_zero', 'at_least_ten', 'less_than_one', 'less_than_fifteen',
+            'at_least_fifty', 'versions')
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value);
+CREATE TABLE IF NOT EXISTS counters (side TEXT PRIMARY KEY, data TEXT);
+CREATE TABLE IF NOT EXISTS gas (side TEXT, groupId TEXT, artifactId TEXT, violations INTEGER, methods INTEGER,
+                                versions TEXT, PRIMARY KEY (side, groupId, artifactId)) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS keys (side TEXT, key TEXT, count INTEGER, PRIMARY KEY (side, key)) WITHOUT ROWID;
+'''
+
+
+def histogram_bin(percentage):
+    """Bin of the histogram figure (30 bins over 0..30, the last one closed) or None outside of it."""
+    if not 0 <= percentage <= HISTOGRAM_RANGE:
+        return None
+    return min(int(percentage * HISTOGRAM_BINS / HISTOGRAM_RANGE), HISTOGRAM_BINS - 1)
+
+
+class SideState:
+    """
+    Counters of one violation file. Its compressed GAs (summed violations, maximum number of methods, violated
+    versions) and the GA keys of violations.intersect are rows of the database, read and written one GA at a time.
+    """
+
+    def __init__(self, connection, side):
+        self.connection = connection
+        self.side = side
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.ratio_sum = 0.0
+        self.percentage_sum = 0.0
+        self.bins = [0] * HISTOGRAM_BINS
+        row = connection.execute('SELECT data FROM counters WHERE side = ?', (side,)).fetchone()
+        if row is not None:
+            for name, value in json.loads(row[0]).items():
+                setattr(self, name, value)
+
+    def compressed(self, ga):
+        """(violations, methods, violated versions) of a GA, None if it has no majors yet."""
+        row = self.connection.execute('SELECT violations, methods, versions FROM gas '
+                                      'WHERE side = ? AND groupId = ? AND artifactId = ?', (self.side, *ga)).fetchone()
+        return None if row is None else (row[0], row[1], frozenset(json.loads(row[2])))
+
+    def key_count(self, key):
+        """Number of GAs with violations whose groupId + artifactId is the key."""
+        row = self.connection.execute('SELECT count FROM keys WHERE side = ? AND key = ?', (self.side, key)).fetchone()
+        return 0 if row is None else row[0]
+
+    def _count_key(self, key, sign):
+        count = self.key_count(key)
+        self.violated_keys += (count + sign > 0) - (count > 0)
+        if count + sign == 0:
+            self.connection.execute('DELETE FROM keys WHERE side = ? AND key = ?', (self.side, key))
+        else:
+            self.connection.execute('INSERT OR REPLACE INTO keys VALUES (?, ?, ?)', (self.side, key, count + sign))
+
+    def _count(self, ga, compressed, sign):
+        """Adds (sign 1) or takes off (sign -1) the contribution of a compressed GA to the counters."""
+        number_violations, number_methods, versions = compressed
+        self.versions += sign * len(versions)
+        percentage = number_violations / number_methods * 100
+        if number_violations > 0:
+            self.violated += sign
+            self.ratio_sum += sign * (number_violations / number_methods)
+            self._count_key(ga[0] + ga[1], sign)
+        if percentage != 0:
+            self.non_zero += sign
+            self.percentage_sum += sign * percentage
+            self.at_least_ten += sign * (percentage >= 10)
+            self.less_than_one += sign * (percentage < 1)
+            self.less_than_fifteen += sign * (percentage < 15)
+            self.at_least_fifty += sign * (percentage >= 50)
+            bin_index = histogram_bin(percentage)
+            if bin_index is not None:
+                self.bins[bin_index] += sign
+
+    def add(self, ga, majors):
+        """
+        Adds majors of one GA, a list of (violations, methods, violated versions), the way compress_major_to_package
+        does: violations are summed, the number of methods is the maximum.
+        """
+        old = self.compressed(ga)
+        if old is None:
+            self.gas += 1
+            old = (0, 0, frozenset())
+        else:
+            self._count(ga, old, -1)
+        new = (old[0] + sum(major[0] for major in majors), max(old[1], *(major[1] for major in majors)),
+               old[2].union(*(major[2] for major in majors)))
+        self.connection.execute('INSERT OR REPLACE INTO gas VALUES (?, ?, ?, ?, ?, ?)',
+                                (self.side, *ga, new[0], new[1], json.dumps(sorted(new[2]))))
+        self._count(ga, new, 1)
+
+    def store(self):
+        data = {name: getattr(self, name) for name in COUNTERS + ('ratio_sum', 'percentage_sum', 'bins')}
+        self.connection.execute('INSERT OR REPLACE INTO counters VALUES (?, ?)', (self.side, json.dumps(data)))
+
+    def statistics(self):
+        return {
+            'gas': self.gas,
+            'with_violations': self.violated,
+            'percentage': self.violated / self.gas * 100 if self.gas > 0 else math.nan,
+            'average_breaking_changes': self.ratio_sum / self.violated if self.violated > 0 else math.nan,
+            'histogram': {
+                'all': self.gas,
+                'non_zero': self.non_zero,
+                'average_non_zero': self.percentage_sum / self.non_zero if self.non_zero > 0 else math.nan,
+                'at_least_ten': self.at_least_ten,
+                'less_than_one': self.less_than_one,
+                'less_than_fifteen': self.less_than_fifteen,
+                'at_least_fifty': self.at_least_fifty,
+            },
+            'histogram_bins': list(self.bins),
+            'versions_with_violations': self.versions,
+        }
+
+
+class AggregateState:
+    """
+    State of both sides in a SQLite database, in memory unless a path is given. Besides the counters of the sides it
+    counts the GAs with violations on either side (calculate_percentage_or) and the GA keys with violations on either
+    side (the union of violations.intersect); whether a GA or key is among them is read from the rows of the sides.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            row = self.connection.execute("SELECT value FROM meta WHERE name = 'version'").fetchone()
+            if row is None:
+                self.connection.execute("INSERT INTO meta VALUES ('version', ?)", (FORMAT_VERSION,))
+            elif row[0] != FORMAT_VERSION:
+                self.connection.close()
+                raise ValueError('%s has state format %s, expected %s' % (path, row[0], FORMAT_VERSION))
+        self.sides = {side: SideState(self.connection, side) for side in SIDES}
+        row = self.connection.execute("SELECT data FROM counters WHERE side = 'either'").fetchone()
+        self.either, self.either_keys = json.loads(row[0]) if row is not None else (0, 0)
+
+    @classmethod
+    def build(cls, breaking_changes, api_extensions, path=':memory:'):
+        state = cls(path)
+        state.apply_delta(breaking_changes, api_extensions)
+        return state
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return cls(path)
+
+    def close(self):
+        self.connection.close()
+
+    def _violated(self, ga):
+        return any((side.compressed(ga) or (0,))[0] > 0 for side in self.sides.values())
+
+    def _key_violated(self, key):
+        return any(side.key_count(key) > 0 for side in self.sides.values())
+
+    def apply_delta(self, breaking_changes=None, api_extensions=None):
+        """
+        Adds the majors of the violation files (or iterables of `Major`) given for either side and commits the
+        database. Returns the number of GAs that were updated per side.
+        """
+        per_side = dict()
+        for side, majors in zip(SIDES, (breaking_changes, api_extensions)):
+            if majors is None:
+                continue
+            if isinstance(majors, (str, os.PathLike)):
+                majors = iter_majors(majors)
+            per_ga = dict()
+            for major in majors:
+                per_ga.setdefault((major.groupId, major.artifactId), list()).append(
+                    (major.violations, major.numberMethods, violations.violated_versions(major.callables)))
+            per_side[side] = per_ga
+        gas = set().union(*per_side.values())
+        keys = {ga[0] + ga[1] for ga in gas}
+
+        with self.connection:
+            violated_before = {ga: self._violated(ga) for ga in gas}
+            keys_before = {key: self._key_violated(key) for key in keys}
+            for side, per_ga in per_side.items():
+                for ga, ga_majors in per_ga.items():
+                    self.sides[side].add(ga, ga_majors)
+                self.sides[side].store()
+            self.either += sum(self._violated(ga) - before for ga, before in violated_before.items())
+            self.either_keys += sum(self._key_violated(key) - before for key, before in keys_before.items())
+            self.connection.execute("INSERT OR REPLACE INTO counters VALUES ('either', ?)",
+                                    (json.dumps([self.either, self.either_keys]),))
+        return {side: len(per_ga) for side, per_ga in per_side.items()}
+
+    def statistics(self):
+        statistics = {side: self.sides[side].statistics() for side in SIDES}
+        gas = self.sides['breaking_changes'].gas
+        statistics['percentage_or'] = [self.either, self.either / gas * 100 if gas > 0 else math.nan]
+        statistics['intersect'] = {'removals': self.sides['breaking_changes'].violated_keys,
+                                   'additions': self.sides['api_extensions'].violated_keys,
+                                   'union': self.either_keys}
+        return statistics
+
+    def save(self, path):
+        """Copies the database to a file, e.g. a state built in memory."""
+        target = sqlite3.connect(path)
+        try:
+            self.connection.backup(target)
+        finally:
+            target.close()
+
+
+def recompute(breaking_changes, api_extensions):
+    """`AggregateState.statistics` computed from scratch with the functions the scripts use, from all majors."""
+    compressed = {side: compress_major_to_package(list(iter_majors(path)) if isinstance(path, (str, os.PathLike))
+                                                  else list(path))
+                  for side, path in zip(SIDES, (breaking_changes, api_extensions))}
+    statistics = dict()
+    for side, artifacts in compressed.items():
+        with_violations, percentage = violations.calculate_percentage(artifacts)
+        percentages = violations.violation_percentages(artifacts)
+        non_zero = percentages[percentages != 0]
+        bins = [0] * HISTOGRAM_BINS
+        for non_zero_percentage in non_zero.tolist():
+            bin_index = histogram_bin(non_zero_percentage)
+            if bin_index is not None:
+                bins[bin_index] += 1
+        statistics[side] = {
+            'gas': len(artifacts),
+            'with_violations': with_violations,
+            'percentage': percentage,
+            'average_breaking_changes': violations.average_breaking_changes(artifacts) if with_violations else math.nan,
+            'histogram': asdict(violations.histogram_summary(percentages)),
+            'histogram_bins': bins,
+            'versions_with_violations': violations.versions_with_violations(artifacts),
+        }
+    statistics['percentage_or'] = list(violations.calculate_percentage_or(compressed['breaking_changes'],
+                                                                          compressed['api_extensions']))
+    statistics['intersect'] = asdict(violations.intersect(compressed['breaking_changes'], compressed['api_extensions']))
+    return statistics
+
+
+def differences(statistics, expected, relative_tolerance=1e-9, path=''):
+    """Paths of the values that differ between two statistics, floats compared with a relative tolerance."""
+    if isinstance(expected, dict):
+        return [difference for key in expected
+                for difference in differences(statistics.get(key), expected[key], relative_tolerance,
+                                              path + '/' + key)]
+    if isinstance(expected, list):
+        if not isinstance(statistics, list) or len(statistics) != len(expected):
+            return [path]
+        return [difference for i, (value, other) in enumerate(zip(statistics, expected))
+                for difference in differences(value, other, relative_tolerance, '%s/%d' % (path, i))]
+    if isinstance(expected, float) or isinstance(statistics, float):
+        if statistics is None:
+            return [path]
+        if math.isnan(expected) and math.isnan(statistics):
+            return []
+        return [] if math.isclose(statistics, expected, rel_tol=relative_tolerance) else [path]
+    return [] if statistics == expected else [path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Incrementally updated violation statistics.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help='build the state from full violation files')
+    build.add_argument('breaking_changes')
+    build.add_argument('api_extensions')
+    build.add_argument('state')
+    build.add_argument('--force', action='store_true', help='replace the state file if it exists')
+    apply = commands.add_parser('apply', help='apply delta files of new majors to a saved state')
+    apply.add_argument('state')
+    apply.add_argument('--breaking-changes', help='new breaking changes majors')
+    apply.add_argument('--api-extensions', help='new API extension majors')
+    apply.add_argument('--verify', nargs=2, metavar=('BREAKING_CHANGES', 'API_EXTENSIONS'),
+                       help='compare the result with a full recompute over these files')
+    show = commands.add_parser('show', help='print the statistics of a saved state')
+    show.add_argument('state')
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        if os.path.exists(args.state):
+            if not args.force:
+                parser.error('%s exists, give --force to replace it' % args.state)
+            os.remove(args.state)
+        state = AggregateState.build(args.breaking_changes, args.api_extensions, args.state)
+    elif args.command == 'apply':
+        state = AggregateState.load(args.state)
+        touched = state.apply_delta(args.breaking_changes, args.api_extensions)
+        print('updated GAs:', touched)
+    else:
+        state = AggregateState.load(args.state)
+    print(json.dumps(state.statistics(), indent=2))
+
+    if args.command == 'apply' and args.verify:
+        different = differences(state.statistics(), recompute(*args.verify))
+        print('matches a full recompute' if not different else 'differs from a full recompute in: ' +
+              ', '.join(different))
+        if different:
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Concurrent reading of the many small input files (.bin files of the popularity tree, dependents.txt files). On
+networked storage reading them one after the other is dominated by the latency of every open and read, so they are
+read by a bounded pool of threads instead. Results are always handed back in the order of the paths, whatever order
+the reads finish in, so callers that merge them ("the last file wins") get the same result as a serial run.
+
+The number of threads is 1 (serial) unless `set_threads` is called, or `--io-threads` is given to a script. The time
+every file took is recorded per kind of file and printed as a table at exit with `--io-stats`.
+"""
+import atexit
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Reads in flight per thread, bounds the memory of results that are read ahead of the one being consumed
+READ_AHEAD = 2
+
+_threads = 1
+latencies = dict()
+missing = dict()
+
+
+def threads():
+    return _threads
+
+
+def set_threads(number):
+    global _threads
+    _threads = max(1, number)
+
+
+def _timed(read, path):
+    start = time.perf_counter()
+    try:
+        return read(path), time.perf_counter() - start, False
+    except FileNotFoundError:
+        return None, time.perf_counter() - start, True
+
+
+def iter_files(read, paths, name='files', threads=None):
+    """
+    Yields read(path) for every path in order, None for the paths that do not exist. With more than one thread the
+    next files are read while the current one is consumed, at most READ_AHEAD per thread ahead.
+    """
+    threads = _threads if threads is None else max(1, threads)
+    file_latencies = latencies.setdefault(name, list())
+    missing.setdefault(name, 0)
+
+    def record(result):
+        value, seconds, not_found = result
+        file_latencies.append(seconds)
+        missing[name] += not_found
+        return value
+
+    if threads == 1:
+        for path in paths:
+            yield record(_timed(read, path))
+        return
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = deque()
+        for path in paths:
+            pending.append(pool.submit(_timed, read, path))
+            if len(pending) >= threads * READ_AHEAD:
+                yield record(pending.popleft().result())
+        while pending:
+            yield record(pending.popleft().result())
+
+
+def read_files(read, paths, name='files', threads=None):
+    """[read(path) for path in paths], None for the paths that do not exist, read by `threads` threads."""
+    return list(iter_files(read, paths, name, threads))
+
+
+def latency_summary():
+    """Number of files, missing files and latency statistics in seconds per kind of file."""
+    summary = dict()
+    for name, seconds in latencies.items():
+        if len(seconds) == 0:
+            continue
+        seconds = np.array(seconds)
+        p50, p90, p99 = np.percentile(seconds, [50, 90, 99])
+        summary[name] = {'files': len(seconds), 'missing': missing[name], 'total_seconds': seconds.sum(),
+                         'mean_seconds': seconds.mean(), 'p50_seconds': p50, 'p90_seconds': p90,
+                         'p99_seconds': p99, 'max_seconds': seconds.max()}
+    return summary
+
+
+def print_latency_summary(file=sys.stderr):
+    print('%-24s %7s %7s %10s %9s %9s %9s %9s %9s' % ('files (%d threads)' % _threads, 'files', 'missing',
+                                                      'total (s)', 'mean (ms)', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)',
+                                                      'max (ms)'), file=file)
+    for name, total in latency_summary().items():
+        print('%-24s %7d %7d %10.3f %9.3f %9.3f %9.3f %9.3f %9.3f' % (
+            name, total['files'], total['missing'], total['total_seconds'], total['mean_seconds'] * 1000,
+            total['p50_seconds'] * 1000, total['p90_seconds'] * 1000, total['p99_seconds'] * 1000,
+            total['max_seconds'] * 1000), file=file)
+
+
+def add_arguments(parser):
+    parser.add_argument('--io-threads', type=int, default=1,
+                        help='threads reading the input files concurrently (default: 1, one after the other)')
+    parser.add_argument('--io-stats', action='store_true',
+                        help='print how long reading every kind of input file took to stderr at exit')
+
+
+def configure(args):
+    """Applies the arguments added by `add_arguments`."""
+    set_threads(args.io_threads)
+    if args.io_stats:
+        atexit.register(print_latency_summary)
@@ -0,0 +1,223 @@
+"""
+Timing and memory of the stages of a run. A stage is a function decorated with `@instrument()` or a block in
+`with stage(name) as current:`. For every stage this records the wall and CPU time, the peak RSS of the process, the
+peak of traced Python allocations (only with `enable(trace_memory=True)`, tracemalloc slows everything down) and the
+number of records that went in and came out.
+
+Instrumentation is off by default. When it is off, a decorated function costs one extra call and a flag check,
+and `stage()` returns a shared object that does nothing. A run started with `--profile` calls `enable()`, every
+stage is then written as one JSON line to the output (if any) and a table per stage name is printed at exit.
+"""
+import atexit
+import functools
+import json
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+_enabled = False
+_trace_memory = False
+_output = None
+_stack = list()
+records = list()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(output=None, trace_memory=False):
+    """Starts recording stages, writing them as JSON lines to the `output` path if given."""
+    global _enabled, _trace_memory, _output
+    _enabled = True
+    _trace_memory = trace_memory
+    _output = open(output, 'a') if output is not None else None
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    global _enabled, _output
+    _enabled = False
+    if _output is not None:
+        _output.close()
+        _output = None
+
+
+def count(value):
+    """Number of records in a value: its length if it has one, None otherwise."""
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+def count_first(*args, **kwargs):
+    """`count` of the first argument of a call, whether it was passed by position or by keyword."""
+    if args:
+        return count(args[0])
+    return count(next(iter(kwargs.values()), None))
+
+
+def _measure(measure, *args, **kwargs):
+    """What a records_in or records_out function says, None if it cannot tell: measuring never fails a call."""
+    try:
+        return measure(*args, **kwargs)
+    except Exception:
+        return None
+
+
+def max_rss_bytes():
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return max_rss if sys.platform == 'darwin' else max_rss * 1024
+
+
+class Stage:
+    def __init__(self, name, records_in=None):
+        self.name = name
+        self.records_in = records_in
+        self.records_out = None
+        self.traced_peak = 0
+
+    def __enter__(self):
+        self.parent = _stack[-1].name if _stack else None
+        if _trace_memory:
+            # The peak so far belongs to the enclosing stage, a new one starts here
+            if _stack:
+                _stack[-1].traced_peak = max(_stack[-1].traced_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        _stack.append(self)
+        self.rss_start = max_rss_bytes()
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        _stack.pop()
+        record = {
+            'stage': self.name,
+            'parent': self.parent,
+            'wall_seconds': wall,
+            'cpu_seconds': cpu,
+            'max_rss_bytes': max_rss_bytes(),
+            'records_in': self.records_in,
+            'records_out': self.records_out,
+        }
+        if record['max_rss_bytes'] is not None:
+            record['rss_growth_bytes'] = record['max_rss_bytes'] - self.rss_start
+        if _trace_memory:
+            self.traced_peak = max(self.traced_peak, tracemalloc.get_traced_memory()[1])
+            record['traced_peak_bytes'] = self.traced_peak
+            if _stack:
+                _stack[-1].traced_peak = max(_stack[-1].traced_peak, self.traced_peak)
+        if exc_type is not None:
+            record['error'] = exc_type.__name__
+        records.append(record)
+        if _output is not None:
+            _output.write(json.dumps(record) + '\n')
+            _output.flush()
+        return False
+
+
+class _NullStage:
+    records_in = None
+    records_out = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name, records_in=None):
+    """Context manager measuring the block as stage `name`. Set `records_out` on what it returns."""
+    if not _enabled:
+        return _NULL_STAGE
+    return Stage(name, records_in)
+
+
+def instrument(name=None, records_in=None, records_out=count):
+    """
+    Decorator measuring every call of the function as a stage, named after the function by default. `records_in`
+    is given the arguments of the call and `records_out` the result, both return a number of records or None; if
+    one of them raises, the stage records None instead.
+    """
+    def decorator(function):
+        stage_name = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            measured_in = _measure(records_in, *args, **kwargs) if records_in is not None else None
+            with Stage(stage_name, measured_in) as current:
+                result = function(*args, **kwargs)
+                if records_out is not None:
+                    current.records_out = _measure(records_out, result)
+                return result
+        return wrapper
+    return decorator
+
+
+def summary():
+    """Calls, times, memory and records of every stage name, in the order the stages first finished."""
+    stages = dict()
+    for record in records:
+        total = stages.setdefault(record['stage'], {
+            'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'max_rss_bytes': None, 'traced_peak_bytes': None,
+            'records_in': None, 'records_out': None,
+        })
+        total['calls'] += 1
+        total['wall_seconds'] += record['wall_seconds']
+        total['cpu_seconds'] += record['cpu_seconds']
+        for key in 'max_rss_bytes', 'traced_peak_bytes':
+            if record.get(key) is not None:
+                total[key] = max(total[key] or 0, record[key])
+        for key in 'records_in', 'records_out':
+            if record[key] is not None:
+                total[key] = (total[key] or 0) + record[key]
+    return stages
+
+
+def print_summary(file=sys.stderr):
+    def number(value, scale=1):
+        return '-' if value is None else '%d' % (value / scale)
+
+    print('%-32s %6s %10s %10s %10s %10s %12s %12s' % ('stage', 'calls', 'wall (s)', 'cpu (s)', 'rss (MB)',
+                                                         'traced (MB)', 'records in', 'records out'), file=file)
+    for name, total in summary().items():
+        print('%-32s %6d %10.3f %10.3f %10s %10s %12s %12s' % (
+            name, total['calls'], total['wall_seconds'], total['cpu_seconds'],
+            number(total['max_rss_bytes'], 1024 ** 2), number(total['traced_peak_bytes'], 1024 ** 2),
+            number(total['records_in']), number(total['records_out'])), file=file)
+
+
+def add_arguments(parser):
+    parser.add_argument('--profile', action='store_true',
+                        help='time every stage and print a summary table to stderr at exit')
+    parser.add_argument('--profile-output', metavar='FILE', help='also append every stage as a JSON line to FILE '
+                                                                 '(implies --profile)')
+    parser.add_argument('--profile-memory', action='store_true',
+                        help='also trace the peak of Python allocations per stage (slow, implies --profile)')
+
+
+def configure(args):
+    """Enables instrumentation if the arguments added by `add_arguments` ask for it."""
+    if args.profile or args.profile_output or args.profile_memory:
+        enable(args.profile_output, args.profile_memory)
+        atexit.register(print_summary)
+        atexit.register(disable)
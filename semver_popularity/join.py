@@ -0,0 +1,104 @@
+"""
+Join of popularity values with the callables involved in breaking changes, on integer callable ids.
+
+The popularity side is a pair of (ids, values) arrays as read from the .bin files, 'na' being NaN. The breaking
+change side keeps its multiplicity: a callable that is part of several breaking changes is counted once for each,
+as calculate_popularity always did.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import count_first, instrument
+
+
+@dataclass
+class PopularityJoin:
+    # Values of the callables involved in a breaking change (with multiplicity) and of the other known callables
+    bc: np.ndarray
+    no_bc: np.ndarray
+    # Callables whose value is 'na'
+    bc_na: int
+    no_bc_na: int
+    # Breaking change callables without any popularity value
+    bc_missing: int
+
+    @property
+    def bc_non_zero(self):
+        return self.bc[self.bc > 0.0]
+
+    @property
+    def no_bc_non_zero(self):
+        return self.no_bc[self.no_bc > 0.0]
+
+    @property
+    def bc_zeros(self):
+        return len(self.bc) - len(self.bc_non_zero)
+
+    @property
+    def no_bc_zeros(self):
+        return len(self.no_bc) - len(self.no_bc_non_zero)
+
+
+def callable_ids_of(versions):
+    """Ids of all callables of the artifacts, in order and with repetitions, skipping labels without an id."""
+    ids = list()
+    for version in versions:
+        for callable_label in version.callables:
+            callable_id = callable_label.split('/')[0]
+            if callable_id.lstrip('-').isdigit():
+                ids.append(int(callable_id))
+    return np.array(ids, dtype=np.int64)
+
+
+def deduplicate(ids, values):
+    """
+    Keeps one value per id like filling a dict would: the last value read wins and ids stay in the order they were
+    first seen.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    unique_ids, first = np.unique(ids, return_index=True)
+    _, last_reversed = np.unique(ids[::-1], return_index=True)
+    last = len(ids) - 1 - last_reversed
+    order = np.argsort(first, kind='stable')
+    return unique_ids[order], values[last[order]]
+
+
+@instrument(records_in=count_first, records_out=lambda joined: len(joined.bc) + len(joined.no_bc))
+def join_popularity(ids, values, bc_ids, callable_ids=None):
+    """
+    `ids` must be unique (see `deduplicate`). If `callable_ids` is given, only those callables count on the
+    non-breaking-change side.
+    """
+    ids = np.asarray(ids, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    bc_ids = np.asarray(bc_ids, dtype=np.int64)
+
+    order = np.argsort(ids, kind='stable')
+    sorted_ids = ids[order]
+    positions = np.searchsorted(sorted_ids, bc_ids)
+    found = positions < len(sorted_ids)
+    found[found] = sorted_ids[positions[found]] == bc_ids[found]
+    bc_values = values[order[positions[found]]]
+    bc_defined = ~np.isnan(bc_values)
+
+    no_bc = ~np.isin(ids, bc_ids)
+    if callable_ids is not None:
+        no_bc &= np.isin(ids, np.asarray(callable_ids, dtype=np.int64))
+    no_bc_values = values[no_bc]
+    no_bc_defined = ~np.isnan(no_bc_values)
+
+    return PopularityJoin(
+        bc=bc_values[bc_defined],
+        no_bc=no_bc_values[no_bc_defined],
+        bc_na=int(np.count_nonzero(~bc_defined)),
+        no_bc_na=int(np.count_nonzero(~no_bc_defined)),
+        bc_missing=int(np.count_nonzero(~found)),
+    )
+
+
+def join_metrics(popularities, bc_ids, callable_ids=None):
+    """`join_popularity` for every metric of a {metric: (ids, values)} dict."""
+    return {metric: join_popularity(ids, values, bc_ids, callable_ids)
+            for metric, (ids, values) in popularities.items()}
@@ -0,0 +1,126 @@
+"""
+Reader for the violation files written by the Java phase (breaking_changes.txt, api_extensions.txt, ...).
+The first line of such a file describes the format, every other line looks like:
+
+    groupId:artifactId:majorVersion:#violations/#totalMethods:[callable, callable, ...]
+
+Each line is split once and turned into a record straight away, so only one line is ever held in memory.
+`iter_majors` yields `Major` objects for the existing scripts, `read_table` packs the same records into a
+`MajorTable` whose callables live in a single byte buffer instead of one Python string each.
+"""
+import array
+
+import numpy as np
+
+from .entities import Major
+
+CALLABLE_SEPARATOR = ', '
+
+
+def parse_line(line, separator=CALLABLE_SEPARATOR):
+    groupId, artifactId, majorVersion, counts, callables = line.rstrip('\n').split(':', 4)
+    violations, numberMethods = counts.split('/')
+    callables = callables.strip()[1:-1]
+    if callables.strip() == '':
+        callables = list()
+    else:
+        callables = [x.strip() for x in callables.split(separator)]
+    return groupId, artifactId, int(majorVersion), int(violations), int(numberMethods), callables
+
+
+def iter_records(path, separator=CALLABLE_SEPARATOR):
+    """
+    Yields one (groupId, artifactId, majorVersion, violations, numberMethods, callables) tuple per line of the
+    file, skipping the description line, empty lines and lines commented out with '#'.
+    """
+    with open(path, 'r') as file:
+        file.readline()
+        for line in file:
+            if line[0] == '#' or line.strip() == '':
+                continue
+            yield parse_line(line, separator)
+
+
+def iter_majors(path, separator=CALLABLE_SEPARATOR):
+    for record in iter_records(path, separator):
+        yield Major(*record)
+
+
+class MajorTable:
+    """
+    Column-wise form of a violation file. Row i is the major version `major_versions[i]` of the GA
+    `gas[ga_index[i]]`. Its callables are the entries `callable_rows[i]` up to `callable_rows[i + 1]` of the flat
+    callable list, and callable j is stored in `buffer[callable_offsets[j]:callable_offsets[j + 1]]`.
+    """
+
+    def __init__(self, gas, ga_index, major_versions, violations, number_methods, callable_rows, callable_offsets,
+                 buffer):
+        self.gas = gas
+        self.ga_index = ga_index
+        self.major_versions = major_versions
+        self.violations = violations
+        self.number_methods = number_methods
+        self.callable_rows = callable_rows
+        self.callable_offsets = callable_offsets
+        self.buffer = buffer
+
+    def __len__(self):
+        return len(self.ga_index)
+
+    @property
+    def number_of_callables(self):
+        return len(self.callable_offsets) - 1
+
+    def group_id(self, row):
+        return self.gas[self.ga_index[row]][0]
+
+    def artifact_id(self, row):
+        return self.gas[self.ga_index[row]][1]
+
+    def callable(self, index):
+        return self.buffer[self.callable_offsets[index]:self.callable_offsets[index + 1]].decode()
+
+    def callables(self, row):
+        return [self.callable(i) for i in range(self.callable_rows[row], self.callable_rows[row + 1])]
+
+    def major(self, row):
+        groupId, artifactId = self.gas[self.ga_index[row]]
+        return Major(groupId, artifactId, int(self.major_versions[row]), int(self.violations[row]),
+                     int(self.number_methods[row]), self.callables(row))
+
+    def majors(self):
+        for row in range(len(self)):
+            yield self.major(row)
+
+
+def read_table(path, separator=CALLABLE_SEPARATOR):
+    gas = list()
+    ga_codes = dict()
+    ga_index = array.array('i')
+    major_versions = array.array('i')
+    violations = array.array('q')
+    number_methods = array.array('q')
+    callable_rows = array.array('q', [0])
+    callable_offsets = array.array('q', [0])
+    buffer = bytearray()
+
+    for groupId, artifactId, majorVersion, violation_count, method_count, callables in iter_records(path, separator):
+        key = (groupId, artifactId)
+        if key not in ga_codes:
+            ga_codes[key] = len(gas)
+            gas.append(key)
+        ga_index.append(ga_codes[key])
+        major_versions.append(majorVersion)
+        violations.append(violation_count)
+        number_methods.append(method_count)
+        for callable_label in callables:
+            buffer += callable_label.encode()
+            callable_offsets.append(len(buffer))
+        callable_rows.append(len(callable_offsets) - 1)
+
+    return MajorTable(gas, _to_numpy(ga_index), _to_numpy(major_versions), _to_numpy(violations),
+                      _to_numpy(number_methods), _to_numpy(callable_rows), _to_numpy(callable_offsets), bytes(buffer))
+
+
+def _to_numpy(values):
+    return np.frombuffer(values, dtype=values.typecode) if len(values) > 0 else np.zeros(0, dtype=values.typecode)
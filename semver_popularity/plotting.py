@@ -0,0 +1,63 @@
+"""
+Lazy matplotlib and seaborn. Importing them (and calling `sns.set_theme()`) is most of the start-up time of a script,
+so the scripts use the `plt` and `sns` stand-ins below, which import the real module on first use. A run started
+with `--no-plots` calls `disable()`, after which the scripts skip their plotting code and the modules are never
+imported at all.
+"""
+import importlib
+
+_enabled = True
+
+
+def enabled():
+    return _enabled
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+class LazyModule:
+    def __init__(self, name, on_import=None):
+        self._name = name
+        self._on_import = on_import
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_import is not None:
+                self._on_import(module)
+            self._module = module
+        return getattr(self._module, attribute)
+
+
+sns = LazyModule('seaborn', on_import=lambda seaborn: seaborn.set_theme())
+# Plain matplotlib figures get the seaborn theme too, as they did when every script called sns.set_theme() on import
+plt = LazyModule('matplotlib.pyplot', on_import=lambda pyplot: sns.set_theme())
+
+
+def draw_fit(curve, ax=None, scatter=True, color=None, scatter_kws=None, line_kws=None):
+    """
+    Draws a `fitting.Fit` like `sns.regplot` draws its fit: the points and the line in `color`, by default the next
+    color of the cycle, unless their keyword arguments give one, and the confidence band in the color of the line if
+    one was bootstrapped. Returns the axes.
+    """
+    ax = ax if ax is not None else plt.gca()
+    scatter_kws = dict(scatter_kws or {})
+    line_kws = dict(line_kws or {})
+    if color is None:
+        # As sns.regplot does, an empty line takes the next color of the cycle and is removed again
+        empty, = ax.plot([], [])
+        color = empty.get_color()
+        empty.remove()
+    if scatter:
+        scatter_kws.setdefault('color', color)
+        scatter_kws.setdefault('alpha', .8)
+        ax.scatter(curve.xs, curve.ys, **scatter_kws)
+    line_kws.setdefault('color', color)
+    line, = ax.plot(curve.x, curve.y, **line_kws)
+    if curve.low is not None:
+        ax.fill_between(curve.x, curve.low, curve.high, facecolor=line.get_color(), alpha=.15)
+    return ax
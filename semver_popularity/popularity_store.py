@@ -0,0 +1,217 @@
+"""
+Single-file binary store for the popularity tree (`<GA>$<version>/<metric>.bin` directories).
+
+The store keeps, per metric, the rows of every package next to each other in file order (so quintile analyses still
+see the values sorted by popularity), plus a copy of the callable ids sorted per metric for lookups. All arrays are
+memory-mapped on open, nothing is parsed at analysis time. The header records a stamp of the .bin files of every
+metric (their names, sizes and modification times), so users can tell whether the store is still that of the tree.
+
+Build it once with:
+
+    python -m semver_popularity.popularity_store resources/popularity_of_methods resources/popularity.store
+"""
+import argparse
+import hashlib
+import json
+import os
+import warnings
+
+import numpy as np
+
+from .binfiles import read_bin
+
+METRICS = ('dependent-percentage', 'public-dependent-percentage', 'eigenvector', 'degree')
+MAGIC = b'SVPSTORE'
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+
+
+def source_stamp(popularity_dir, metric):
+    """
+    Digest of the name, size and modification time of every `<package>/<metric>.bin` of a popularity directory, None
+    if there is none: a metric without files is never stamped, so files added later are not taken for current.
+    """
+    digest = hashlib.sha256()
+    found = False
+    for package in sorted(os.listdir(popularity_dir)):
+        try:
+            stat = os.stat(os.path.join(popularity_dir, package, metric + '.bin'))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        found = True
+        digest.update(('%s\0%d\0%d\n' % (package, stat.st_size, stat.st_mtime_ns)).encode())
+    return digest.hexdigest() if found else None
+
+
+def build_store(popularity_dir, store_path, metrics=METRICS):
+    # Taken before reading, so a file changed while building makes the store stale rather than wrongly current
+    source_stamps = {metric: source_stamp(popularity_dir, metric) for metric in metrics}
+    source_stamps = {metric: stamp for metric, stamp in source_stamps.items() if stamp is not None}
+    packages = sorted(name for name in os.listdir(popularity_dir)
+                      if os.path.isdir(os.path.join(popularity_dir, name)))
+    ids = list()
+    values = list()
+    segments = dict()
+    metric_ranges = dict()
+    rows = 0
+
+    for metric in metrics:
+        metric_start = rows
+        segments[metric] = list()
+        for package_index, package in enumerate(packages):
+            path = os.path.join(popularity_dir, package, metric + '.bin')
+            if not os.path.exists(path):
+                continue
+            package_ids, package_values = read_bin(path)
+            segments[metric].append([package_index, rows, rows + len(package_ids)])
+            ids.append(package_ids)
+            values.append(package_values)
+            rows += len(package_ids)
+        metric_ranges[metric] = [metric_start, rows]
+
+    ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int64)
+    values = np.concatenate(values) if values else np.zeros(0, dtype=np.float64)
+    order = np.zeros(rows, dtype=np.int64)
+    for start, stop in metric_ranges.values():
+        order[start:stop] = start + np.argsort(ids[start:stop], kind='stable')
+    sorted_ids = ids[order]
+
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'rows': rows,
+        'metrics': list(metrics),
+        'packages': packages,
+        'segments': segments,
+        'metric_ranges': metric_ranges,
+        'source_stamps': source_stamps,
+    }).encode()
+    data_offset = _align(len(MAGIC) + 8 + len(header))
+
+    temporary_path = str(store_path) + '.tmp'
+    with open(temporary_path, 'wb') as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, 'little'))
+        file.write(header)
+        file.write(b'\0' * (data_offset - file.tell()))
+        for array in (ids, values, order, sorted_ids):
+            file.write(array.astype(array.dtype.newbyteorder('<'), copy=False).tobytes())
+    os.replace(temporary_path, store_path)
+    return PopularityStore.open(store_path)
+
+
+class PopularityStore:
+    def __init__(self, path, header, ids, values, order, sorted_ids):
+        self.path = path
+        self.metrics = header['metrics']
+        self.packages = header['packages']
+        self.package_indices = {package: i for i, package in enumerate(self.packages)}
+        self.segments = {metric: {package_index: (start, stop) for package_index, start, stop in segments}
+                         for metric, segments in header['segments'].items()}
+        self.metric_ranges = {metric: tuple(bounds) for metric, bounds in header['metric_ranges'].items()}
+        # Stores built before the stamps were recorded have none and are never current
+        self.source_stamps = header.get('source_stamps', dict())
+        self.ids = ids
+        self.values = values
+        self.order = order
+        self.sorted_ids = sorted_ids
+
+    @classmethod
+    def open(cls, path):
+        with open(path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError('%s is not a popularity store' % path)
+            header_length = int.from_bytes(file.read(8), 'little')
+            header = json.loads(file.read(header_length))
+        if header['version'] != FORMAT_VERSION:
+            raise ValueError('%s has store format %s, expected %s' % (path, header['version'], FORMAT_VERSION))
+
+        rows = header['rows']
+        offset = _align(len(MAGIC) + 8 + header_length)
+        arrays = list()
+        for dtype in ('<i8', '<f8', '<i8', '<i8'):
+            if rows == 0:
+                arrays.append(np.zeros(0, dtype=dtype))
+            else:
+                arrays.append(np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(rows,)))
+            offset += rows * 8
+        return cls(path, header, *arrays)
+
+    def is_current(self, popularity_dir, metric):
+        """Whether the store holds the metric as the .bin files of the directory are now."""
+        stamp = self.source_stamps.get(metric)
+        return stamp is not None and stamp == source_stamp(popularity_dir, metric)
+
+    def _metric_range(self, metric):
+        if metric not in self.metric_ranges:
+            raise KeyError('metric %s is not in the store %s' % (metric, self.path))
+        return self.metric_ranges[metric]
+
+    def packages_with(self, metric):
+        self._metric_range(metric)
+        return [self.packages[i] for i in self.segments[metric]]
+
+    def package(self, metric, package):
+        """Returns the (ids, values) of one package in file order, or two empty arrays if it has no such file."""
+        self._metric_range(metric)
+        bounds = self.segments[metric].get(self.package_indices.get(package))
+        if bounds is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        start, stop = bounds
+        return self.ids[start:stop], self.values[start:stop]
+
+    def iter_packages(self, metric):
+        for package in self.packages_with(metric):
+            yield package, self.package(metric, package)
+
+    def lookup(self, metric, callable_ids):
+        """
+        Returns the values of the given callable ids and a mask telling which ids are in the store; unknown ids get
+        NaN, just like ids whose value is 'na'. If an id appears in several packages the last package wins.
+        """
+        start, stop = self._metric_range(metric)
+        callable_ids = np.asarray(callable_ids, dtype=np.int64)
+        keys = self.sorted_ids[start:stop]
+        positions = np.searchsorted(keys, callable_ids, side='right') - 1
+        found = positions >= 0
+        found[found] = keys[positions[found]] == callable_ids[found]
+        result = np.full(len(callable_ids), np.nan)
+        result[found] = self.values[self.order[start + positions[found]]]
+        return result, found
+
+
+def open_current(store_path, popularity_dir, metric):
+    """
+    The store at `store_path` if it has been built and holds the metric as the .bin files of the directory are now,
+    else None, warning if it exists but is stale. Without the directory there is nothing to compare with and the
+    store stands in for it.
+    """
+    if not os.path.exists(store_path):
+        return None
+    store = PopularityStore.open(store_path)
+    if metric in store.metrics and (not os.path.isdir(popularity_dir) or store.is_current(popularity_dir, metric)):
+        return store
+    warnings.warn('%s does not match the %s files of %s, reading the files instead. Rebuild it with '
+                  '`python -m semver_popularity.popularity_store %s %s`' % (store_path, metric, popularity_dir,
+                                                                              popularity_dir, store_path))
+    return None
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compacts a popularity directory into a single store file.')
+    parser.add_argument('popularity_dir')
+    parser.add_argument('store')
+    parser.add_argument('--metrics', nargs='+', default=list(METRICS))
+    args = parser.parse_args()
+
+    store = build_store(args.popularity_dir, args.store, args.metrics)
+    for metric in store.metrics:
+        start, stop = store.metric_ranges[metric]
+        print('%s: %s packages, %s callables' % (metric, len(store.packages_with(metric)), stop - start))
+
+
+if __name__ == '__main__':
+    main()
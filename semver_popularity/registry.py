@@ -0,0 +1,91 @@
+"""
+GA-keyed registry of the breaking changes and API extensions of every artifact. Every 'groupId|artifactId' gets an
+integer id in the order it is first added, and both sides are stored per id, so the two sides of an artifact are
+paired by its GA rather than by their positions in two lists.
+
+A GA missing on one side gets a placeholder `Artifact` without violations there. Placeholders are created per side,
+so changing the API extensions of an artifact (as the duplicate name removal does) never changes its breaking
+changes.
+"""
+from .entities import Artifact
+
+# Number of methods of a placeholder for a GA that is not on either side, as analysis.py always used
+PLACEHOLDER_METHODS = 1
+
+
+def ga_key(groupId, artifactId):
+    return groupId + '|' + artifactId
+
+
+def placeholder(groupId, artifactId, numberMethods=PLACEHOLDER_METHODS):
+    return Artifact(groupId, artifactId, 0, numberMethods, list())
+
+
+class ArtifactRegistry:
+    def __init__(self, breaking_changes=(), api_extensions=()):
+        self.ids = dict()
+        self.keys = list()
+        self.breaking_changes = list()
+        self.api_extensions = list()
+        for artifact in breaking_changes:
+            self._set(self.breaking_changes, artifact, 'breaking changes')
+        for artifact in api_extensions:
+            self._set(self.api_extensions, artifact, 'API extensions')
+        self.fill()
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def id_of(self, groupId, artifactId):
+        """Integer id of the GA, registering it if it is new."""
+        key = ga_key(groupId, artifactId)
+        artifact_id = self.ids.get(key)
+        if artifact_id is None:
+            artifact_id = len(self.keys)
+            self.ids[key] = artifact_id
+            self.keys.append(key)
+            self.breaking_changes.append(None)
+            self.api_extensions.append(None)
+        return artifact_id
+
+    def _set(self, side, artifact, name):
+        artifact_id = self.id_of(artifact.groupId, artifact.artifactId)
+        if side[artifact_id] is not None:
+            raise ValueError('%s appears twice in the %s, compress the majors first' % (artifact, name))
+        side[artifact_id] = artifact
+
+    def fill(self):
+        """Gives every GA a placeholder on the side it is missing from, with the number of methods of the other."""
+        for artifact_id in range(len(self.keys)):
+            bc = self.breaking_changes[artifact_id]
+            api = self.api_extensions[artifact_id]
+            if bc is None and api is None:
+                groupId, artifactId = self.keys[artifact_id].split('|', 1)
+                self.breaking_changes[artifact_id] = placeholder(groupId, artifactId)
+                self.api_extensions[artifact_id] = placeholder(groupId, artifactId)
+            elif bc is None:
+                self.breaking_changes[artifact_id] = placeholder(api.groupId, api.artifactId, api.numberMethods)
+            elif api is None:
+                self.api_extensions[artifact_id] = placeholder(bc.groupId, bc.artifactId, bc.numberMethods)
+
+    def add_missing(self, keys):
+        """Registers the 'groupId|artifactId' keys that are not known yet, returns how many there were."""
+        before = len(self.keys)
+        for key in keys:
+            if key not in self.ids:
+                groupId, artifactId = key.split('|', 1)
+                self.id_of(groupId, artifactId)
+        self.fill()
+        return len(self.keys) - before
+
+    def pairs(self):
+        """(breaking changes, API extensions) of every GA, in id order."""
+        return list(zip(self.breaking_changes, self.api_extensions))
+
+
+def pair_by_ga(breaking_changes, api_extensions):
+    """Pairs the artifacts of the two sides by GA, with placeholders for the GAs that are on one side only."""
+    return ArtifactRegistry(breaking_changes, api_extensions).pairs()
@@ -0,0 +1,314 @@
+"""
+Long-lived local lookup service for the popularity and violation data, so tools that ask many questions do not read
+the files again for every one. The data is loaded once: the popularity from a store built by
+semver_popularity.popularity_store, the violations from the violation files through their callable stores.
+
+    python -m semver_popularity.service serve --store resources/popularity.store \\
+        --breaking-changes resources/breaking_changes.txt --api-extensions resources/api_extensions.txt --port 8765
+    python -m semver_popularity.service query --port 8765 --callables 4835670450 2311543068
+    python -m semver_popularity.service query --port 8765 --gas com.azure:azure-core:1
+    python -m semver_popularity.service stats --port 8765
+
+The API is JSON over HTTP, on a TCP port of localhost or on a Unix socket (`--socket PATH`):
+
+    POST /lookup  {"callables": [id, ...], "gas": ["groupId:artifactId" or "groupId:artifactId:major", ...]}
+    GET  /callable?id=<id>&id=<id>
+    GET  /ga?ga=<groupId:artifactId[:major]>
+    GET  /stats
+
+A callable answer gives its value for every metric (null if it has none) and the GA majors whose breaking changes
+and API extensions it is part of. A GA answer gives the violations and method counts of its majors. Answers are kept
+in an LRU cache per question; the hits and misses are in /stats.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from .callables import CallableStore
+from .parsing import iter_records
+from .popularity_store import PopularityStore
+
+DEFAULT_PORT = 8765
+CACHE_SIZE = 100000
+ID_RANGE = (np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+VIOLATION_KINDS = ('breaking_changes', 'api_extensions')
+
+
+class LRUCache:
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get_many(self, keys, compute):
+        """Values of the keys, `compute` is given the keys that are not cached and returns their values."""
+        values = dict()
+        missing = list()
+        with self.lock:
+            for key in keys:
+                if key in self.entries:
+                    self.hits += 1
+                    self.entries.move_to_end(key)
+                    values[key] = self.entries[key]
+                elif key not in values:
+                    self.misses += 1
+                    values[key] = None
+                    missing.append(key)
+        if missing:
+            computed = compute(missing)
+            with self.lock:
+                for key, value in zip(missing, computed):
+                    values[key] = value
+                    self.entries[key] = value
+                    self.entries.move_to_end(key)
+                while len(self.entries) > self.size:
+                    self.entries.popitem(last=False)
+        return [values[key] for key in keys]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {'size': len(self.entries), 'capacity': self.size, 'hits': self.hits, 'misses': self.misses,
+                    'hit_ratio': self.hits / lookups if lookups > 0 else None}
+
+
+class Violations:
+    """The majors of one violation file and the callable store of its callables, row i being major i."""
+
+    def __init__(self, path):
+        self.majors = [record[:5] for record in iter_records(path)]
+        self.callables = CallableStore.load(path)
+        self.rows_of_ga = dict()
+        for row, (groupId, artifactId, majorVersion, _, _) in enumerate(self.majors):
+            self.rows_of_ga.setdefault(groupId + ':' + artifactId, list()).append(row)
+
+    def majors_of_callable(self, callable_id):
+        """'groupId:artifactId:major' of every major with the callable among its violations."""
+        rows = self.callables.row_of(self.callables.by_id(callable_id))
+        return ['%s:%s:%d' % self.majors[row][:3] for row in sorted(set(rows.tolist()))]
+
+    def majors_of_ga(self, ga, major=None):
+        return [{'major': majorVersion, 'violations': violations, 'methods': numberMethods}
+                for groupId, artifactId, majorVersion, violations, numberMethods
+                in (self.majors[row] for row in self.rows_of_ga.get(ga, ()))
+                if major is None or majorVersion == major]
+
+
+class LookupService:
+    def __init__(self, store=None, violation_files=None, cache_size=CACHE_SIZE):
+        self.store = store
+        self.violations = {kind: Violations(path) for kind, path in (violation_files or dict()).items()}
+        self.cache = LRUCache(cache_size)
+        self.requests = 0
+
+    @classmethod
+    def open(cls, store_path=None, breaking_changes=None, api_extensions=None, cache_size=CACHE_SIZE):
+        files = {kind: path for kind, path in zip(VIOLATION_KINDS, (breaking_changes, api_extensions))
+                 if path is not None}
+        return cls(PopularityStore.open(store_path) if store_path else None, files, cache_size)
+
+    def _callables(self, callable_ids):
+        """Answers for the ids, with one search of the store per metric for all of them."""
+        answers = [{'id': callable_id, 'popularity': dict()} for callable_id in callable_ids]
+        if self.store is not None:
+            for metric in self.store.metrics:
+                values, found = self.store.lookup(metric, np.array(callable_ids, dtype=np.int64))
+                for answer, value, known in zip(answers, values.tolist(), found.tolist()):
+                    answer['popularity'][metric] = value if known and not np.isnan(value) else None
+        for answer in answers:
+            for kind, violations in self.violations.items():
+                answer[kind] = violations.majors_of_callable(answer['id'])
+        return answers
+
+    def _ga(self, ga):
+        parts = ga.split(':')
+        if len(parts) not in (2, 3):
+            raise ValueError('expected groupId:artifactId or groupId:artifactId:major, got %r' % ga)
+        major = int(parts[2]) if len(parts) == 3 else None
+        answer = {'ga': ga}
+        for kind, violations in self.violations.items():
+            answer[kind] = violations.majors_of_ga(parts[0] + ':' + parts[1], major)
+        return answer
+
+    def callables(self, callable_ids):
+        keys = [('callable', int(callable_id)) for callable_id in callable_ids]
+        for _, callable_id in keys:
+            if not ID_RANGE[0] <= callable_id <= ID_RANGE[1]:
+                raise ValueError('callable id %d is out of the 64-bit range' % callable_id)
+        return self.cache.get_many(keys, lambda missing: self._callables([key[1] for key in missing]))
+
+    def gas(self, gas):
+        keys = [('ga', str(ga)) for ga in gas]
+        return self.cache.get_many(keys, lambda missing: [self._ga(key[1]) for key in missing])
+
+    def lookup(self, request):
+        if not isinstance(request, dict):
+            raise ValueError('expected a JSON object, got %s' % type(request).__name__)
+        for name in ('callables', 'gas'):
+            if not isinstance(request.get(name, []), list):
+                raise ValueError('expected a list of %s, got %s' % (name, type(request[name]).__name__))
+        return {'callables': self.callables(request.get('callables', ())), 'gas': self.gas(request.get('gas', ()))}
+
+    def count_request(self):
+        # Handlers run on several threads, the counter is kept under the lock of the cache
+        with self.cache.lock:
+            self.requests += 1
+
+    def stats(self):
+        with self.cache.lock:
+            requests = self.requests
+        return {'requests': requests, 'cache': self.cache.stats(),
+                'metrics': self.store.metrics if self.store is not None else [],
+                'majors': {kind: len(violations.majors) for kind, violations in self.violations.items()}}
+
+
+class Handler(BaseHTTPRequestHandler):
+    service = None
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else 'unix'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _answer(self, compute):
+        try:
+            self._reply(200, compute())
+        except (ValueError, KeyError, TypeError) as error:
+            self._reply(400, {'error': str(error)})
+
+    def do_GET(self):
+        self.service.count_request()
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path == '/callable':
+            self._answer(lambda: {'callables': self.service.callables(int(i) for i in query.get('id', ()))})
+        elif url.path == '/ga':
+            self._answer(lambda: {'gas': self.service.gas(query.get('ga', ()))})
+        elif url.path == '/stats':
+            self._answer(self.service.stats)
+        else:
+            self._reply(404, {'error': 'unknown path ' + url.path})
+
+    def do_POST(self):
+        self.service.count_request()
+        if urlparse(self.path).path != '/lookup':
+            self._reply(404, {'error': 'unknown path ' + self.path})
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        self._answer(lambda: self.service.lookup(json.loads(self.rfile.read(length) or b'{}')))
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(service, port=DEFAULT_PORT, socket_path=None):
+    """HTTP server of the service on localhost:port, or on a Unix socket if a path is given."""
+    handler = type('ServiceHandler', (Handler,), {'service': service})
+    if socket_path is not None:
+        # A socket left behind by a previous server is replaced, any other file is not touched and the bind fails
+        if os.path.exists(socket_path) and stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            os.remove(socket_path)
+        return UnixHTTPServer(socket_path, handler)
+    return ThreadingHTTPServer(('127.0.0.1', port), handler)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path):
+        super().__init__('localhost')
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+class Client:
+    def __init__(self, port=DEFAULT_PORT, socket_path=None):
+        self.port = port
+        self.socket_path = socket_path
+
+    def request(self, method, path, body=None):
+        if self.socket_path is not None:
+            connection = UnixHTTPConnection(self.socket_path)
+        else:
+            connection = http.client.HTTPConnection('127.0.0.1', self.port)
+        try:
+            data = json.dumps(body).encode() if body is not None else None
+            connection.request(method, path, data, {'Content-Type': 'application/json'} if data else {})
+            response = connection.getresponse()
+            answer = json.loads(response.read())
+            if response.status != 200:
+                raise ValueError(answer.get('error', 'HTTP %d' % response.status))
+            return answer
+        finally:
+            connection.close()
+
+    def lookup(self, callables=(), gas=()):
+        return self.request('POST', '/lookup', {'callables': list(callables), 'gas': list(gas)})
+
+    def stats(self):
+        return self.request('GET', '/stats')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local lookup service for popularity and violations.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='load the data and answer lookups until interrupted')
+    serve.add_argument('--store', help='popularity store built by semver_popularity.popularity_store')
+    serve.add_argument('--breaking-changes', help='breaking changes file of the Java phase')
+    serve.add_argument('--api-extensions', help='API extensions file of the Java phase')
+    serve.add_argument('--cache-size', type=int, default=CACHE_SIZE, help='answers kept in the LRU cache')
+    query = commands.add_parser('query', help='ask a running service')
+    query.add_argument('--callables', type=int, nargs='*', default=list())
+    query.add_argument('--gas', nargs='*', default=list(), help='groupId:artifactId[:major]')
+    stats = commands.add_parser('stats', help='print the counters of a running service')
+    for command in serve, query, stats:
+        command.add_argument('--port', type=int, default=DEFAULT_PORT)
+        command.add_argument('--socket', help='Unix socket to use instead of the port')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        service = LookupService.open(args.store, args.breaking_changes, args.api_extensions, args.cache_size)
+        server = make_server(service, args.port, args.socket)
+        print('serving on %s' % (args.socket or 'http://127.0.0.1:%d' % args.port), file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if args.socket is not None and os.path.exists(args.socket):
+                os.remove(args.socket)
+        return
+    client = Client(args.port, args.socket)
+    answer = client.lookup(args.callables, args.gas) if args.command == 'query' else client.stats()
+    json.dump(answer, sys.stdout, indent=2)
+    print()
+
+
+if __name__ == '__main__':
+    main()
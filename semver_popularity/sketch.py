@@ -0,0 +1,133 @@
+"""
+Mergeable quantile sketch (KLL) of popularity values. A sketch keeps a few hundred of the values it was given, in
+levels: an item on level h stands for 2**h values. When a level is over its capacity it is sorted and every other
+item (starting at a random one of the first two) moves up a level, so the total weight stays the number of values.
+Capacities shrink by 2/3 per level below the top one, which keeps the rank error of a quantile around 1/k to 2/k
+(0.5% to 1% for the default k) however many values there are.
+
+Sketches of the same `k` merge by putting their levels together and compacting again, so the sketches of the
+packages are built once while reading them and merged for every question about a set of packages or metrics. The
+random choices come from a generator with a fixed seed, so the same values added in the same order always give the
+same sketch. NaN ('na') values are counted apart and do not take part in the quantiles.
+"""
+import numpy as np
+
+DEFAULT_K = 200
+SEED = 0
+# Points drawn from a sketch for a distribution plot
+PLOT_POINTS = 2000
+
+
+class QuantileSketch:
+    def __init__(self, k=DEFAULT_K, seed=SEED):
+        self.k = k
+        self.levels = [np.zeros(0)]
+        self.count = 0
+        self.na = 0
+        self.minimum = np.inf
+        self.maximum = -np.inf
+        self.random = np.random.default_rng(seed)
+
+    @classmethod
+    def of(cls, values, k=DEFAULT_K, seed=SEED):
+        sketch = cls(k, seed)
+        sketch.update(values)
+        return sketch
+
+    def __len__(self):
+        return self.count
+
+    def capacity(self, level):
+        depth = len(self.levels) - 1 - level
+        return max(2, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        na = np.isnan(values)
+        self.na += int(np.count_nonzero(na))
+        values = values[~na]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.minimum = min(self.minimum, float(values.min()))
+        self.maximum = max(self.maximum, float(values.max()))
+        self.levels[0] = np.concatenate((self.levels[0], values))
+        self._compact()
+
+    def merge(self, other):
+        """Adds the values of another sketch with the same k to this one."""
+        if other.k != self.k:
+            raise ValueError('cannot merge a sketch with k=%d into one with k=%d' % (other.k, self.k))
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.zeros(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate((self.levels[level], items))
+        self.count += other.count
+        self.na += other.na
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        self._compact()
+        return self
+
+    def _compact(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) <= self.capacity(level):
+                level += 1
+                continue
+            grown = level + 1 == len(self.levels)
+            if grown:
+                self.levels.append(np.zeros(0))
+            items = np.sort(items)
+            # An odd item out stays behind, so the weight of the level is kept exactly
+            kept = items[len(items) - len(items) % 2:]
+            promoted = items[self.random.integers(2):len(items) - len(items) % 2:2]
+            self.levels[level] = kept
+            self.levels[level + 1] = np.concatenate((self.levels[level + 1], promoted))
+            # A new top level lowers the capacities of all others, which are checked again from the bottom
+            level = 0 if grown else level + 1
+
+    def weighted_items(self):
+        """The items of all levels sorted by value, and their weights."""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0 ** h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], weights[order]
+
+    def quantiles(self, qs):
+        """Approximate quantiles, interpolated between the items at the middle of their weights. NaN when empty."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.count == 0:
+            return np.full(qs.shape, np.nan)
+        items, weights = self.weighted_items()
+        positions = (np.cumsum(weights) - weights / 2) / self.count
+        result = np.interp(qs, positions, items)
+        result = np.where(qs <= 0, self.minimum, np.where(qs >= 1, self.maximum, result))
+        return np.clip(result, self.minimum, self.maximum)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def rank(self, value):
+        """Approximate fraction of the values that are at most `value`."""
+        if self.count == 0:
+            return np.nan
+        items, weights = self.weighted_items()
+        return float(weights[:np.searchsorted(items, value, side='right')].sum() / self.count)
+
+    def representatives(self, points=PLOT_POINTS):
+        """`points` values spread like the sketched ones, the quantiles at the middles of equal steps."""
+        return self.quantiles((np.arange(points) + 0.5) / points)
+
+    @property
+    def retained(self):
+        return sum(len(level) for level in self.levels)
+
+
+def merge_all(sketches, k=DEFAULT_K):
+    """One sketch of the values of all the sketches."""
+    merged = QuantileSketch(k)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,147 @@
+"""
+Per-package summary of a popularity metric: the number of methods, of zero and 'na' values, and the mean, median,
+minimum and maximum of the defined values. The table is computed once at ingest and kept next to the popularity
+data, so the figures and numbers that only need these few values per package do not read every value again:
+
+    python -m semver_popularity.summaries resources/only_publics resources/only_publics.summary.csv
+
+The table is a CSV file with one row per metric and package. Its first line is a comment with the source stamps of
+the metrics it holds (see semver_popularity.popularity_store), so users can tell whether it is that of the tree.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from dataclasses import astuple, dataclass, fields
+
+import numpy as np
+
+from .binfiles import read_bin
+from .popularity_store import METRICS, PopularityStore, source_stamp
+
+STAMP_PREFIX = '# source stamps: '
+
+
+@dataclass
+class PackageSummary:
+    metric: str
+    package: str
+    n: int
+    zeros: int
+    na: int
+    mean: float
+    median: float
+    minimum: float
+    maximum: float
+
+    @property
+    def non_zero(self):
+        """Defined values other than zero, those the analyses of popularity_of_methods.py keep."""
+        return self.n - self.zeros - self.na
+
+    @property
+    def zero_ratio(self):
+        return self.zeros / self.n if self.n > 0 else np.nan
+
+
+FIELDS = tuple(field.name for field in fields(PackageSummary))
+_TYPES = {field.name: field.type for field in fields(PackageSummary)}
+
+
+def summarize(metric, package, values):
+    values = np.asarray(values, dtype=np.float64)
+    defined = values[~np.isnan(values)]
+    if len(defined) == 0:
+        statistics = (np.nan,) * 4
+    else:
+        statistics = (defined.mean(), np.median(defined), defined.min(), defined.max())
+    return PackageSummary(metric, package, len(values), int(np.count_nonzero(defined == 0.0)),
+                          len(values) - len(defined), *(float(statistic) for statistic in statistics))
+
+
+def summarize_packages(metric, packages):
+    """Summaries of the (package, values) pairs, in their order."""
+    return [summarize(metric, package, values) for package, values in packages]
+
+
+def iter_directory(popularity_dir, metric):
+    """(package, values) of every `<package>/<metric>.bin` of a popularity directory, by package name."""
+    for package in sorted(os.listdir(popularity_dir)):
+        path = os.path.join(popularity_dir, package, metric + '.bin')
+        if os.path.exists(path):
+            yield package, read_bin(path)[1]
+
+
+def write_summaries(path, summaries, source_stamps=None):
+    """Writes the table, with the source stamps of the metrics (metric -> stamp) if they are known."""
+    temporary_path = str(path) + '.tmp'
+    with open(temporary_path, 'w', newline='') as file:
+        if source_stamps:
+            file.write(STAMP_PREFIX + json.dumps(source_stamps) + '\n')
+        writer = csv.writer(file)
+        writer.writerow(FIELDS)
+        for summary in summaries:
+            writer.writerow([repr(value) if isinstance(value, float) else value for value in astuple(summary)])
+    os.replace(temporary_path, path)
+
+
+def read_summaries(path, metric=None):
+    """The summaries in the table, only those of `metric` if given."""
+    with open(path, newline='') as file:
+        reader = csv.DictReader(line for line in file if not line.startswith('#'))
+        summaries = [PackageSummary(**{name: _TYPES[name](row[name]) for name in FIELDS}) for row in reader]
+    if metric is not None:
+        summaries = [summary for summary in summaries if summary.metric == metric]
+    return summaries
+
+
+def read_source_stamps(path):
+    """The source stamps written with the table, empty for tables written without them."""
+    with open(path) as file:
+        line = file.readline()
+    return json.loads(line[len(STAMP_PREFIX):]) if line.startswith(STAMP_PREFIX) else dict()
+
+
+def is_current(path, popularity_dir, metric):
+    """Whether the table holds the metric as the .bin files of the directory are now."""
+    stamp = read_source_stamps(path).get(metric)
+    return stamp is not None and stamp == source_stamp(popularity_dir, metric)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Writes the per-package summary table of a popularity directory '
+                                                 'or store.')
+    parser.add_argument('popularity', help='popularity directory, or a store built by semver_popularity.'
+                                           'popularity_store')
+    parser.add_argument('output')
+    parser.add_argument('--metrics', nargs='+',
+                        help='metrics to summarize (default: all of a directory, those held by a store)')
+    args = parser.parse_args()
+
+    summaries = list()
+    if os.path.isdir(args.popularity):
+        metrics = args.metrics or list(METRICS)
+        # Taken before reading, like the stamps of a store; metrics without files are not stamped
+        source_stamps = {metric: source_stamp(args.popularity, metric) for metric in metrics}
+        source_stamps = {metric: stamp for metric, stamp in source_stamps.items() if stamp is not None}
+        for metric in metrics:
+            summaries.extend(summarize_packages(metric, iter_directory(args.popularity, metric)))
+    else:
+        store = PopularityStore.open(args.popularity)
+        metrics = args.metrics or store.metrics
+        missing = [metric for metric in metrics if metric not in store.metrics]
+        if missing:
+            print('skipping %s, not in the store %s' % (', '.join(missing), args.popularity), file=sys.stderr)
+            metrics = [metric for metric in metrics if metric in store.metrics]
+        source_stamps = {metric: store.source_stamps[metric] for metric in metrics if metric in store.source_stamps}
+        for metric in metrics:
+            packages = ((package, values) for package, (_, values) in store.iter_packages(metric))
+            summaries.extend(summarize_packages(metric, packages))
+    write_summaries(args.output, summaries, source_stamps)
+    for metric in metrics:
+        print('%s: %s packages' % (metric, sum(1 for summary in summaries if summary.metric == metric)))
+
+
+if __name__ == '__main__':
+    main()
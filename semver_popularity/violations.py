@@ -0,0 +1,129 @@
+"""
+Numbers reported about the violations, without any plotting. Every function takes the compressed artifacts (or the
+majors) and returns plain values, arrays or small dataclasses; the scripts print them and plot on top of them.
+scipy is only imported when a t-test is actually run.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+
+import numpy as np
+
+from .instrumentation import count_first, instrument
+from .parallel import map_artifacts
+
+
+@dataclass
+class Intersection:
+    removals: int
+    additions: int
+    union: int
+
+
+@dataclass
+class HistogramSummary:
+    all: int
+    non_zero: int
+    average_non_zero: float
+    at_least_ten: int
+    less_than_one: int
+    less_than_fifteen: int
+    at_least_fifty: int
+
+
+@dataclass
+class TTests:
+    greater: object
+    less: object
+    two_sided: object
+
+
+def violation_percentages(versions):
+    """Percentage of violated methods of every artifact, sorted."""
+    percentages = np.array([version.violations / version.numberMethods * 100 for version in versions])
+    percentages.sort()
+    return percentages
+
+
+def histogram_summary(percentages):
+    non_zero = percentages[percentages != 0]
+    return HistogramSummary(
+        all=len(percentages),
+        non_zero=len(non_zero),
+        average_non_zero=float(sum(non_zero.tolist()) / len(non_zero)) if len(non_zero) > 0 else float('nan'),
+        at_least_ten=int(np.count_nonzero(non_zero >= 10)),
+        less_than_one=int(np.count_nonzero(non_zero < 1)),
+        less_than_fifteen=int(np.count_nonzero(non_zero < 15)),
+        at_least_fifty=int(np.count_nonzero(non_zero >= 50)),
+    )
+
+
+def trendline_points(versions):
+    """Number of methods and of violations of the artifacts that have both."""
+    methods = np.array([version.numberMethods for version in versions])
+    violations = np.array([version.violations for version in versions])
+    kept = (methods > 0) & (violations > 0)
+    return methods[kept], violations[kept]
+
+
+def average_breaking_changes(versions):
+    """
+    Average, over the GAs with at least one violation, of their violations divided by their average number of
+    methods per major.
+    """
+    bc_dict = defaultdict(int)
+    number_of_major_versions = defaultdict(int)
+    total_methods = defaultdict(int)
+
+    for bc in versions:
+        key = bc.groupId + ':' + bc.artifactId
+        bc_dict[key] += bc.violations
+        total_methods[key] += bc.numberMethods
+        number_of_major_versions[key] += 1
+
+    output = [bc_dict[key] / (total_methods[key] / number_of_major_versions[key])
+              for key in bc_dict.keys() if bc_dict[key] > 0]
+    return sum(output) / len(output)
+
+
+def calculate_percentage(versions):
+    incremented = [1 for x in versions if x.violations > 0]
+    return len(incremented), sum(incremented) / len(versions) * 100
+
+
+def calculate_percentage_or(versions_one, versions_two):
+    incremented_one = [(x.groupId + ":" + x.artifactId) for x in versions_one if x.violations > 0]
+    incremented_two = [(x.groupId + ":" + x.artifactId) for x in versions_two if x.violations > 0]
+    unio = set(incremented_one).union(set(incremented_two))
+    return len(unio), len(unio) / len(versions_one) * 100
+
+
+def violated_versions(callables):
+    return set(callable_label.split("/")[1] for callable_label in callables)
+
+
+@instrument(records_in=count_first, records_out=None)
+def versions_with_violations(versions, workers=1):
+    """Number of distinct GA versions that one of the callables of the artifacts comes from."""
+    per_artifact = map_artifacts(violated_versions, [version.callables for version in versions], workers)
+    version_dict = defaultdict(set)
+    for version, version_numbers in zip(versions, per_artifact):
+        version_dict[version.groupId + ":" + version.artifactId] |= version_numbers
+    return sum(len(version_numbers) for version_numbers in version_dict.values())
+
+
+def intersect(removed, added):
+    removals = set(version.groupId + version.artifactId for version in removed if version.violations != 0)
+    additions = set(version.groupId + version.artifactId for version in added if version.violations != 0)
+    return Intersection(len(removals), len(additions), len(removals.union(additions)))
+
+
+@instrument(records_in=lambda no_bc, bc: len(no_bc) + len(bc), records_out=None)
+def popularity_ttests(no_bc, bc):
+    """Student t-tests (equal variances) of the popularity of methods without against methods with a violation."""
+    from scipy import stats
+
+    return TTests(
+        greater=stats.ttest_ind(no_bc, bc, alternative='greater'),
+        less=stats.ttest_ind(no_bc, bc, alternative='less'),
+        two_sided=stats.ttest_ind(no_bc, bc, alternative='two-sided'),
+    )
@@ -0,0 +1,52 @@
+"""
+Ratio of two populations over equally sized popularity windows, used by popularity_of_packages.py to plot how the
+share of packages with violations changes with popularity.
+"""
+import numpy as np
+
+
+def window_edges(n, max_value):
+    """
+    Returns the edges of the windows [edges[k], edges[k + 1]) up to `max_value`. They are accumulated one interval at
+    a time, exactly like the original while loop did, so floating point rounding selects the same windows.
+    """
+    interval = max_value / n
+    steps = np.full(n + 2, interval)
+    steps[0] = 0
+    edges = np.add.accumulate(steps)
+    return edges[:1 + np.count_nonzero(edges[1:] <= max_value)]
+
+
+def count_values_in_windows(sorted_values, edges, max_value):
+    """
+    Counts the values in each window [edges[k], edges[k + 1]). A window ending exactly at `max_value` also takes
+    the values equal to it, its upper bound becomes 2 as popularities are ratios.
+    """
+    upper_bounds = np.where(edges[1:] == max_value, 2, edges[1:])
+    return np.searchsorted(sorted_values, upper_bounds, side='left') - \
+        np.searchsorted(sorted_values, edges[:-1], side='left')
+
+
+def percentage_in_n_windows(first, second, n, max_value):
+    """
+    Returns, for every window with at least one value of `second` and a number of values of `first` other than
+    one, the number of values of `second` divided by the number of values of `first` (0 if `first` has none).
+    """
+    return ratio_curves(first, second, [n], max_value)[n]
+
+
+def ratio_curves(first, second, ns, max_value):
+    """`percentage_in_n_windows` for several numbers of windows, sorting the inputs only once."""
+    first = np.sort(np.asarray(first, dtype=np.float64))
+    second = np.sort(np.asarray(second, dtype=np.float64))
+    curves = dict()
+    for n in ns:
+        edges = window_edges(n, max_value)
+        first_counts = count_values_in_windows(first, edges, max_value)
+        second_counts = count_values_in_windows(second, edges, max_value)
+        kept = (second_counts > 0) & (first_counts != 1)
+        ratios = np.zeros(np.count_nonzero(kept))
+        divisible = first_counts[kept] != 0
+        ratios[divisible] = second_counts[kept][divisible] / first_counts[kept][divisible]
+        curves[n] = ratios
+    return curves
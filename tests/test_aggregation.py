@@ -0,0 +1,62 @@
+import copy
+from pathlib import Path
+
+import pytest
+
+from semver_popularity.aggregation import compress_major_to_package, compress_table
+from semver_popularity.entities import Artifact
+from semver_popularity.parsing import iter_majors, read_table
+
+BREAKING_CHANGES = Path(__file__).parent.parent / 'semver-python-phase' / 'resources' / 'breaking_changes_bynow.txt'
+
+
+def original_compress_major_to_package(versions):
+    """compress_major_to_package as it was in semver_and_popularity.py before the GA-keyed dict."""
+    compressed_set = set()
+
+    for version in versions:
+        found = False
+        for entry in compressed_set:
+            if entry.groupId == version.groupId and entry.artifactId == version.artifactId:
+                entry.numberMethods = max(entry.numberMethods, version.numberMethods)
+                entry.violations += version.violations
+                entry.callables += version.callables
+                found = True
+        if not found:
+            compressed_set.add(Artifact(version.groupId, version.artifactId, version.violations, version.numberMethods,
+                                        version.callables))
+
+    return compressed_set
+
+
+def as_tuples(artifacts):
+    return sorted((artifact.groupId, artifact.artifactId, artifact.violations, artifact.numberMethods,
+                   tuple(artifact.callables)) for artifact in artifacts)
+
+
+@pytest.fixture(scope='module')
+def majors():
+    majors = list(iter_majors(BREAKING_CHANGES))
+    # The shipped file has GAs with several majors, which is what is merged
+    assert len({(major.groupId, major.artifactId) for major in majors}) < len(majors)
+    return majors
+
+
+@pytest.fixture(scope='module')
+def expected(majors):
+    # The original appends to the callables of the first major of a GA, so it gets copies
+    return as_tuples(original_compress_major_to_package(copy.deepcopy(majors)))
+
+
+def test_compress_major_to_package_matches_original(majors, expected):
+    before = as_tuples(majors)
+    compressed = compress_major_to_package(majors)
+    assert as_tuples(compressed) == expected
+    assert as_tuples(majors) == before
+    seen = list(dict.fromkeys((major.groupId, major.artifactId) for major in majors))
+    assert [(artifact.groupId, artifact.artifactId) for artifact in compressed] == seen
+
+
+def test_compress_table_matches_original(expected):
+    table = compress_table(read_table(BREAKING_CHANGES))
+    assert as_tuples(table.artifacts()) == expected
@@ -0,0 +1,90 @@
+import glob
+import os
+import re
+
+import numpy as np
+import pytest
+
+from semver_popularity.binfiles import NA, NA_FIELD, read_bin, read_bin_lines
+
+SHIPPED = os.path.join(os.path.dirname(__file__), '..', 'resources', 'popularity_of_methods')
+
+
+def original_read(path):
+    """The line loop of the old read_popularity: every value but the last character of its line, as a string."""
+    popularities = list()
+    with open(path) as file:
+        for line in file:
+            popularities.append((line.split(",")[0], line.split(",")[1][:-1]))
+    return popularities
+
+
+def same(a, b):
+    """Equal bit for bit, NaN included."""
+    return a.dtype == b.dtype and a.shape == b.shape and np.array_equal(a.view(np.int64), b.view(np.int64))
+
+
+def write_bin(path, seed, lines=500, newline='\n', last_newline=True):
+    generator = np.random.default_rng(seed)
+    ids = generator.integers(0, 2 ** 40, size=lines)
+    values = list()
+    for value in generator.lognormal(-4, 3, size=lines):
+        kind = generator.integers(5)
+        values.append(NA if kind == 0 else '0.0' if kind == 1 else '%.6f' % value if kind == 2 else repr(float(value)))
+    text = newline.join('%d,%s' % line for line in zip(ids, values))
+    path.write_text(text + (newline if last_newline else ''), newline='')
+    return ids, values
+
+
+def test_na_only_as_a_whole_field():
+    text = '1,na\n2,nan\n3,0.5\n4,na\r\n5,na'
+    assert NA_FIELD.sub(',nan', text) == '1,nan\n2,nan\n3,0.5\n4,nan\r\n5,nan'
+    assert NA_FIELD.sub(',nan', '1,nana\n2,n\n3,na5\n') == '1,nana\n2,n\n3,na5\n'
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_the_line_parsers(tmp_path, seed):
+    path = tmp_path / 'dependent-percentage.bin'
+    ids, values = write_bin(path, seed)
+    read_ids, read_values = read_bin(path)
+    line_ids, line_values = read_bin_lines(path)
+    assert same(read_ids, line_ids) and same(read_values, line_values)
+    assert list(read_ids) == list(ids)
+
+    original = original_read(path)
+    assert [int(callable_id) for callable_id, _ in original] == list(ids)
+    assert [value for _, value in original] == values
+    expected = np.array([np.nan if value == NA else float(value) for _, value in original])
+    assert same(read_values, expected)
+    # The regex readers of popularity_of_methods.py saw the same values
+    with open(path) as file:
+        assert re.findall(r',(.*)\n', file.read()) == values
+
+
+@pytest.mark.parametrize('newline, last_newline', [('\r\n', True), ('\n', False)])
+def test_line_endings(tmp_path, newline, last_newline):
+    path = tmp_path / 'degree.bin'
+    ids, values = write_bin(path, 9, lines=50, newline=newline, last_newline=last_newline)
+    read_ids, read_values = read_bin(path)
+    line_ids, line_values = read_bin_lines(path)
+    assert same(read_ids, line_ids) and same(read_values, line_values)
+    assert len(read_ids) == len(ids) and np.isnan(read_values[-1]) == (values[-1] == NA)
+
+
+def test_empty_and_single_line(tmp_path):
+    empty = tmp_path / 'empty.bin'
+    empty.write_text('')
+    assert [len(array) for array in read_bin(empty)] == [0, 0]
+    single = tmp_path / 'single.bin'
+    single.write_text('42,na')
+    ids, values = read_bin(single)
+    assert list(ids) == [42] and np.isnan(values[0])
+
+
+@pytest.mark.skipif(not os.path.isdir(SHIPPED), reason='no shipped popularity files')
+def test_shipped_files():
+    paths = sorted(glob.glob(os.path.join(SHIPPED, '*', '*.bin')))
+    for path in paths:
+        read_ids, read_values = read_bin(path)
+        line_ids, line_values = read_bin_lines(path)
+        assert same(read_ids, line_ids) and same(read_values, line_values), path
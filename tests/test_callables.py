@@ -0,0 +1,84 @@
+import numpy as np
+
+from semver_popularity.callables import RESTART_INTERVAL, STORE_SUFFIX, CallableStore, FrontCodedStrings
+from semver_popularity.parsing import iter_records
+
+HEADER = 'Skip the first line when parsing this file.\n'
+
+
+def label(callable_id, version, module, class_name, method, params='', return_type='%2Fjava.lang%2FVoidType'):
+    return '%d/%s//%s/%s.%s(%s)%s' % (callable_id, version, module, class_name, method, params, return_type)
+
+
+def violation_file(tmp_path):
+    """
+    Rows sharing long module prefixes across more than one restart interval, rows without callables, empty
+    params and a class name with a dot in it.
+    """
+    modules = ['com.example.core.impl%d' % i for i in range(RESTART_INTERVAL + 5)] + ['com.example.core']
+    rows = list()
+    callable_id = 100
+    for i, module in enumerate(modules):
+        callables = list()
+        for j in range(i % 4):
+            callables.append(label(callable_id, '1.%d.0' % j, module, 'Util' if j % 2 else 'Outer.Inner', 'run%d' % j,
+                                   '' if j == 0 else '%2Fjava.lang%2FString'))
+            callable_id += 1
+        if i % 5 == 0:
+            # The same id again, in another row
+            callables.append(label(100, '2.0.0', module, 'Util', 'run0'))
+        rows.append('com.example:a%d:1:%d/10:[%s]\n' % (i, len(callables), ', '.join(callables)))
+    path = tmp_path / 'breaking_changes.txt'
+    path.write_text(HEADER + ''.join(rows))
+    return path
+
+
+def test_front_coding_round_trip():
+    strings = sorted({'', 'a', 'ab', 'abc', 'abd', 'b'} | {'prefix.shared.%03d' % i for i in range(40)})
+    coded = FrontCodedStrings.build(strings)
+    assert coded.tolist() == strings
+    assert [coded[i] for i in range(len(strings))] == strings
+    assert [coded.index(string) for string in strings] == list(range(len(strings)))
+    assert coded.index('prefix.shared.0005') is None
+    assert coded.index('zzz') is None
+    assert FrontCodedStrings.build([]).tolist() == []
+
+
+def test_store_round_trip(tmp_path):
+    path = violation_file(tmp_path)
+    records = list(iter_records(path))
+    built = CallableStore.parse(path)
+    assert not (tmp_path / ('breaking_changes.txt' + STORE_SUFFIX)).exists()
+    CallableStore.load(path)
+    # The second load reads the saved arrays instead of parsing again
+    store = CallableStore.load(path)
+    assert (tmp_path / ('breaking_changes.txt' + STORE_SUFFIX)).exists()
+    assert np.array_equal(store.ids, built.ids) and np.array_equal(store.rows, built.rows)
+
+    labels = [callable_label for record in records for callable_label in record[5]]
+    assert [store.labels(row) for row in range(len(records))] == [record[5] for record in records]
+    assert any(record[5] == [] for record in records)
+
+    for callable_id in set(int(callable_label.split('/')[0]) for callable_label in labels):
+        indices = store.by_id(callable_id)
+        assert [labels[index] for index in indices] == \
+            [callable_label for callable_label in labels if callable_label.startswith('%d/' % callable_id)]
+        assert list(store.row_of(indices)) == [row for row, record in enumerate(records)
+                                               for callable_label in record[5]
+                                               if callable_label.startswith('%d/' % callable_id)]
+    assert len(store.by_id(100)) > 1
+    assert len(store.by_id(99)) == 0
+    assert list(store.contains_ids([99, 100, 101])) == [False, True, True]
+
+    indices = store.by_class('com.example.core.impl1', 'Outer.Inner')
+    assert [labels[index] for index in indices] == [label(100, '1.0.0', 'com.example.core.impl1', 'Outer.Inner',
+                                                          'run0')]
+    assert len(store.by_class('com.example.core.impl1', 'Missing')) == 0
+
+
+def test_load_parses_a_changed_file_again(tmp_path):
+    path = violation_file(tmp_path)
+    CallableStore.load(path)
+    path.write_text(HEADER + 'com.example:a:1:1/10:[%s]\n' % label(7, '1.0.0', 'm', 'C', 'f'))
+    store = CallableStore.load(path)
+    assert store.labels(0) == [label(7, '1.0.0', 'm', 'C', 'f')]
@@ -0,0 +1,52 @@
+import numpy as np
+
+from semver_popularity.coordinates import CoordinateIndex, parse_number
+
+VERSIONS = ['1.0.0', '2.0.0', '1.1.0', '1.0.1', '1.00.0', '1.0.00', '1.01.0', '1.0.0-beta', '1.0-beta.0', '1.0',
+            '3', '1.0.0.Final', '1.2.3.4', '0.0.0', '10.0.0', '1.0.', '1..0', '1.٣.0', '1.0.0²']
+
+
+def original_counts(path, artifacts):
+    """versions_with_modules_bc and versions_with_modules_ax as they were in analysis.py."""
+    bc = 0
+    ax = 0
+    with open(path, 'r') as file:
+        for version in file:
+            split = version.split(":")
+            if split[0] + ":" + split[1] in artifacts:
+                if not (len(split[2][:-1].split(".")) > 2 and split[2][:-1].split(".")[1] == '0' and
+                        split[2][:-1].split(".")[2] == '0'):
+                    bc += 1
+                if not (len(split[2][:-1].split(".")) > 2 and split[2][:-1].split(".")[2] == '0'):
+                    ax += 1
+    return bc, ax
+
+
+def test_parse_number():
+    assert [parse_number(part) for part in ['0', '7', '10', '00', '01', '', '0-beta', '٣', '²']] == \
+        [0, 7, 10, -1, -1, -1, -1, -1, -1]
+
+
+def test_counts_match_the_string_checks(tmp_path):
+    path = tmp_path / 'mvn.expanded_coords.txt'
+    lines = ['g%d:a%d:%s' % (i % 3, i % 2, version) for i, version in enumerate(VERSIONS * 3)]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    index = CoordinateIndex.parse(path)
+    for artifacts in (['g0:a0'], ['g1:a1', 'g2:a0'], ['g%d:a%d' % (g, a) for g in range(3) for a in range(2)], []):
+        assert (index.count(artifacts, ('minor', 'patch')), index.count(artifacts, ('patch',))) == \
+            original_counts(path, artifacts)
+
+
+def test_release_kinds(tmp_path):
+    path = tmp_path / 'mvn.expanded_coords.txt'
+    path.write_text(''.join('g:a:%s\n' % version for version in VERSIONS), encoding='utf-8')
+    index = CoordinateIndex.load(path, str(tmp_path / 'index.npz'))
+    kinds = np.select([index.release_kind('major'), index.release_kind('minor')], ['major', 'minor'], 'patch')
+    assert dict(zip(VERSIONS, kinds.tolist())) == {
+        '1.0.0': 'major', '2.0.0': 'major', '1.1.0': 'minor', '1.0.1': 'patch', '1.00.0': 'minor', '1.0.00': 'patch',
+        '1.01.0': 'minor', '1.0.0-beta': 'patch', '1.0-beta.0': 'minor', '1.0': 'patch', '3': 'patch',
+        '1.0.0.Final': 'major', '1.2.3.4': 'patch', '0.0.0': 'major', '10.0.0': 'major', '1.0.': 'patch',
+        '1..0': 'minor', '1.٣.0': 'minor', '1.0.0²': 'patch'}
+    # The second load reads the saved index
+    again = CoordinateIndex.load(path, str(tmp_path / 'index.npz'))
+    assert np.array_equal(again.minor, index.minor) and np.array_equal(again.patch, index.patch)
@@ -0,0 +1,42 @@
+from semver_popularity.directory_index import DirectoryIndex
+
+DEPENDENTS = ['com.chuusai_shapeless_2.13_2.3.3', 'com.chuusai_shapeless_2.12_2.3.2',
+              'com.google.errorprone_error_prone_annotation_2.3.1',
+              'com.google.errorprone_error_prone_annotation_2.4.0',
+              'com.google.errorprone_error_prone_annotations_2.4.0', 'com.google.errorprone_error_prone-core_1.0',
+              'junit_junit_4.13']
+
+
+def dependents_index(tmp_path):
+    for name in DEPENDENTS:
+        (tmp_path / name).mkdir()
+    return DirectoryIndex.load(tmp_path, layout='dependents', index_file=str(tmp_path) + '.ga-index.json')
+
+
+def test_dependents_artifact_id_with_underscores(tmp_path):
+    index = dependents_index(tmp_path)
+    assert index.lookup('com.chuusai', 'shapeless_2.13') == ['com.chuusai_shapeless_2.13_2.3.3']
+    assert index.versions('com.google.errorprone', 'error_prone_annotation') == ['2.3.1', '2.4.0']
+    assert index.lookup('com.google.errorprone', 'error_prone_annotation', 'all') == [
+        'com.google.errorprone_error_prone_annotation_2.3.1', 'com.google.errorprone_error_prone_annotation_2.4.0']
+    assert index.lookup('com.google.errorprone', 'error_prone_annotation') == [
+        'com.google.errorprone_error_prone_annotation_2.4.0']
+    assert index.lookup('junit', 'junit') == ['junit_junit_4.13']
+    # Directories of longer artifactIds starting with the same name are not versions of the shorter one
+    assert index.lookup('com.chuusai', 'shapeless', 'all') == []
+    assert index.lookup('com.google.errorprone', 'error_prone', 'all') == []
+
+
+def test_dependents_index_is_reloaded(tmp_path):
+    dependents_index(tmp_path)
+    index = DirectoryIndex.load(tmp_path, layout='dependents', index_file=str(tmp_path) + '.ga-index.json')
+    assert index.lookup('com.chuusai', 'shapeless_2.12') == ['com.chuusai_shapeless_2.12_2.3.2']
+
+
+def test_popularity_layout(tmp_path):
+    for name in ('com.azure:azure-core$1.27.0', 'com.azure:azure-core$1.28.0', 'com.azure:azure-core-http$1.0'):
+        (tmp_path / name).mkdir()
+    index = DirectoryIndex.build(tmp_path)
+    assert index.lookup('com.azure', 'azure-core') == ['com.azure:azure-core$1.28.0']
+    assert index.lookup('com.azure', 'azure-core', 'all') == ['com.azure:azure-core$1.27.0',
+                                                              'com.azure:azure-core$1.28.0']
@@ -0,0 +1,125 @@
+import numpy as np
+import pytest
+
+from semver_popularity.duplicates import CATEGORIES, LabelParser, remove_duplicate_names
+
+# Small pools, so labels of one version often differ in a single field
+MODULES = ['m1', 'm2']
+CLASSES = ['A', 'B', 'Outer.Inner']
+METHODS = ['f', 'g']
+RETURNS = ['', 'int', 'java.lang.String']
+PARAMS = ['V', 'I']
+VERSIONS = ['1.0.0', '1.1.0', '2.0.0']
+
+
+class Duplicate:
+    """The Duplicate class of analysis.py as it was before the labels were parsed once."""
+
+    def __eq__(self, other):
+        if self.category == "module":
+            return self.class_name == other.class_name and self.method_name == other.method_name \
+                and self.parameters == other.parameters and self.return_type == other.return_type
+        if self.category == "class":
+            return self.module_name == other.module_name and self.method_name == other.method_name \
+                and self.parameters == other.parameters and self.return_type == other.return_type
+        if self.category == "method":
+            return self.module_name == other.module_name and self.class_name == other.class_name \
+                and self.parameters == other.parameters and self.return_type == other.return_type
+        if self.category == "params":
+            return self.module_name == other.module_name and self.class_name == other.class_name \
+                and self.method_name == other.method_name and self.return_type == other.return_type
+        if self.category == "return":
+            return self.module_name == other.module_name and self.class_name == other.class_name \
+                and self.method_name == other.method_name and self.parameters == other.parameters
+        raise Exception("No duplication category specified!")
+
+    def __init__(self, complete_label, category):
+        split_slash = complete_label.split("/")
+        self.module_name = split_slash[0]
+        split_dot = split_slash[1].split(".")
+        self.class_name = split_dot[0]
+        self.method_name = ''.join(split_dot[1::]).split("(")[0]
+        return_and_parameters = ''.join(split_dot[1::]).split("(")[1].split(")")
+        self.return_type = return_and_parameters[0]
+        self.parameters = return_and_parameters[1]
+        self.category = category
+
+    def __hash__(self):
+        if self.category == "module":
+            return hash(self.class_name + self.method_name + self.parameters + self.return_type)
+        if self.category == "class":
+            return hash(self.module_name + self.method_name + self.parameters + self.return_type)
+        if self.category == "method":
+            return hash(self.module_name + self.class_name + self.parameters + self.return_type)
+        if self.category == "params":
+            return hash(self.module_name + self.class_name + self.method_name + self.return_type)
+        if self.category == "return":
+            return hash(self.module_name + self.class_name + self.method_name + self.parameters)
+        raise Exception("No duplication category specified!")
+
+
+def get_name(callable_label):
+    return callable_label.split("/")[1], callable_label.split("//")[1]
+
+
+def original_remove_duplicate_names(bc_callables, api_callables):
+    """The per-artifact body of the old calculate_duplicate_names loop, for all categories in turn."""
+    counts = dict()
+    for category in CATEGORIES:
+        bc_version_dict = dict()
+        api_version_dict = dict()
+        for label in bc_callables:
+            version, name = get_name(label)
+            bc_version_dict.setdefault(version, set()).add(Duplicate(name, category))
+        for label in api_callables:
+            version, name = get_name(label)
+            api_version_dict.setdefault(version, set()).add(Duplicate(name, category))
+
+        to_remove_from_aix = set()
+        for version in bc_version_dict.keys():
+            if version in api_version_dict:
+                to_remove_from_aix = to_remove_from_aix.union(
+                    bc_version_dict[version].intersection(api_version_dict[version]))
+
+        callables_without_duplicates = list()
+        for label in api_callables:
+            if Duplicate(get_name(label)[1], category) not in to_remove_from_aix:
+                callables_without_duplicates.append(label)
+        counts[category] = (len(api_callables) - len(callables_without_duplicates), len(to_remove_from_aix))
+        api_callables = callables_without_duplicates
+    return api_callables, counts
+
+
+def label(generator, callable_id):
+    return '%d/%s//%s/%s.%s(%s)%s' % (
+        callable_id, generator.choice(VERSIONS), generator.choice(MODULES), generator.choice(CLASSES),
+        generator.choice(METHODS), generator.choice(RETURNS), generator.choice(PARAMS))
+
+
+def artifacts(seed, count=40):
+    """(bc callables, api callables) of `count` artifacts, including artifacts without one or the other."""
+    generator = np.random.default_rng(seed)
+    pairs = [([], []), ([label(generator, 0)], []), ([], [label(generator, 1)])]
+    for _ in range(count - len(pairs)):
+        pairs.append(([label(generator, i) for i in range(generator.integers(0, 12))],
+                      [label(generator, i) for i in range(generator.integers(0, 12))]))
+    return pairs
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_matches_the_duplicate_class(seed):
+    parser = LabelParser()
+    for bc_callables, api_callables in artifacts(seed):
+        assert remove_duplicate_names(bc_callables, api_callables, parser=parser) == \
+            original_remove_duplicate_names(bc_callables, api_callables)
+
+
+def test_each_category_on_what_the_previous_left():
+    bc = ['1/1.0.0//m1/A.f()V']
+    api = ['2/1.0.0//m2/A.f()V', '3/1.0.0//m1/A.f()I', '4/2.0.0//m1/A.f()I', '5/1.0.0//m1/Outer.Inner.f()V']
+    kept, counts = remove_duplicate_names(bc, api)
+    # A shared key is removed from the extensions of every version, as it was, so 2.0.0 loses A.f()I too.
+    # 'Outer.Inner.f' parses as class 'Outer' and method 'Innerf', two fields off, so no category catches it.
+    assert kept == ['5/1.0.0//m1/Outer.Inner.f()V']
+    assert counts == {'module': (1, 1), 'class': (0, 0), 'method': (0, 0), 'params': (2, 1), 'return': (0, 0)}
+
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from semver_popularity.incremental import AggregateState, differences, recompute
+
+HEADER = 'groupId:artifactId:majorVersion:#violations/#totalMethods:[callables]\n'
+
+
+def majors(seed, count=120):
+    """Violation file lines over a few GAs, so most GAs get several majors, some with no violations."""
+    generator = random.Random(seed)
+    lines = list()
+    for _ in range(count):
+        ga = 'g%d:a%d' % (generator.randrange(5), generator.randrange(8))
+        violations = generator.choice([0, 0, 1, 3, 12])
+        callables = ['%d/%d.%d.0//m/C.f()V' % (generator.randrange(10 ** 6), generator.randrange(4),
+                                               generator.randrange(3)) for _ in range(violations)]
+        lines.append('%s:%d:%d/%d:[%s]\n' % (ga, generator.randrange(1, 5), violations, generator.randrange(1, 200),
+                                             ', '.join(callables)))
+    return lines
+
+
+def write(path, lines):
+    path.write_text(HEADER + ''.join(lines))
+    return str(path)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_deltas_match_a_fresh_build(tmp_path, seed):
+    sides = [majors(seed), majors(seed + 100)]
+    # The same major given twice counts twice, as a repeated line of a violation file does
+    sides[0].append(sides[0][0])
+    state_path = str(tmp_path / 'state.sqlite')
+
+    AggregateState.build(*[write(tmp_path / ('base-%d.txt' % i), side[:60]) for i, side in enumerate(sides)],
+                         state_path).close()
+    for start, stop in (60, 90), (90, None):
+        state = AggregateState.load(state_path)
+        state.apply_delta(*[write(tmp_path / ('delta-%d.txt' % i), side[start:stop]) for i, side in enumerate(sides)])
+        state.close()
+
+    full = [write(tmp_path / ('full-%d.txt' % i), side) for i, side in enumerate(sides)]
+    statistics = AggregateState.load(state_path).statistics()
+    assert differences(statistics, AggregateState.build(*full).statistics(), 1e-12) == []
+    assert differences(statistics, recompute(*full), 1e-12) == []
+
+
+def test_one_side_only(tmp_path):
+    bc, ax = majors(1), majors(2)
+    state = AggregateState.build(write(tmp_path / 'bc.txt', bc[:50]), write(tmp_path / 'ax.txt', ax))
+    assert state.apply_delta(breaking_changes=write(tmp_path / 'delta.txt', bc[50:])) == {
+        'breaking_changes': len({tuple(line.split(':')[:2]) for line in bc[50:]})}
+    full = write(tmp_path / 'full.txt', bc)
+    assert differences(state.statistics(), recompute(full, tmp_path / 'ax.txt'), 1e-12) == []
@@ -0,0 +1,54 @@
+import pytest
+
+from semver_popularity import instrumentation
+from semver_popularity.aggregation import compress_major_to_package
+from semver_popularity.entities import Major
+
+
+@pytest.fixture
+def profiling():
+    instrumentation.enable()
+    del instrumentation.records[:]
+    yield instrumentation.records
+    instrumentation.disable()
+    del instrumentation.records[:]
+
+
+def majors():
+    return [Major('g', 'a', major, 1, 10, []) for major in range(3)]
+
+
+def test_count_first():
+    assert instrumentation.count_first([1, 2, 3], workers=2) == 3
+    assert instrumentation.count_first(versions=[1, 2]) == 2
+    assert instrumentation.count_first(iter([1, 2])) is None
+    assert instrumentation.count_first(None) is None
+    assert instrumentation.count_first() is None
+
+
+def test_generators_and_keywords(profiling):
+    assert len(compress_major_to_package(majors())) == 1
+    assert len(compress_major_to_package(iter(majors()))) == 1
+    assert len(compress_major_to_package(versions=majors())) == 1
+    assert [(record['records_in'], record['records_out']) for record in profiling] == [(3, 1), (None, 1), (3, 1)]
+
+
+def test_measuring_never_fails_the_call(profiling):
+    @instrumentation.instrument(records_in=lambda values: len(values), records_out=lambda result: len(result[0]))
+    def first_word(values):
+        return ' '.join(values).split()
+
+    assert first_word(value for value in ['a b', 'c']) == ['a', 'b', 'c']
+    assert first_word(values=['']) == []
+    assert [(record['records_in'], record['records_out']) for record in profiling] == [(None, 1), (1, None)]
+    assert all('error' not in record for record in profiling)
+
+
+def test_errors_of_the_call_still_raise(profiling):
+    @instrumentation.instrument(records_in=instrumentation.count_first)
+    def fail(values):
+        raise ValueError('no')
+
+    with pytest.raises(ValueError):
+        fail([1])
+    assert profiling[-1]['error'] == 'ValueError' and profiling[-1]['records_in'] == 1
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+from semver_popularity.binfiles import read_bin
+from semver_popularity.entities import Major
+from semver_popularity.join import callable_ids_of, deduplicate, join_popularity
+
+# Few distinct values, so many callables tie
+VALUES = ['0.0', '0.0', '0.25', '0.5', '0.5', '1.0', 'na']
+
+
+def original_calculate_popularity(pop_dict, breaking_changes, callable_ids):
+    """
+    The partitions of calculate_popularity as it was in semver_and_popularity.py, on string ids and values. The
+    dictionary is filled from whole lines, without the character the old reader cut off the last line.
+    """
+    bc_callables_ids = list()
+    bc_popularity_metrics = list()
+    all_popularity_metrics = list()
+
+    for version in breaking_changes:
+        for callable_bc in version.callables:
+            callable_id = callable_bc.split('/')[0]
+            bc_callables_ids.append(callable_id)
+            if callable_id in pop_dict:
+                if pop_dict[callable_id] != 'na':
+                    bc_popularity_metrics.append(float(pop_dict[callable_id]))
+
+    for callable_id in pop_dict.keys():
+        if callable_id not in bc_callables_ids and pop_dict[callable_id] != 'na' \
+                and callable_id in callable_ids:
+            all_popularity_metrics.append(float(pop_dict[callable_id]))
+    return bc_popularity_metrics, all_popularity_metrics
+
+
+def corpus(tmp_path, seed, files=6, bc_with_popularity=True):
+    """.bin files with ties, 'na', ids repeated across files and an empty file, and majors calling some of the ids."""
+    generator = np.random.default_rng(seed)
+    paths = list()
+    for i in range(files):
+        path = tmp_path / ('%d.bin' % i)
+        rows = 0 if i == 2 else int(generator.integers(1, 60))
+        ids = generator.integers(1, 150, rows)
+        path.write_text('\n'.join('%d,%s' % (callable_id, VALUES[generator.integers(len(VALUES))])
+                                  for callable_id in ids))
+        paths.append(path)
+    bc_range = (1, 150) if bc_with_popularity else (1000, 1100)
+    majors = [Major('g', 'a%d' % i, 1, 1, 10,
+                    ['%d/1.0//m/C.f()V' % callable_id for callable_id in generator.integers(*bc_range, 8)])
+              for i in range(5)]
+    callable_ids = generator.choice(np.arange(1, 150), 100, replace=False)
+    return paths, majors, callable_ids
+
+
+def check(paths, majors, callable_ids):
+    pop_dict = dict()
+    for path in paths:
+        for line in path.read_text().splitlines():
+            callable_id, value = line.split(',')
+            pop_dict[callable_id] = value
+    bc, no_bc = original_calculate_popularity(pop_dict, majors, {str(i) for i in callable_ids})
+
+    popularities = [read_bin(path) for path in paths]
+    ids, values = deduplicate(np.concatenate([p[0] for p in popularities]),
+                              np.concatenate([p[1] for p in popularities]))
+    joined = join_popularity(ids, values, callable_ids_of(majors), callable_ids)
+
+    assert joined.bc.tolist() == bc
+    assert joined.no_bc.tolist() == no_bc
+    assert joined.bc_zeros == len(bc) - len([x for x in bc if x > 0.0])
+    assert joined.no_bc_zeros == len(no_bc) - len([x for x in no_bc if x > 0.0])
+    return joined
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_partitions_match_original(tmp_path, seed):
+    check(*corpus(tmp_path, seed))
+
+
+def test_no_breaking_change_has_popularity(tmp_path):
+    joined = check(*corpus(tmp_path, 0, bc_with_popularity=False))
+    assert len(joined.bc) == 0 and joined.bc_missing == 40
+
+
+def test_empty_popularity(tmp_path):
+    _, majors, callable_ids = corpus(tmp_path, 0)
+    empty = tmp_path / 'empty.bin'
+    empty.write_text('')
+    joined = check([empty], majors, callable_ids)
+    assert len(joined.bc) == 0 and len(joined.no_bc) == 0
@@ -0,0 +1,35 @@
+import pytest
+
+from semver_popularity.duplicates import CATEGORIES, duplicate_names_task, unique_names
+from semver_popularity.entities import Major
+from semver_popularity.parallel import map_artifacts
+from semver_popularity.violations import versions_with_violations
+from tests.test_duplicates import artifacts
+
+
+def majors(pairs):
+    """One major per side of every artifact, two artifacts sharing each GA."""
+    return [Major('g', 'a%d' % (i // 2), i % 3, len(callables), 10, callables)
+            for i, (bc, api) in enumerate(pairs) for callables in (bc, api)]
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_duplicate_names_match_a_serial_run(workers):
+    tasks = [(bc, api, list(CATEGORIES)) for bc, api in artifacts(11, count=200)]
+    serial = map_artifacts(duplicate_names_task, tasks, workers=1)
+    assert map_artifacts(duplicate_names_task, tasks, workers=workers) == serial
+    assert map_artifacts(duplicate_names_task, tasks, workers=workers, chunk_size=7) == serial
+
+
+@pytest.mark.parametrize('workers', [2, 3])
+def test_counts_match_a_serial_run(workers):
+    pairs = artifacts(12, count=200)
+    assert map_artifacts(unique_names, pairs, workers=workers) == map_artifacts(unique_names, pairs, workers=1)
+    versions = majors(pairs)
+    assert versions_with_violations(versions, workers=workers) == versions_with_violations(versions, workers=1)
+
+
+def test_single_and_no_items_stay_in_process():
+    assert map_artifacts(len, [], workers=4) == []
+    # A lambda cannot be pickled, so this only passes without a pool
+    assert map_artifacts(lambda item: item * 2, [21], workers=4) == [42]
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from semver_popularity.popularity_store import build_store
+from semver_popularity.service import Client, LookupService, make_server
+
+HEADER = 'groupId:artifactId:majorVersion:#violations/#totalMethods:[callables]\n'
+
+
+@pytest.fixture
+def service(tmp_path):
+    popularity = tmp_path / 'popularity'
+    for package, rows in (('g:a$1.0', '11,0.5\n12,0.0\n13,na'), ('g:b$2.0', '21,0.25\n11,0.75')):
+        (popularity / package).mkdir(parents=True)
+        (popularity / package / 'degree.bin').write_text(rows)
+    build_store(popularity, tmp_path / 'popularity.store', ['degree'])
+    breaking_changes = tmp_path / 'breaking_changes.txt'
+    breaking_changes.write_text(HEADER + 'g:a:1:2/10:[11/1.0//m/C.f()V, 13/1.0//m/C.g(I)V]\n'
+                                         'g:a:2:1/12:[11/2.0//m/C.f()V]\n'
+                                         'g:b:2:0/5:[]\n')
+    return LookupService.open(tmp_path / 'popularity.store', breaking_changes, cache_size=10)
+
+
+@pytest.fixture(params=['port', 'socket'])
+def client(request, service, tmp_path):
+    if request.param == 'port':
+        server = make_server(service, port=0)
+        client = Client(port=server.server_address[1])
+    else:
+        server = make_server(service, socket_path=str(tmp_path / 'service.sock'))
+        client = Client(socket_path=str(tmp_path / 'service.sock'))
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    yield client
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def test_lookup(client):
+    answer = client.lookup(callables=[11, 13, 99], gas=['g:a', 'g:a:2', 'g:b'])
+    assert answer['callables'] == [
+        {'id': 11, 'popularity': {'degree': 0.75}, 'breaking_changes': ['g:a:1', 'g:a:2']},
+        {'id': 13, 'popularity': {'degree': None}, 'breaking_changes': ['g:a:1']},
+        {'id': 99, 'popularity': {'degree': None}, 'breaking_changes': []},
+    ]
+    assert answer['gas'] == [
+        {'ga': 'g:a', 'breaking_changes': [{'major': 1, 'violations': 2, 'methods': 10},
+                                           {'major': 2, 'violations': 1, 'methods': 12}]},
+        {'ga': 'g:a:2', 'breaking_changes': [{'major': 2, 'violations': 1, 'methods': 12}]},
+        {'ga': 'g:b', 'breaking_changes': [{'major': 2, 'violations': 0, 'methods': 5}]},
+    ]
+
+
+def test_malformed_requests(client):
+    for body in ([1], {'gas': 'g:a'}, {'gas': ['g']}, {'callables': [2 ** 64]}):
+        with pytest.raises(ValueError):
+            client.request('POST', '/lookup', body)
+    with pytest.raises(ValueError, match='unknown path'):
+        client.request('GET', '/nothing')
+
+
+def test_cache_and_request_counts(client):
+    client.lookup(callables=[11, 12])
+    client.lookup(callables=[11], gas=['g:b'])
+    client.request('GET', '/callable?id=12&id=21')
+    client.request('GET', '/ga?ga=g:b')
+    stats = client.stats()
+    assert stats['cache']['misses'] == 4
+    assert stats['cache']['hits'] == 3
+    # Every request is counted, the /stats one included
+    assert stats['requests'] == 5
+    assert stats['majors'] == {'breaking_changes': 3}
+    assert stats['metrics'] == ['degree']
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from semver_popularity.sketch import QuantileSketch, merge_all
+
+QS = np.linspace(0.01, 0.99, 99)
+
+
+def lognormal_parts(seed, parts=50):
+    """Lognormal values in `parts` pieces of very different sizes, some of them empty."""
+    generator = np.random.default_rng(seed)
+    values = generator.lognormal(mean=-3, sigma=2, size=100_000)
+    cuts = np.sort(generator.integers(0, len(values), size=parts - 1))
+    return values, np.split(values, cuts)
+
+
+def rank_errors(values, sketch):
+    """|rank(quantile(q)) - q| against the exact values, for every q of QS."""
+    ordered = np.sort(values)
+    ranks = np.searchsorted(ordered, sketch.quantiles(QS), side='right') / len(ordered)
+    return np.abs(ranks - QS)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('k', [100, 200])
+def test_merged_rank_error(seed, k):
+    values, parts = lognormal_parts(seed)
+    merged = merge_all([QuantileSketch.of(part, k) for part in parts], k)
+    assert len(merged) == len(values)
+    assert merged.retained < len(values) / 50
+    assert rank_errors(values, merged).max() <= 2 / k
+    assert merged.quantile(0) == values.min() and merged.quantile(1) == values.max()
+
+
+def test_merge_is_associative_up_to_the_rank_error():
+    values, parts = lognormal_parts(7, parts=3)
+    a, b, c = [QuantileSketch.of(part) for part in parts]
+    left = QuantileSketch.of(parts[0]).merge(QuantileSketch.of(parts[1])).merge(c)
+    right = a.merge(b.merge(QuantileSketch.of(parts[2])))
+    for sketch in (left, right):
+        assert (len(sketch), sketch.na, sketch.minimum, sketch.maximum) == (len(values), 0, values.min(), values.max())
+        assert rank_errors(values, sketch).max() <= 2 / sketch.k
+    # Both within 2/k of the exact ranks, so within 4/k of each other
+    assert max(abs(right.rank(left.quantile(q)) - q) for q in QS) <= 4 / left.k
+
+
+def test_same_values_same_sketch():
+    values, parts = lognormal_parts(3, parts=5)
+    first = merge_all(QuantileSketch.of(part) for part in parts)
+    second = merge_all(QuantileSketch.of(part) for part in parts)
+    assert np.array_equal(first.quantiles(QS), second.quantiles(QS))
+
+
+def test_nan_is_counted_apart():
+    sketch = QuantileSketch.of([np.nan, 1.0, 2.0, np.nan, 3.0])
+    assert (len(sketch), sketch.na) == (3, 2)
+    assert sketch.quantile(0.5) == 2.0
+    only_nan = QuantileSketch.of([np.nan, np.nan])
+    assert (len(only_nan), only_nan.na) == (0, 2)
+    assert np.isnan(only_nan.quantile(0.5)) and np.isnan(only_nan.rank(1.0))
+    merged = merge_all([sketch, only_nan, QuantileSketch()])
+    assert (len(merged), merged.na) == (3, 4)
+    assert merged.rank(2.0) == pytest.approx(2 / 3)
+
+
+def test_merge_refuses_another_k():
+    with pytest.raises(ValueError):
+        QuantileSketch(100).merge(QuantileSketch(200))
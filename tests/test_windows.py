@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from semver_popularity.windows import percentage_in_n_windows, ratio_curves
+
+
+def original_percentage_in_n_windows(first, second, n, max):
+    """percentage_in_n_windows as it was in popularity_of_packages.py before it was vectorised."""
+    interval = max / n
+    window = [0, interval]
+    result = list()
+
+    while window[1] <= max:
+
+        second_count = original_count_values_in_window(second, window, max)
+        first_count = original_count_values_in_window(first, window, max)
+        if second_count > 0 and first_count != 1:
+            if first_count != 0:
+                window_value = second_count / first_count
+            else:
+                window_value = 0
+            result.append(window_value)
+        window = [window[1], window[1] + interval]
+
+    return result
+
+
+def original_count_values_in_window(values, window, max):
+    upper_bound = window[1]
+    if window[1] == max:
+        upper_bound = 2
+    return sum(window[0] <= i < upper_bound for i in values)
+
+
+def check(first, second, n, max_value):
+    expected = original_percentage_in_n_windows(first, second, n, max_value)
+    assert percentage_in_n_windows(first, second, n, max_value).tolist() == expected
+    return expected
+
+
+@pytest.mark.parametrize('n', [1, 3, 7, 10, 20, 50, 100])
+def test_random_popularities(n):
+    generator = np.random.default_rng(n)
+    first = generator.random(500) ** 3
+    second = first[generator.random(500) < 0.3]
+    max_value = float(first.max())
+    check(first.tolist(), second.tolist(), n, max_value)
+
+
+@pytest.mark.parametrize('n', [4, 8, 10, 30])
+def test_values_at_the_maximum(n):
+    # 1 / 4 and 1 / 8 add up to exactly 1, 1 / 10 and 1 / 30 do not: the last window then ends just below or above
+    first = [0.0, 0.05, 0.3, 0.3, 0.65, 0.99, 1.0, 1.0, 1.0]
+    second = [0.05, 0.3, 1.0, 1.0]
+    expected = check(first, second, n, 1.0)
+    assert len(expected) > 0
+
+
+def test_windows_with_one_value_of_first():
+    # A window with one value of `first` is skipped, one with none gives 0
+    first = [0.1, 0.5, 0.6]
+    second = [0.2]
+    assert check(first, second, 2, 1.0) == []
+    assert check(first, [0.2, 0.7], 2, 1.0) == [0.5]
+    assert check([0.1], [0.2, 0.9], 2, 1.0) == [0]
+
+
+def test_ratio_curves_match_one_by_one():
+    generator = np.random.default_rng(0)
+    first = generator.random(200)
+    second = first[:60]
+    curves = ratio_curves(first, second, [5, 10, 25], float(first.max()))
+    for n, curve in curves.items():
+        assert curve.tolist() == original_percentage_in_n_windows(first.tolist(), second.tolist(), n,
+                                                                  float(first.max()))